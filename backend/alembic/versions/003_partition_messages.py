@@ -0,0 +1,100 @@
+"""Range-partition messages by month.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-03-01 00:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_AHEAD = 3
+
+
+def _add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    op.execute("ALTER TABLE messages RENAME TO messages_legacy")
+    op.execute("ALTER TABLE messages_legacy RENAME CONSTRAINT messages_pkey TO messages_legacy_pkey")
+    op.execute("ALTER INDEX ix_messages_chat_id RENAME TO ix_messages_legacy_chat_id")
+
+    # Partition key must be part of the primary key
+    op.execute("""
+        CREATE TABLE messages (
+            id UUID NOT NULL,
+            chat_id UUID NOT NULL REFERENCES chats(id) ON DELETE CASCADE,
+            sender_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            text TEXT,
+            image_url VARCHAR(500),
+            is_read BOOLEAN NOT NULL DEFAULT false,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.create_index('ix_messages_chat_id', 'messages', ['chat_id'])
+
+    # One partition per month from the oldest message until a few months ahead
+    oldest = bind.execute(
+        sa.text("SELECT min(created_at) FROM messages_legacy")
+    ).scalar()
+    today = date.today().replace(day=1)
+    month = oldest.date().replace(day=1) if oldest else today
+    last = _add_months(today, PARTITIONS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE messages_p{month:%Y_%m} PARTITION OF messages "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+    # Catches rows outside every month; maintenance creates months ahead of
+    # time and moves any rows caught here into their month's partition
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+
+    op.execute("""
+        INSERT INTO messages (id, chat_id, sender_id, text, image_url, is_read, created_at)
+        SELECT id, chat_id, sender_id, text, image_url, is_read, coalesce(created_at, now())
+        FROM messages_legacy
+    """)
+    op.drop_table('messages_legacy')
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE messages RENAME TO messages_partitioned")
+    op.execute("ALTER INDEX ix_messages_chat_id RENAME TO ix_messages_partitioned_chat_id")
+    op.execute("ALTER TABLE messages_partitioned RENAME CONSTRAINT messages_pkey TO messages_partitioned_pkey")
+
+    op.create_table(
+        'messages',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('chat_id', sa.UUID(), nullable=False),
+        sa.Column('sender_id', sa.UUID(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column('image_url', sa.String(500), nullable=True),
+        sa.Column('is_read', sa.Boolean(), server_default='false', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['chat_id'], ['chats.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['sender_id'], ['users.id'], ondelete='CASCADE'),
+    )
+    op.create_index('ix_messages_chat_id', 'messages', ['chat_id'])
+
+    op.execute("""
+        INSERT INTO messages (id, chat_id, sender_id, text, image_url, is_read, created_at)
+        SELECT id, chat_id, sender_id, text, image_url, is_read, created_at
+        FROM messages_partitioned
+    """)
+    op.execute("DROP TABLE messages_partitioned CASCADE")
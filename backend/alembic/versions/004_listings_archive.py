@@ -0,0 +1,88 @@
+"""Archive tables for inactive listings and their favorites.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-03-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    listing_status = postgresql.ENUM(name='listingstatus', create_type=False)
+    listing_condition = postgresql.ENUM(name='listingcondition', create_type=False)
+
+    op.create_table(
+        'listings_archive',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('category_id', sa.UUID(), nullable=False),
+        sa.Column('title', sa.String(200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('currency', sa.String(3), nullable=False),
+        sa.Column('is_negotiable', sa.Boolean(), nullable=False),
+        sa.Column('condition', listing_condition, nullable=False),
+        sa.Column('images', postgresql.ARRAY(sa.String()), server_default='{}', nullable=False),
+        sa.Column('city', sa.String(100), nullable=False),
+        sa.Column('area', sa.String(100), nullable=True),
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('status', listing_status, nullable=False),
+        sa.Column('views_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('favorites_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('is_featured', sa.Boolean(), server_default='false', nullable=False),
+        sa.Column('featured_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('metadata', postgresql.JSONB(), server_default='{}', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('sold_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    )
+    op.create_index('ix_listings_archive_user_id', 'listings_archive', ['user_id'])
+
+    op.create_table(
+        'favorites_archive',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('listing_id', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_favorites_archive_user_id', 'favorites_archive', ['user_id'])
+    op.create_index('ix_favorites_archive_listing_id', 'favorites_archive', ['listing_id'])
+
+
+def downgrade() -> None:
+    # Move archived rows back so nothing is lost
+    op.execute("""
+        INSERT INTO listings (id, user_id, category_id, title, description, price, currency,
+            is_negotiable, condition, images, city, area, latitude, longitude, status,
+            views_count, favorites_count, is_featured, featured_until, metadata,
+            created_at, updated_at, expires_at, sold_at)
+        SELECT id, user_id, category_id, title, description, price, currency,
+            is_negotiable, condition, images, city, area, latitude, longitude, status,
+            views_count, favorites_count, is_featured, featured_until, metadata,
+            created_at, updated_at, expires_at, sold_at
+        FROM listings_archive
+    """)
+    op.execute("""
+        INSERT INTO favorites (id, user_id, listing_id, created_at)
+        SELECT id, user_id, listing_id, created_at FROM favorites_archive
+        WHERE user_id IN (SELECT id FROM users)
+    """)
+    op.drop_table('favorites_archive')
+    op.drop_table('listings_archive')
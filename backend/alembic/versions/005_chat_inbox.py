@@ -0,0 +1,74 @@
+"""Denormalized last message and unread counters on chats.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-04-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chats', sa.Column('last_message_id', sa.UUID(), nullable=True))
+    op.add_column('chats', sa.Column('last_message_sender_id', sa.UUID(), nullable=True))
+    op.add_column('chats', sa.Column('last_message_preview', sa.String(200), nullable=True))
+    op.add_column('chats', sa.Column('buyer_unread_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('chats', sa.Column('seller_unread_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill last message
+    op.execute("""
+        UPDATE chats SET
+            last_message_id = m.id,
+            last_message_sender_id = m.sender_id,
+            last_message_preview = left(coalesce(m.text, '📷'), 200),
+            last_message_at = m.created_at
+        FROM (
+            SELECT DISTINCT ON (chat_id) chat_id, id, sender_id, text, created_at
+            FROM messages
+            ORDER BY chat_id, created_at DESC
+        ) m
+        WHERE chats.id = m.chat_id
+    """)
+
+    # Backfill unread counters from per-message flags
+    op.execute("""
+        UPDATE chats SET
+            buyer_unread_count = u.buyer_unread,
+            seller_unread_count = u.seller_unread
+        FROM (
+            SELECT c.id AS chat_id,
+                count(*) FILTER (WHERE m.sender_id = c.seller_id) AS buyer_unread,
+                count(*) FILTER (WHERE m.sender_id = c.buyer_id) AS seller_unread
+            FROM chats c
+            JOIN messages m ON m.chat_id = c.id
+            WHERE m.is_read = false
+            GROUP BY c.id
+        ) u
+        WHERE chats.id = u.chat_id
+    """)
+
+    op.drop_index('ix_chats_buyer_id')
+    op.drop_index('ix_chats_seller_id')
+    op.create_index('ix_chats_buyer_last_message', 'chats', ['buyer_id', 'last_message_at'])
+    op.create_index('ix_chats_seller_last_message', 'chats', ['seller_id', 'last_message_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chats_seller_last_message')
+    op.drop_index('ix_chats_buyer_last_message')
+    op.create_index('ix_chats_buyer_id', 'chats', ['buyer_id'])
+    op.create_index('ix_chats_seller_id', 'chats', ['seller_id'])
+
+    op.drop_column('chats', 'seller_unread_count')
+    op.drop_column('chats', 'buyer_unread_count')
+    op.drop_column('chats', 'last_message_preview')
+    op.drop_column('chats', 'last_message_sender_id')
+    op.drop_column('chats', 'last_message_id')
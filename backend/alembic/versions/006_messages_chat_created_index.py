@@ -0,0 +1,26 @@
+"""Composite (chat_id, created_at, id) index for message history.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-04-10 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Created on the partitioned parent, so every partition gets its own copy
+    op.create_index('ix_messages_chat_created', 'messages', ['chat_id', 'created_at', 'id'])
+    op.drop_index('ix_messages_chat_id')
+
+
+def downgrade() -> None:
+    op.create_index('ix_messages_chat_id', 'messages', ['chat_id'])
+    op.drop_index('ix_messages_chat_created')
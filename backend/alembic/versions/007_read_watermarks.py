@@ -0,0 +1,60 @@
+"""Per-participant read watermarks replace per-message is_read flags.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-04-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLES = (('buyer', 'seller_id'), ('seller', 'buyer_id'))
+
+
+def upgrade() -> None:
+    for role, _ in ROLES:
+        op.add_column('chats', sa.Column(f'{role}_last_read_at', sa.DateTime(timezone=True), nullable=True))
+        op.add_column('chats', sa.Column(f'{role}_last_read_message_id', sa.UUID(), nullable=True))
+
+    # Watermark = newest message from the other participant that was read
+    for role, counterpart in ROLES:
+        op.execute(f"""
+            UPDATE chats SET
+                {role}_last_read_at = r.created_at,
+                {role}_last_read_message_id = r.id
+            FROM (
+                SELECT DISTINCT ON (m.chat_id) m.chat_id, m.id, m.created_at
+                FROM messages m
+                JOIN chats c ON c.id = m.chat_id
+                WHERE m.is_read AND m.sender_id = c.{counterpart}
+                ORDER BY m.chat_id, m.created_at DESC, m.id DESC
+            ) r
+            WHERE chats.id = r.chat_id
+        """)
+
+    op.drop_column('messages', 'is_read')
+
+
+def downgrade() -> None:
+    op.add_column('messages', sa.Column('is_read', sa.Boolean(), server_default='false', nullable=False))
+
+    for role, counterpart in ROLES:
+        op.execute(f"""
+            UPDATE messages m SET is_read = true
+            FROM chats c
+            WHERE c.id = m.chat_id
+              AND m.sender_id = c.{counterpart}
+              AND c.{role}_last_read_at IS NOT NULL
+              AND (m.created_at, m.id) <= (c.{role}_last_read_at, c.{role}_last_read_message_id)
+        """)
+
+    for role, _ in ROLES:
+        op.drop_column('chats', f'{role}_last_read_message_id')
+        op.drop_column('chats', f'{role}_last_read_at')
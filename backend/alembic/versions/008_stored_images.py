@@ -0,0 +1,44 @@
+"""Uploaded images with their rendered variants.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-05-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stored_images',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('owner_id', sa.UUID(), nullable=False),
+        sa.Column('key', sa.String(500), nullable=False),
+        sa.Column('url', sa.String(500), nullable=False),
+        sa.Column('content_type', sa.String(50), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('variants', postgresql.JSONB(), server_default='{}', nullable=False),
+        sa.Column('placeholder', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint('key'),
+        sa.UniqueConstraint('url'),
+    )
+    op.create_index('ix_stored_images_owner_id', 'stored_images', ['owner_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stored_images_owner_id')
+    op.drop_table('stored_images')
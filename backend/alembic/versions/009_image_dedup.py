@@ -0,0 +1,43 @@
+"""Content hash and reference count on stored images.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2024-05-10 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('stored_images', sa.Column('sha256', sa.String(64), nullable=True))
+    op.add_column('stored_images', sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_unique_constraint('stored_images_sha256_key', 'stored_images', ['sha256'])
+
+    # Count image slots of non-deleted live and archived listings
+    op.execute("""
+        UPDATE stored_images SET ref_count = r.n
+        FROM (
+            SELECT url, count(*) AS n
+            FROM (
+                SELECT unnest(images) AS url FROM listings WHERE status != 'deleted'
+                UNION ALL
+                SELECT unnest(images) FROM listings_archive WHERE status != 'deleted'
+            ) slots
+            GROUP BY url
+        ) r
+        WHERE stored_images.url = r.url
+    """)
+
+
+def downgrade() -> None:
+    op.drop_constraint('stored_images_sha256_key', 'stored_images')
+    op.drop_column('stored_images', 'ref_count')
+    op.drop_column('stored_images', 'sha256')
@@ -0,0 +1,33 @@
+"""Track when image references last changed, for the orphan collector.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2024-05-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'stored_images',
+        sa.Column('refs_changed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.execute("UPDATE stored_images SET refs_changed_at = coalesce(created_at, now())")
+    op.create_index(
+        'ix_stored_images_unreferenced', 'stored_images', ['refs_changed_at'],
+        postgresql_where=sa.text('ref_count <= 0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stored_images_unreferenced')
+    op.drop_column('stored_images', 'refs_changed_at')
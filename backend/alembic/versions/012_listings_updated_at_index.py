@@ -0,0 +1,24 @@
+"""Index listings.updated_at for change polling.
+
+Revision ID: 012
+Revises: 011
+Create Date: 2024-06-10 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The similar-listings index polls for rows changed in the last minute or so
+    op.create_index('ix_listings_updated_at', 'listings', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_listings_updated_at')
@@ -3,25 +3,24 @@
 from typing import Annotated
 
 from fastapi import Depends, Header, HTTPException, status
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.queries import USER_BY_TELEGRAM_ID
 from app.core.security import validate_telegram_init_data, verify_token
 from app.models.user import User
 
 
-async def get_current_user(
-    authorization: Annotated[str | None, Header()] = None,
-    x_init_data: Annotated[str | None, Header(alias="X-Init-Data")] = None,
-    db: AsyncSession = Depends(get_db),
+async def authenticate(
+    db: AsyncSession,
+    authorization: str | None = None,
+    x_init_data: str | None = None,
 ) -> User:
     """
-    Get current authenticated user.
+    Resolve the user for a JWT bearer value or Telegram initData.
     
-    Supports two auth methods:
-    1. X-Init-Data header (Telegram initData) - for initial auth
-    2. Authorization header (JWT Bearer token) - for subsequent requests
+    Shared by the HTTP dependency and by endpoints that cannot use headers
+    (WebSockets, EventSource), which pass the same values as query params.
     """
     user_data = None
     telegram_id = None
@@ -47,9 +46,7 @@ async def get_current_user(
         )
 
     # Get or create user
-    result = await db.execute(
-        select(User).where(User.telegram_id == telegram_id)
-    )
+    result = await db.execute(USER_BY_TELEGRAM_ID, {"telegram_id": telegram_id})
     user = result.scalar_one_or_none()
 
     if user is None:
@@ -83,5 +80,20 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    authorization: Annotated[str | None, Header()] = None,
+    x_init_data: Annotated[str | None, Header(alias="X-Init-Data")] = None,
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """
+    Get current authenticated user.
+    
+    Supports two auth methods:
+    1. X-Init-Data header (Telegram initData) - for initial auth
+    2. Authorization header (JWT Bearer token) - for subsequent requests
+    """
+    return await authenticate(db, authorization, x_init_data)
+
+
 # Type alias for dependency injection
 CurrentUser = Annotated[User, Depends(get_current_user)]
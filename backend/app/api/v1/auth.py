@@ -2,10 +2,10 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.queries import USER_BY_TELEGRAM_ID
 from app.core.security import create_access_token, validate_telegram_init_data
 from app.models.user import User
 
@@ -68,9 +68,7 @@ async def auth_telegram(
         )
 
     # Get or create user
-    result = await db.execute(
-        select(User).where(User.telegram_id == telegram_id)
-    )
+    result = await db.execute(USER_BY_TELEGRAM_ID, {"telegram_id": telegram_id})
     user = result.scalar_one_or_none()
 
     if user is None:
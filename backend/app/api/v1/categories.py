@@ -4,11 +4,10 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.models.category import Category
+from app.core.queries import CATEGORIES_ALL, CATEGORY_BY_SLUG
 
 router = APIRouter()
 
@@ -31,9 +30,7 @@ async def list_categories(
     db: AsyncSession = Depends(get_db),
 ):
     """List all categories."""
-    result = await db.execute(
-        select(Category).order_by(Category.sort_order, Category.name_en)
-    )
+    result = await db.execute(CATEGORIES_ALL)
     categories = result.scalars().all()
     
     return [
@@ -55,9 +52,7 @@ async def get_category(
     db: AsyncSession = Depends(get_db),
 ):
     """Get category by slug."""
-    result = await db.execute(
-        select(Category).where(Category.slug == slug)
-    )
+    result = await db.execute(CATEGORY_BY_SLUG, {"slug": slug})
     category = result.scalar_one_or_none()
     
     if not category:
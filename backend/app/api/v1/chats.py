@@ -0,0 +1,347 @@
+"""Chat endpoints: REST for history and sending, WebSocket for live delivery."""
+
+from datetime import timedelta
+from typing import Literal
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, status
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import CurrentUser, authenticate
+from app.core.database import get_db, get_db_context
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.queries import (
+    CHAT_BY_ID,
+    CHAT_BY_LISTING_BUYER,
+    LISTING_BY_ID,
+    inbox_query,
+    message_history_query,
+    messages_since_query,
+)
+from app.core.ratelimit import chat_write_limit
+from app.models.chat import Chat
+from app.services.chat import (
+    is_participant,
+    mark_read,
+    message_payload,
+    publish_message,
+    recipient_id,
+    send_message,
+    unread_count,
+)
+from app.services.chat_hub import ChatConnection, chat_hub, serve_connection
+
+router = APIRouter()
+
+# Message timestamps come from app clocks, chat timestamps from Postgres
+CLOCK_SKEW_MARGIN = timedelta(hours=1)
+
+
+# --- Schemas ---
+
+class ChatCreate(BaseModel):
+    """Start a chat about a listing."""
+    listing_id: UUID
+
+
+class ChatResponse(BaseModel):
+    """Chat response."""
+    id: str
+    listing_id: str
+    buyer_id: str
+    seller_id: str
+    is_active: bool
+    created_at: str
+    last_message_at: str | None
+    buyer_last_read_message_id: str | None
+    seller_last_read_message_id: str | None
+
+
+class MessageCreate(BaseModel):
+    """Send message request."""
+    text: str | None = Field(None, max_length=4000)
+    image_url: str | None = Field(None, max_length=500)
+
+
+class MessageFrame(MessageCreate):
+    """Send message frame on the chat socket."""
+    type: Literal["message"]
+    client_id: str | None = Field(None, max_length=100)
+
+
+class MessageResponse(BaseModel):
+    """Message response."""
+    id: str
+    chat_id: str
+    sender_id: str
+    text: str | None
+    image_url: str | None
+    created_at: str
+
+
+class MessagePage(BaseModel):
+    """Page of messages plus the cursor for the next page."""
+    items: list[MessageResponse]
+    next_cursor: str | None
+
+
+class Counterpart(BaseModel):
+    """The other participant of a chat."""
+    id: str
+    name: str
+    username: str | None
+    photo_url: str | None
+
+
+class InboxItem(BaseModel):
+    """One chat in the inbox."""
+    chat_id: str
+    listing_id: str
+    listing_title: str | None
+    listing_image: str | None
+    counterpart: Counterpart
+    last_message_id: str | None
+    last_message_preview: str | None
+    last_message_sender_id: str | None
+    last_message_at: str
+    unread_count: int
+
+
+class InboxResponse(BaseModel):
+    """Page of inbox items."""
+    items: list[InboxItem]
+    next_cursor: str | None
+
+
+def chat_to_response(chat: Chat) -> ChatResponse:
+    """Convert Chat model to ChatResponse."""
+    return ChatResponse(
+        id=str(chat.id),
+        listing_id=str(chat.listing_id),
+        buyer_id=str(chat.buyer_id),
+        seller_id=str(chat.seller_id),
+        is_active=chat.is_active,
+        created_at=chat.created_at.isoformat(),
+        last_message_at=chat.last_message_at.isoformat() if chat.last_message_at else None,
+        buyer_last_read_message_id=(
+            str(chat.buyer_last_read_message_id) if chat.buyer_last_read_message_id else None
+        ),
+        seller_last_read_message_id=(
+            str(chat.seller_last_read_message_id) if chat.seller_last_read_message_id else None
+        ),
+    )
+
+
+async def get_participant_chat(db: AsyncSession, chat_id: UUID, user_id: UUID) -> Chat:
+    """Load a chat the user takes part in, or raise 404."""
+    result = await db.execute(CHAT_BY_ID, {"chat_id": chat_id})
+    chat = result.scalar_one_or_none()
+    if not chat or not is_participant(chat, user_id):
+        raise HTTPException(status_code=404, detail="Chat not found")
+    return chat
+
+
+# --- Endpoints ---
+
+@router.get("", response_model=InboxResponse)
+async def inbox(
+    user: CurrentUser,
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    """Current user's chats, most recent first, paginated by last message time."""
+    before = None
+    if cursor:
+        before = decode_cursor(cursor)
+        if before is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    result = await db.execute(inbox_query(user.id, before, limit))
+    rows = result.all()
+
+    items = [
+        InboxItem(
+            chat_id=str(chat.id),
+            listing_id=str(chat.listing_id),
+            listing_title=listing_title,
+            listing_image=listing_image,
+            counterpart=Counterpart(
+                id=str(other.id),
+                name=other.display_name,
+                username=other.username,
+                photo_url=other.photo_url,
+            ),
+            last_message_id=str(chat.last_message_id) if chat.last_message_id else None,
+            last_message_preview=chat.last_message_preview,
+            last_message_sender_id=(
+                str(chat.last_message_sender_id) if chat.last_message_sender_id else None
+            ),
+            last_message_at=chat.last_message_at.isoformat(),
+            unread_count=unread_count(chat, user.id),
+        )
+        for chat, listing_title, listing_image, other in rows
+    ]
+
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1][0]
+        next_cursor = encode_cursor(last.last_message_at, last.id)
+
+    return InboxResponse(items=items, next_cursor=next_cursor)
+
+
+@router.post("", response_model=ChatResponse, dependencies=[Depends(chat_write_limit)])
+async def start_chat(
+    body: ChatCreate,
+    user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+):
+    """Open (or reuse) the chat between the current user and a listing's seller."""
+    result = await db.execute(LISTING_BY_ID, {"listing_id": body.listing_id})
+    listing = result.scalar_one_or_none()
+    if not listing:
+        raise HTTPException(status_code=404, detail="Listing not found")
+    if listing.user_id == user.id:
+        raise HTTPException(status_code=400, detail="Cannot chat about your own listing")
+
+    result = await db.execute(
+        CHAT_BY_LISTING_BUYER, {"listing_id": listing.id, "buyer_id": user.id}
+    )
+    chat = result.scalar_one_or_none()
+    if chat is None:
+        chat = Chat(listing_id=listing.id, buyer_id=user.id, seller_id=listing.user_id)
+        db.add(chat)
+        await db.flush()
+        await db.refresh(chat)
+
+    return chat_to_response(chat)
+
+
+@router.post(
+    "/{chat_id}/messages",
+    response_model=MessageResponse,
+    status_code=201,
+    dependencies=[Depends(chat_write_limit)],
+)
+async def post_message(
+    chat_id: UUID,
+    body: MessageCreate,
+    user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+):
+    """Send a message over HTTP (for clients without a socket)."""
+    if not body.text and not body.image_url:
+        raise HTTPException(status_code=422, detail="Message is empty")
+
+    chat = await get_participant_chat(db, chat_id, user.id)
+    message = await send_message(db, chat, user.id, body.text, body.image_url)
+    payload = message_payload(message)
+    await db.commit()
+
+    await publish_message(payload, recipient_id(chat, user.id))
+    return MessageResponse(**payload)
+
+
+@router.get("/{chat_id}/messages", response_model=MessagePage)
+async def message_history(
+    chat_id: UUID,
+    user: CurrentUser,
+    cursor: str | None = None,
+    since: str | None = None,
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Message history.
+
+    Default mode pages backwards: newest first, ``cursor`` from the previous
+    page's ``next_cursor`` continues with older messages. With ``since`` (a
+    cursor for the last message the client has), returns newer messages oldest
+    first; ``next_cursor`` then continues forward. Both use the
+    (chat_id, created_at, id) index, so cost does not grow with chat length.
+    """
+    position = cursor or since
+    decoded = decode_cursor(position) if position else None
+    if position and decoded is None:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    chat = await get_participant_chat(db, chat_id, user.id)
+
+    if since:
+        query = messages_since_query(chat.id, decoded, limit)
+    else:
+        query = message_history_query(
+            chat.id, chat.created_at - CLOCK_SKEW_MARGIN, decoded, limit
+        )
+    messages = (await db.execute(query)).scalars().all()
+
+    next_cursor = None
+    if len(messages) == limit:
+        next_cursor = encode_cursor(messages[-1].created_at, messages[-1].id)
+
+    return MessagePage(
+        items=[MessageResponse(**message_payload(m)) for m in messages],
+        next_cursor=next_cursor,
+    )
+
+
+@router.post("/{chat_id}/read")
+async def read_chat(
+    chat_id: UUID,
+    user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+):
+    """Mark the chat as read for the current user."""
+    chat = await get_participant_chat(db, chat_id, user.id)
+    await mark_read(db, chat, user.id)
+    return {"unread_count": 0}
+
+
+@router.websocket("/{chat_id}/ws")
+async def chat_socket(
+    websocket: WebSocket,
+    chat_id: UUID,
+    token: str | None = Query(None),
+    init_data: str | None = Query(None),
+):
+    """
+    Live chat socket.
+
+    Browsers cannot set headers on WebSockets, so credentials come as
+    ``?token=<jwt>`` or ``?init_data=<initData>``. The server pushes
+    ``{"type": "messages", "messages": [...]}`` batches and ``{"type": "ping"}``
+    heartbeats; the client sends ``{"type": "message", "text": ..., "client_id": ...}``
+    and answers pings with ``{"type": "pong"}``. A frame that cannot be
+    sent gets ``{"type": "error", "status": ..., "detail": ..., "client_id": ...}``.
+    """
+    # Authenticate with a short-lived session; the socket must not pin a connection
+    try:
+        async with get_db_context() as db:
+            user = await authenticate(
+                db, f"Bearer {token}" if token else None, init_data
+            )
+            await get_participant_chat(db, chat_id, user.id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    conn = ChatConnection(websocket, str(chat_id))
+    await chat_hub.join(conn)
+
+    async def on_frame(frame: dict) -> None:
+        # Validated like POST /messages; errors go back to the client as frames
+        body = MessageFrame.model_validate(frame)
+        text = (body.text or "").strip()
+        if not text and not body.image_url:
+            raise HTTPException(status_code=422, detail="Message is empty")
+        async with get_db_context() as db:
+            chat = await get_participant_chat(db, chat_id, user.id)
+            message = await send_message(db, chat, user.id, text or None, body.image_url)
+            payload = message_payload(message)
+            recipient = recipient_id(chat, user.id)
+        await publish_message(payload, recipient, client_id=body.client_id)
+
+    await serve_connection(conn, on_frame)
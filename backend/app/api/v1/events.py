@@ -0,0 +1,85 @@
+"""Server-Sent Events stream of the current user's notifications."""
+
+import asyncio
+import re
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import authenticate
+from app.core.config import settings
+from app.core.database import get_db_context
+from app.services.events import (
+    coalesce,
+    event_hub,
+    format_sse,
+    latest_event_id,
+    read_events,
+)
+
+router = APIRouter()
+
+STREAM_ID = re.compile(r"^\d+-\d+$")
+
+
+@router.get("")
+async def events(
+    request: Request,
+    token: str | None = Query(None),
+    init_data: str | None = Query(None),
+    last_event_id: str | None = Header(None),
+    authorization: str | None = Header(None),
+    x_init_data: str | None = Header(None),
+):
+    """
+    Notification stream (``text/event-stream``).
+
+    EventSource cannot set headers, so credentials may also come as
+    ``?token=<jwt>`` or ``?init_data=<initData>``. Events are ``message``,
+    ``listing_favorited`` and ``listing_sold``; each carries an ``id`` the
+    browser replays as ``Last-Event-ID`` on reconnect to resume the stream.
+    """
+    # Authenticate with a short-lived session; the stream must not pin a connection
+    async with get_db_context() as db:
+        user = await authenticate(
+            db,
+            authorization or (f"Bearer {token}" if token else None),
+            x_init_data or init_data,
+        )
+    user_id = user.id
+
+    if last_event_id and not STREAM_ID.match(last_event_id):
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    position = last_event_id or await latest_event_id(user_id)
+
+    async def stream():
+        nonlocal position
+        wake = event_hub.subscribe(user_id, position)
+        try:
+            yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+            while not await request.is_disconnected():
+                wake.clear()
+                entries = await read_events(user_id, position)
+                if not entries:
+                    try:
+                        await asyncio.wait_for(
+                            wake.wait(), timeout=settings.EVENTS_KEEPALIVE_SECONDS
+                        )
+                    except TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                    # Give a burst a moment to land so it goes out as one coalesced batch
+                    await asyncio.sleep(settings.EVENTS_COALESCE_MS / 1000)
+                    continue
+                position = entries[-1][0]
+                yield "".join(
+                    format_sse(entry_id, fields) for entry_id, fields in coalesce(entries)
+                )
+        finally:
+            event_hub.unsubscribe(user_id, wake)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,20 +1,44 @@
 """Listing endpoints."""
 
+import enum
 from datetime import UTC, datetime, timedelta
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
 from pydantic import BaseModel, Field
-from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+import structlog
 
 from app.api.deps import CurrentUser
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_db_context
+from app.core.queries import (
+    ARCHIVED_LISTING_DETAIL,
+    FAVORITE_BY_USER_LISTING,
+    LISTING_BY_ID,
+    LISTING_DETAIL,
+    LISTINGS_BY_IDS,
+    archived_user_listings_query,
+    feed_count_query,
+    feed_query,
+    user_listings_query,
+)
+from app.core.ratelimit import client_identity, listing_write_limit, search_limit
+from app.core.security import telegram_id_from_credentials
+from app.core.singleflight import singleflight
+from app.models.archive import ArchivedListing
 from app.models.listing import Listing, ListingCondition, ListingStatus
 from app.models.user import User
 from app.models.favorite import Favorite
+from app.services import events, listing_jobs, notifications
+from app.services.images import refresh_listing_images, swap_image_refs
+from app.services.ranking import affinity_cache, rank_feed, record_feed_view
+from app.services.similarity import similarity_index
+from app.services.suggest import record_search, suggest_index
+from app.services.views import record_view
+
+logger = structlog.get_logger()
 
 router = APIRouter()
 
@@ -34,6 +58,11 @@ class ListingCreate(BaseModel):
     images: list[str] = []
 
 
+class FeedSort(str, enum.Enum):
+    NEWEST = "newest"  # Featured first, then newest
+    FOR_YOU = "for_you"  # Ranked for the caller by app.services.ranking
+
+
 class ListingUpdate(BaseModel):
     """Update listing request."""
     title: str | None = None
@@ -57,6 +86,17 @@ class SellerInfo(BaseModel):
     member_since: str
 
 
+class ImageVariants(BaseModel):
+    """Rendered sizes of one listing image; None where not available."""
+    url: str
+    thumb: str | None = None
+    card: str | None = None
+    full: str | None = None
+    placeholder: str | None = None
+    width: int | None = None
+    height: int | None = None
+
+
 class ListingResponse(BaseModel):
     """Listing response."""
     id: str
@@ -67,6 +107,7 @@ class ListingResponse(BaseModel):
     is_negotiable: bool
     condition: str
     images: list[str]
+    image_variants: list[ImageVariants] = []
     city: str
     area: str | None
     status: str
@@ -80,6 +121,50 @@ class ListingResponse(BaseModel):
     is_favorited: bool = False
 
 
+def listing_to_response(
+    listing: Listing | ArchivedListing, seller: User | None = None
+) -> ListingResponse:
+    """Convert a live or archived listing to ListingResponse."""
+    variants = (listing.metadata_ or {}).get("image_variants", {})
+    return ListingResponse(
+        id=str(listing.id),
+        title=listing.title,
+        description=listing.description,
+        price=listing.price,
+        currency=listing.currency,
+        is_negotiable=listing.is_negotiable,
+        condition=listing.condition.value,
+        images=listing.images or [],
+        image_variants=[
+            ImageVariants(url=url, **variants.get(url, {})) for url in listing.images or []
+        ],
+        city=listing.city,
+        area=listing.area,
+        status=listing.status.value,
+        views_count=listing.views_count,
+        favorites_count=listing.favorites_count,
+        is_featured=listing.is_featured,
+        created_at=listing.created_at.isoformat(),
+        category_id=str(listing.category_id),
+        seller=SellerInfo(
+            id=str(seller.id),
+            name=seller.display_name,
+            username=seller.username,
+            is_verified=seller.is_verified,
+            rating=seller.rating,
+            total_sales=seller.total_sales,
+            member_since=seller.created_at.strftime("%b %Y"),
+        ) if seller else None,
+    )
+
+
+class SuggestionResponse(BaseModel):
+    """Search autocomplete entry."""
+    text: str
+    kind: str  # word, category or query
+    category_id: str | None = None
+
+
 class ListingListResponse(BaseModel):
     """Paginated listing list."""
     items: list[ListingResponse]
@@ -89,10 +174,90 @@ class ListingListResponse(BaseModel):
     has_more: bool
 
 
+# --- Shared reads ---
+
+@singleflight("listing_feed", model=ListingListResponse)
+async def load_feed(page: int, per_page: int, **filters) -> ListingListResponse:
+    """One feed page; identical concurrent requests share a single load."""
+    async with get_db_context() as db:
+        # Count
+        total = (await db.execute(feed_count_query(**filters))).scalar() or 0
+
+        # Paginate
+        offset = (page - 1) * per_page
+        result = await db.execute(feed_query(**filters, offset=offset, limit=per_page))
+        listings = result.scalars().all()
+
+        items = [listing_to_response(l, seller=l.user) for l in listings]
+
+    return ListingListResponse(
+        items=items,
+        total=total,
+        page=page,
+        per_page=per_page,
+        has_more=(offset + len(items)) < total,
+    )
+
+
+async def load_ranked_feed(
+    telegram_id: int | None, page: int, per_page: int, **filters
+) -> ListingListResponse:
+    """One page of the personalized feed; anonymous callers get the unpersonalized ranking."""
+    async with get_db_context() as db:
+        ranked = await rank_feed(db, telegram_id, **filters)
+        offset = (page - 1) * per_page
+        page_ids = ranked[offset:offset + per_page]
+        listings = {}
+        if page_ids:
+            result = await db.execute(LISTINGS_BY_IDS, {"ids": page_ids})
+            listings = {l.id: l for l in result.scalars().all()}
+
+        items = [
+            listing_to_response(listings[i], seller=listings[i].user)
+            for i in page_ids
+            if i in listings
+        ]
+
+    return ListingListResponse(
+        items=items,
+        total=len(ranked),
+        page=page,
+        per_page=per_page,
+        has_more=(offset + per_page) < len(ranked),
+    )
+
+
+@singleflight("listing_detail", model=ListingResponse)
+async def load_listing(listing_id: UUID) -> ListingResponse:
+    """Live or archived listing; identical concurrent requests share a single load."""
+    async with get_db_context() as db:
+        result = await db.execute(LISTING_DETAIL, {"listing_id": listing_id})
+        listing = result.scalar_one_or_none()
+        if not listing:
+            result = await db.execute(ARCHIVED_LISTING_DETAIL, {"listing_id": listing_id})
+            listing = result.scalar_one_or_none()
+        if not listing:
+            raise HTTPException(status_code=404, detail="Listing not found")
+        return listing_to_response(listing, seller=listing.user)
+
+
+# --- Shared writes ---
+
+async def soft_delete_listing(db: AsyncSession, listing: Listing) -> None:
+    """Mark a listing deleted and release its image references.
+
+    Deleted listings hold no references, so they cannot be edited or
+    brought back afterwards.
+    """
+    listing.status = ListingStatus.DELETED
+    await swap_image_refs(db, listing.images, [])
+
+
 # --- Endpoints ---
 
-@router.get("", response_model=ListingListResponse)
+@router.get("", response_model=ListingListResponse, dependencies=[Depends(search_limit)])
 async def list_listings(
+    request: Request,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=50),
     category: str | None = None,
@@ -101,82 +266,45 @@ async def list_listings(
     max_price: float | None = None,
     condition: ListingCondition | None = None,
     city: str = "Addis Ababa",
+    sort: FeedSort = FeedSort.NEWEST,
     seed: bool = False,  # Auto-seed param
-    db: AsyncSession = Depends(get_db),
+    authorization: Annotated[str | None, Header()] = None,
+    x_init_data: Annotated[str | None, Header(alias="X-Init-Data")] = None,
 ):
-    """List active listings with filters."""
-    query = select(Listing).where(
-        Listing.status == "active",
-        Listing.city == city,
-    ).options(selectinload(Listing.user))
-    
-    # Filters
-    if category:
-        query = query.where(Listing.category_id == category)
-    if search:
-        query = query.where(Listing.title.ilike(f"%{search}%"))
-    if min_price:
-        query = query.where(Listing.price >= min_price)
-    if max_price:
-        query = query.where(Listing.price <= max_price)
-    if condition:
-        query = query.where(Listing.condition == condition)
-    
-    # Count
-    count_query = select(func.count()).select_from(query.subquery())
-    total = (await db.execute(count_query)).scalar() or 0
-    
-    # Paginate
-    offset = (page - 1) * per_page
-    query = query.order_by(
-        Listing.is_featured.desc(),
-        Listing.created_at.desc()
-    ).offset(offset).limit(per_page)
-    
-    result = await db.execute(query)
-    listings = result.scalars().all()
-    
-    items = [
-        ListingResponse(
-            id=str(l.id),
-            title=l.title,
-            description=l.description,
-            price=l.price,
-            currency=l.currency,
-            is_negotiable=l.is_negotiable,
-            condition=l.condition.value,
-            images=l.images or [],
-            city=l.city,
-            area=l.area,
-            status=l.status.value,
-            views_count=l.views_count,
-            favorites_count=l.favorites_count,
-            is_featured=l.is_featured,
-            created_at=l.created_at.isoformat(),
-            category_id=str(l.category_id),
-            seller=SellerInfo(
-                id=str(l.user.id),
-                name=l.user.display_name,
-                username=l.user.username,
-                is_verified=l.user.is_verified,
-                rating=l.user.rating,
-                total_sales=l.user.total_sales,
-                member_since=l.user.created_at.strftime("%b %Y"),
-            ) if l.user else None,
-        )
-        for l in listings
-    ]
-    
-    return ListingListResponse(
-        items=items,
-        total=total,
-        page=page,
-        per_page=per_page,
-        has_more=(offset + len(items)) < total,
+    """List active listings with filters.
+
+    ``sort=for_you`` ranks the newest matches for the caller (credentials
+    are optional and only identify them).
+    """
+    filters = dict(
+        city=city,
+        category=category,
+        search=search,
+        min_price=min_price,
+        max_price=max_price,
+        condition=condition,
     )
+    if sort == FeedSort.FOR_YOU:
+        telegram_id = telegram_id_from_credentials(authorization, x_init_data)
+        response = await load_ranked_feed(telegram_id, page, per_page, **filters)
+    else:
+        response = await load_feed(page, per_page, **filters)
 
+    # Searches that found something become suggestions
+    if search and page == 1 and response.total:
+        try:
+            await record_search(search, client_identity(request))
+        except Exception:
+            logger.warning("search_not_recorded", exc_info=True)
+    return response
 
-@router.post("", response_model=ListingResponse, status_code=201)
+
+@router.post(
+    "",
+    response_model=ListingResponse,
+    status_code=201,
+    dependencies=[Depends(listing_write_limit)],
+)
 async def create_listing(
     body: ListingCreate,
     user: CurrentUser,
@@ -206,41 +334,15 @@ async def create_listing(
         status="active",
         expires_at=datetime.now(UTC) + timedelta(days=30),
     )
+    await refresh_listing_images(db, listing, [])
     db.add(listing)
-    
-    # Update user stats
-    user.total_listings += 1
-    
     await db.flush()
     await db.refresh(listing)
     
-    return ListingResponse(
-        id=str(listing.id),
-        title=listing.title,
-        description=listing.description,
-        price=listing.price,
-        currency=listing.currency,
-        is_negotiable=listing.is_negotiable,
-        condition=listing.condition.value,
-        images=listing.images or [],
-        city=listing.city,
-        area=listing.area,
-        status=listing.status.value,
-        views_count=listing.views_count,
-        favorites_count=listing.favorites_count,
-        is_featured=listing.is_featured,
-        created_at=listing.created_at.isoformat(),
-        category_id=str(listing.category_id),
-        seller=SellerInfo(
-            id=str(user.id),
-            name=user.display_name,
-            username=user.username,
-            is_verified=user.is_verified,
-            rating=user.rating,
-            total_sales=user.total_sales,
-            member_since=user.created_at.strftime("%b %Y"),
-        ),
-    )
+    # Seller stats are updated after commit
+    await listing_jobs.listing_created(db, listing)
+    
+    return listing_to_response(listing, seller=user)
 
 
 @router.get("/my", response_model=list[ListingResponse])
@@ -249,91 +351,71 @@ async def my_listings(
     status: ListingStatus | None = None,
     db: AsyncSession = Depends(get_db),
 ):
-    """Get current user's listings."""
-    query = select(Listing).where(Listing.user_id == user.id)
-    
-    if status:
-        query = query.where(Listing.status == status)
-    else:
-        query = query.where(Listing.status != ListingStatus.DELETED)
-    
-    query = query.order_by(Listing.created_at.desc())
+    """Get current user's listings, including archived ones."""
+    result = await db.execute(user_listings_query(user.id, status))
+    listings = list(result.scalars().all())
     
-    result = await db.execute(query)
-    listings = result.scalars().all()
+    # Active and draft listings are never archived
+    if status not in (ListingStatus.ACTIVE, ListingStatus.DRAFT):
+        archived = await db.execute(archived_user_listings_query(user.id, status))
+        listings.extend(archived.scalars().all())
+        listings.sort(key=lambda l: l.created_at, reverse=True)
     
-    return [
-        ListingResponse(
-            id=str(l.id),
-            title=l.title,
-            description=l.description,
-            price=l.price,
-            currency=l.currency,
-            is_negotiable=l.is_negotiable,
-            condition=l.condition.value,
-            images=l.images or [],
-            city=l.city,
-            area=l.area,
-            status=l.status.value,
-            views_count=l.views_count,
-            favorites_count=l.favorites_count,
-            is_featured=l.is_featured,
-            created_at=l.created_at.isoformat(),
-            category_id=str(l.category_id),
-        )
-        for l in listings
-    ]
+    return [listing_to_response(l) for l in listings]
+
+
+@router.get("/suggest", response_model=list[SuggestionResponse])
+async def suggest(
+    q: str = Query(..., max_length=64),
+    limit: int = Query(8, ge=1, le=20),
+):
+    """Search completions for a prefix, from title words, category names
+    and popular searches. Served from the shared in-memory index."""
+    return suggest_index.suggest(q, limit)
 
 
 @router.get("/{listing_id}", response_model=ListingResponse)
 async def get_listing(
     listing_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    authorization: Annotated[str | None, Header()] = None,
+    x_init_data: Annotated[str | None, Header(alias="X-Init-Data")] = None,
 ):
-    """Get listing by ID."""
-    result = await db.execute(
-        select(Listing)
-        .where(Listing.id == listing_id)
-        .options(selectinload(Listing.user))
-    )
-    listing = result.scalar_one_or_none()
-    
-    if not listing:
-        raise HTTPException(status_code=404, detail="Listing not found")
-    
-    # Increment views
-    listing.views_count += 1
-    
-    return ListingResponse(
-        id=str(listing.id),
-        title=listing.title,
-        description=listing.description,
-        price=listing.price,
-        currency=listing.currency,
-        is_negotiable=listing.is_negotiable,
-        condition=listing.condition.value,
-        images=listing.images or [],
-        city=listing.city,
-        area=listing.area,
-        status=listing.status.value,
-        views_count=listing.views_count,
-        favorites_count=listing.favorites_count,
-        is_featured=listing.is_featured,
-        created_at=listing.created_at.isoformat(),
-        category_id=str(listing.category_id),
-        seller=SellerInfo(
-            id=str(listing.user.id),
-            name=listing.user.display_name,
-            username=listing.user.username,
-            is_verified=listing.user.is_verified,
-            rating=listing.user.rating,
-            total_sales=listing.user.total_sales,
-            member_since=listing.user.created_at.strftime("%b %Y"),
-        ) if listing.user else None,
-    )
+    """Get listing by ID, falling back to the archive."""
+    response = await load_listing(listing_id)
+    # Counted per request; archived listings simply match no row when flushed
+    record_view(listing_id)
+
+    # Signed-in views feed the "for you" ranking
+    telegram_id = telegram_id_from_credentials(authorization, x_init_data)
+    if telegram_id and response.status == ListingStatus.ACTIVE.value:
+        try:
+            await record_feed_view(telegram_id, response.category_id, response.price)
+        except Exception:
+            logger.warning("feed_view_not_recorded", exc_info=True)
+    return response
+
+
+@router.get("/{listing_id}/similar", response_model=list[ListingResponse])
+async def similar_listings(
+    listing_id: UUID,
+    limit: int = Query(8, ge=1, le=24),
+    same_city: bool = True,
+    price_band: float = Query(settings.SIMILAR_PRICE_BAND, ge=0, le=10),
+):
+    """Active listings most like this one, served from the in-memory index.
 
+    ``price_band`` keeps prices within a factor of ``1 + price_band`` of this
+    listing's; 0 turns the filter off. Empty while the index is first built.
+    """
+    matches = similarity_index.similar(str(listing_id), limit, same_city, price_band)
+    return [card for card, _ in matches]
 
-@router.patch("/{listing_id}", response_model=ListingResponse)
+
+@router.patch(
+    "/{listing_id}",
+    response_model=ListingResponse,
+    dependencies=[Depends(listing_write_limit)],
+)
 async def update_listing(
     listing_id: UUID,
     body: ListingUpdate,
@@ -341,9 +423,7 @@ async def update_listing(
     db: AsyncSession = Depends(get_db),
 ):
     """Update a listing (owner only)."""
-    result = await db.execute(
-        select(Listing).where(Listing.id == listing_id)
-    )
+    result = await db.execute(LISTING_BY_ID, {"listing_id": listing_id})
     listing = result.scalar_one_or_none()
     
     if not listing:
@@ -352,45 +432,40 @@ async def update_listing(
     if listing.user_id != user.id:
         raise HTTPException(status_code=403, detail="Not your listing")
     
-    # Update fields
-    for field, value in body.model_dump(exclude_unset=True).items():
+    # A deleted listing no longer holds its image references
+    if listing.status == ListingStatus.DELETED:
+        raise HTTPException(status_code=404, detail="Listing not found")
+    
+    was_sold = listing.status == ListingStatus.SOLD
+    old_images = list(listing.images or [])
+    
+    # Update fields; deleting goes through the same path as DELETE
+    for field, value in body.model_dump(exclude_unset=True, exclude={"status"}).items():
         setattr(listing, field, value)
+    if body.images is not None:
+        await refresh_listing_images(db, listing, old_images)
+    if body.status == ListingStatus.DELETED:
+        await soft_delete_listing(db, listing)
+        return listing_to_response(listing)
+    if body.status is not None:
+        listing.status = body.status
     
-    # Handle sold status
-    if body.status == ListingStatus.SOLD:
+    # Handle sold status; stats and notifications follow after commit
+    if body.status == ListingStatus.SOLD and not was_sold:
         listing.sold_at = datetime.now(UTC)
-        user.total_sales += 1
+        await listing_jobs.listing_sold(db, listing)
     
-    return ListingResponse(
-        id=str(listing.id),
-        title=listing.title,
-        description=listing.description,
-        price=listing.price,
-        currency=listing.currency,
-        is_negotiable=listing.is_negotiable,
-        condition=listing.condition.value,
-        images=listing.images or [],
-        city=listing.city,
-        area=listing.area,
-        status=listing.status.value,
-        views_count=listing.views_count,
-        favorites_count=listing.favorites_count,
-        is_featured=listing.is_featured,
-        created_at=listing.created_at.isoformat(),
-        category_id=str(listing.category_id),
-    )
+    return listing_to_response(listing)
 
 
-@router.delete("/{listing_id}")
+@router.delete("/{listing_id}", dependencies=[Depends(listing_write_limit)])
 async def delete_listing(
     listing_id: UUID,
     user: CurrentUser,
     db: AsyncSession = Depends(get_db),
 ):
     """Delete a listing (soft delete)."""
-    result = await db.execute(
-        select(Listing).where(Listing.id == listing_id)
-    )
+    result = await db.execute(LISTING_BY_ID, {"listing_id": listing_id})
     listing = result.scalar_one_or_none()
     
     if not listing:
@@ -399,12 +474,15 @@ async def delete_listing(
     if listing.user_id != user.id:
         raise HTTPException(status_code=403, detail="Not your listing")
     
-    listing.status = ListingStatus.DELETED
+    if listing.status == ListingStatus.DELETED:
+        return {"message": "Listing deleted"}
+    
+    await soft_delete_listing(db, listing)
     
     return {"message": "Listing deleted"}
 
 
-@router.post("/{listing_id}/favorite")
+@router.post("/{listing_id}/favorite", dependencies=[Depends(listing_write_limit)])
 async def toggle_favorite(
     listing_id: UUID,
     user: CurrentUser,
@@ -418,12 +496,12 @@ async def toggle_favorite(
     
     # Check if already favorited
     result = await db.execute(
-        select(Favorite).where(
-            Favorite.user_id == user.id,
-            Favorite.listing_id == listing_id,
-        )
+        FAVORITE_BY_USER_LISTING,
+        {"user_id": user.id, "listing_id": listing_id},
     )
     favorite = result.scalar_one_or_none()
+    # Favorites drive the "for you" ranking; rebuild it on this worker right away
+    affinity_cache.discard(user.telegram_id)
     
     if favorite:
         # Remove favorite
@@ -435,4 +513,13 @@ async def toggle_favorite(
         favorite = Favorite(user_id=user.id, listing_id=listing_id)
         db.add(favorite)
         listing.favorites_count += 1
+        if listing.user_id != user.id:
+            await notifications.listing_favorited(db, listing)
+        await db.commit()
+        await events.publish_event(
+            listing.user_id,
+            events.LISTING_FAVORITED,
+            {"listing_id": str(listing.id), "favorites_count": listing.favorites_count},
+            coalesce_key=f"favorites:{listing.id}",
+        )
         return {"favorited": True}
@@ -7,6 +7,9 @@ from app.api.v1.users import router as users_router
 from app.api.v1.categories import router as categories_router
 from app.api.v1.listings import router as listings_router
 from app.api.v1.demo import router as demo_router
+from app.api.v1.chats import router as chats_router
+from app.api.v1.events import router as events_router
+from app.api.v1.uploads import router as uploads_router
 
 router = APIRouter()
 
@@ -15,3 +18,6 @@ router.include_router(users_router, prefix="/users", tags=["users"])
 router.include_router(categories_router, prefix="/categories", tags=["categories"])
 router.include_router(listings_router, prefix="/listings", tags=["listings"])
 router.include_router(demo_router, prefix="/demo", tags=["demo"])
+router.include_router(chats_router, prefix="/chats", tags=["chats"])
+router.include_router(events_router, prefix="/events", tags=["events"])
+router.include_router(uploads_router, prefix="/uploads", tags=["uploads"])
@@ -0,0 +1,331 @@
+"""Image upload endpoints."""
+
+import asyncio
+import hashlib
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from pydantic import BaseModel, Field
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import CurrentUser
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.queries import LISTING_BY_ID, STORED_IMAGE_BY_SHA256, STORED_IMAGES_BY_KEY
+from app.core.ratelimit import upload_limit
+from app.models.image import StoredImage
+from app.services.images import (
+    DuplicateImage,
+    delete_image_objects,
+    find_image,
+    hashing_stream,
+    process_image,
+    refresh_listing_images,
+    spooled_upload,
+    store_variants,
+    tee_to_file,
+)
+from app.services.storage import storage_service
+from app.services.uploads import (
+    IMAGE_TYPES,
+    UploadRejected,
+    IMAGE_EXTENSIONS,
+    SNIFF_BYTES,
+    checked_image_stream,
+    sniff_image_type,
+    upload_slot,
+    user_image_folder,
+)
+
+router = APIRouter()
+
+
+# --- Schemas ---
+
+class UploadResponse(BaseModel):
+    """Stored file."""
+    url: str
+    key: str
+    size: int
+    content_type: str
+    sha256: str | None
+    width: int | None
+    height: int | None
+    variants: dict[str, str]
+    placeholder: str | None
+    deduplicated: bool = False
+
+
+def image_to_response(image: StoredImage, deduplicated: bool = False) -> UploadResponse:
+    """Convert StoredImage model to UploadResponse."""
+    return UploadResponse(
+        url=image.url,
+        key=image.key,
+        size=image.size,
+        content_type=image.content_type,
+        sha256=image.sha256,
+        width=image.width,
+        height=image.height,
+        variants=image.variants or {},
+        placeholder=image.placeholder,
+        deduplicated=deduplicated,
+    )
+
+
+# --- Endpoints ---
+
+@router.post(
+    "/images",
+    response_model=UploadResponse,
+    status_code=201,
+    dependencies=[Depends(upload_limit)],
+)
+async def upload_image(
+    request: Request,
+    user: CurrentUser,
+    content_type: str = Header(...),
+    content_length: int | None = Header(None),
+    x_content_sha256: str | None = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Upload a listing photo.
+
+    The request body is the raw image (not multipart/form-data) with its
+    ``Content-Type`` set, e.g. ``fetch(url, {method: "POST", body: file,
+    headers: {"Content-Type": file.type}})``. The body is streamed to storage
+    in parts, so size and type limits apply as it arrives. WebP variants
+    (thumb, card, full) and a blur placeholder are rendered from a spooled
+    copy before responding.
+
+    Identical bytes are stored once. Clients that send the hex SHA-256 of the
+    file as ``X-Content-SHA256`` get an image they uploaded before back
+    without the body being read; otherwise (including someone else's copy,
+    since a hash proves nothing) the hash is computed while streaming and a
+    duplicate is discarded before it becomes visible. Either way the
+    response has ``deduplicated: true``.
+    """
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type not in IMAGE_TYPES:
+        raise HTTPException(status_code=415, detail="Unsupported image type")
+    if content_length is not None and content_length > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    claimed = x_content_sha256.strip().lower() if x_content_sha256 else None
+    if claimed:
+        existing = await find_image(claimed, owner_id=user.id)
+        if existing:
+            return image_to_response(existing, deduplicated=True)
+
+    digest = hashlib.sha256()
+
+    async def finalize() -> None:
+        sha256 = digest.hexdigest()
+        if claimed and claimed != sha256:
+            raise UploadRejected(400, "X-Content-SHA256 does not match the body")
+        existing = await find_image(sha256)
+        if existing:
+            raise DuplicateImage(existing)
+
+    key = storage_service.new_key(
+        f"image.{IMAGE_TYPES[content_type]}", user_image_folder(user.id)
+    )
+    try:
+        async with upload_slot(), spooled_upload() as path:
+            body = tee_to_file(checked_image_stream(request.stream(), content_type), path)
+            size = await storage_service.upload_stream(
+                hashing_stream(body, digest), key, content_type, finalize
+            )
+            rendered = await process_image(path)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except DuplicateImage as e:
+        return image_to_response(e.image, deduplicated=True)
+
+    image = StoredImage(
+        owner_id=user.id,
+        key=key,
+        url=storage_service.public_url(key),
+        content_type=content_type,
+        size=size,
+        sha256=digest.hexdigest(),
+        variants={},
+    )
+    if rendered is not None:
+        image.width = rendered["width"]
+        image.height = rendered["height"]
+        image.variants = await store_variants(key, rendered)
+        image.placeholder = rendered["placeholder"]
+
+    # A concurrent upload of the same bytes may have won the race
+    try:
+        async with db.begin_nested():
+            db.add(image)
+    except IntegrityError:
+        await delete_image_objects([(image.key, image.variants)])
+        result = await db.execute(STORED_IMAGE_BY_SHA256, {"sha256": image.sha256})
+        return image_to_response(result.scalar_one(), deduplicated=True)
+
+    return image_to_response(image)
+
+
+# --- Direct-to-bucket uploads ---
+
+class PresignFile(BaseModel):
+    """One file the client wants to upload."""
+    content_type: str
+
+
+class PresignRequest(BaseModel):
+    """Files to upload straight to storage."""
+    files: list[PresignFile] = Field(..., min_length=1)
+
+
+class PresignedUpload(BaseModel):
+    """Form POST the client sends to ``url`` with the file as the last field."""
+    key: str
+    url: str
+    fields: dict[str, str]
+
+
+class PresignResponse(BaseModel):
+    """Presigned uploads, valid for ``expires_in`` seconds."""
+    uploads: list[PresignedUpload]
+    expires_in: int
+    max_bytes: int
+
+
+class CompleteRequest(BaseModel):
+    """Keys uploaded via presigned POST, optionally attached to a listing."""
+    keys: list[str] = Field(..., min_length=1)
+    listing_id: UUID | None = None
+
+
+class CompleteResponse(BaseModel):
+    """Registered images."""
+    images: list[UploadResponse]
+    listing_id: str | None = None
+
+
+async def verify_direct_upload(key: str) -> tuple[str, int]:
+    """Check an uploaded object with HEAD and a 12-byte ranged read.
+
+    Returns ``(content_type, size)``. Objects that are not what the policy
+    allowed are deleted and rejected.
+    """
+    content_type = IMAGE_EXTENSIONS.get(key.rsplit(".", 1)[-1])
+    head = await storage_service.head(key)
+    if head is None:
+        raise HTTPException(status_code=400, detail=f"Upload not found: {key}")
+
+    size = head["ContentLength"]
+    valid = (
+        0 < size <= settings.UPLOAD_MAX_BYTES
+        and head.get("ContentType") == content_type
+        and sniff_image_type(await storage_service.read_range(key, 0, SNIFF_BYTES - 1))
+        == content_type
+    )
+    if not valid:
+        await storage_service.delete_key(key)
+        raise HTTPException(status_code=415, detail=f"Invalid image: {key}")
+    return content_type, size
+
+
+@router.post("/presign", response_model=PresignResponse, dependencies=[Depends(upload_limit)])
+async def presign_uploads(body: PresignRequest, user: CurrentUser):
+    """
+    Issue presigned POST policies for uploading images straight to storage.
+
+    Each policy is bound to one key under the user's folder, the declared
+    content type and ``UPLOAD_MAX_BYTES``. After the uploads succeed, call
+    ``POST /uploads/complete`` with the keys.
+    """
+    if len(body.files) > settings.UPLOAD_PRESIGN_MAX_FILES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.UPLOAD_PRESIGN_MAX_FILES} files per request",
+        )
+    for file in body.files:
+        if file.content_type not in IMAGE_TYPES:
+            raise HTTPException(status_code=415, detail="Unsupported image type")
+
+    uploads = []
+    for file in body.files:
+        key = storage_service.new_key(
+            f"image.{IMAGE_TYPES[file.content_type]}", user_image_folder(user.id)
+        )
+        post = storage_service.presigned_post(
+            key,
+            file.content_type,
+            settings.UPLOAD_MAX_BYTES,
+            settings.UPLOAD_PRESIGN_EXPIRES_SECONDS,
+        )
+        uploads.append(PresignedUpload(key=key, url=post["url"], fields=post["fields"]))
+
+    return PresignResponse(
+        uploads=uploads,
+        expires_in=settings.UPLOAD_PRESIGN_EXPIRES_SECONDS,
+        max_bytes=settings.UPLOAD_MAX_BYTES,
+    )
+
+
+@router.post(
+    "/complete", response_model=CompleteResponse, dependencies=[Depends(upload_limit)]
+)
+async def complete_uploads(
+    body: CompleteRequest,
+    user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Register images uploaded with ``/uploads/presign``.
+
+    Objects are verified in storage (existence, size, content type and magic
+    bytes) without their contents passing through the API. With
+    ``listing_id`` the images are appended to that listing. Completing a key
+    twice is harmless. Variants are not rendered for direct uploads, so
+    clients fall back to the original URL.
+    """
+    folder = user_image_folder(user.id) + "/"
+    keys = list(dict.fromkeys(body.keys))
+    if len(keys) > settings.UPLOAD_PRESIGN_MAX_FILES:
+        raise HTTPException(status_code=422, detail="Too many keys")
+    if any(not key.startswith(folder) for key in keys):
+        raise HTTPException(status_code=403, detail="Key outside your upload folder")
+
+    result = await db.execute(STORED_IMAGES_BY_KEY, {"keys": keys})
+    images = {image.key: image for image in result.scalars()}
+    # Release the connection while storage is checked
+    await db.commit()
+    pending = [key for key in keys if key not in images]
+    checked = await asyncio.gather(*(verify_direct_upload(key) for key in pending))
+
+    for key, (content_type, size) in zip(pending, checked):
+        images[key] = StoredImage(
+            owner_id=user.id,
+            key=key,
+            url=storage_service.public_url(key),
+            content_type=content_type,
+            size=size,
+            variants={},
+        )
+        db.add(images[key])
+    await db.flush()
+
+    if body.listing_id:
+        result = await db.execute(LISTING_BY_ID, {"listing_id": body.listing_id})
+        listing = result.scalar_one_or_none()
+        if not listing:
+            raise HTTPException(status_code=404, detail="Listing not found")
+        if listing.user_id != user.id:
+            raise HTTPException(status_code=403, detail="Not your listing")
+        old_images = list(listing.images or [])
+        new_urls = [images[key].url for key in keys if images[key].url not in old_images]
+        listing.images = old_images + new_urls
+        await refresh_listing_images(db, listing, old_images)
+
+    return CompleteResponse(
+        images=[image_to_response(images[key]) for key in keys],
+        listing_id=str(body.listing_id) if body.listing_id else None,
+    )
@@ -7,6 +7,7 @@ from pydantic import BaseModel
 
 from app.api.deps import CurrentUser
 from app.core.config import settings
+from app.core.phone import normalize_phone
 from app.models.user import User
 
 router = APIRouter()
@@ -101,20 +102,8 @@ async def verify_phone(
     user: CurrentUser,
 ):
     """Verify user's phone number from Telegram contact share."""
-    # Clean phone number
-    phone = body.phone_number.strip().replace(" ", "").replace("-", "")
-    
-    # Ensure it starts with + or country code
-    if not phone.startswith("+"):
-        if phone.startswith("0"):
-            phone = "+251" + phone[1:]  # Ethiopia
-        elif phone.startswith("251"):
-            phone = "+" + phone
-        else:
-            phone = "+251" + phone
-    
     # Update user
-    user.phone = phone
+    user.phone = normalize_phone(body.phone_number)
     user.is_phone_verified = True
     user.phone_verified_at = datetime.now(UTC)
     
@@ -0,0 +1,103 @@
+"""Telegram Bot API client."""
+
+from typing import TYPE_CHECKING
+
+import structlog
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = structlog.get_logger()
+
+
+class TelegramError(Exception):
+    """Bot API call rejected (``ok: false``) or not answered."""
+
+    def __init__(self, code: int, description: str, retry_after: float | None = None):
+        super().__init__(f"{code}: {description}")
+        self.code = code
+        self.description = description
+        self.retry_after = retry_after
+
+
+class BotClient:
+    """Bot API calls over one pooled HTTP/1.1 keep-alive client.
+
+    ``BOT_API_URL`` can point at a local fake Bot API server; tests can also
+    pass an ``httpx`` transport.
+    """
+
+    def __init__(self, transport: "httpx.AsyncBaseTransport | None" = None):
+        self._transport = transport
+        self._http: "httpx.AsyncClient | None" = None
+
+    @property
+    def http(self) -> "httpx.AsyncClient":
+        """Shared HTTP client, created on first use."""
+        if self._http is None:
+            # Imported here to keep it off the startup path
+            import httpx
+
+            self._http = httpx.AsyncClient(
+                base_url=f"{settings.BOT_API_URL}/bot{settings.BOT_TOKEN}/",
+                timeout=settings.BOT_HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.BOT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.BOT_MAX_CONNECTIONS,
+                ),
+                transport=self._transport,
+            )
+        return self._http
+
+    async def call(self, method: str, **params) -> dict | list | bool:
+        """Call a Bot API method and return its ``result``.
+
+        Raises ``TelegramError``; on 429 it carries ``retry_after`` from the
+        response parameters. Network failures are reported with code 0.
+        """
+        import httpx
+
+        try:
+            response = await self.http.post(
+                method, json={k: v for k, v in params.items() if v is not None}
+            )
+            body = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise TelegramError(0, repr(e))
+        if not body.get("ok"):
+            retry_after = (body.get("parameters") or {}).get("retry_after")
+            raise TelegramError(
+                body.get("error_code", response.status_code),
+                body.get("description", ""),
+                float(retry_after) if retry_after is not None else None,
+            )
+        return body["result"]
+
+    async def send_message(
+        self,
+        chat_id: int,
+        text: str,
+        reply_markup: dict | None = None,
+        parse_mode: str | None = "HTML",
+    ) -> dict:
+        """Send a text message."""
+        return await self.call(
+            "sendMessage",
+            chat_id=chat_id,
+            text=text,
+            parse_mode=parse_mode,
+            reply_markup=reply_markup,
+            disable_web_page_preview=True,
+        )
+
+    async def close(self) -> None:
+        """Close pooled connections on shutdown."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+# Singleton
+bot_client = BotClient()
@@ -0,0 +1,211 @@
+"""Batched bot notifications.
+
+Events are not sent as they happen. ``queue_notification`` adds a line to
+the user's pending digest in Redis and schedules the digest
+``NOTIFY_DIGEST_SECONDS`` after the first event; lines sharing a key (e.g.
+one chat) collapse into the latest one with a count. ``run_dispatcher``,
+started in the lifespan of every worker, claims due digests (each is claimed
+by exactly one worker) and sends one message per user.
+
+Sending respects Telegram's limits using the shared token buckets from
+``app.core.ratelimit``: ``NOTIFY_GLOBAL_PER_SECOND`` across all workers and
+``NOTIFY_CHAT_PER_SECOND`` per chat. A 429 pauses this worker's sends for
+the ``retry_after`` Telegram asks for.
+"""
+
+import asyncio
+import html
+import time
+import uuid
+from urllib.parse import urlencode
+
+import structlog
+
+from app.bot.client import TelegramError, bot_client
+from app.core.config import settings
+from app.core.metrics import BOT_MESSAGES
+from app.core.ratelimit import take_token
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+DUE_KEY = "notify:due"
+
+# Callback data of the digest's mute button, handled in app.bot.handlers
+MUTE_CALLBACK = "notify:off"
+UNMUTE_CALLBACK = "notify:on"
+
+# Telegram's maximum message length
+MAX_MESSAGE_CHARS = 4096
+
+# KEYS[1] due set, KEYS[2] the member's digest; ARGV[1] member.
+# Returns the digest's fields, or false if another worker claimed it first.
+# Removing from the due set and taking the digest in one step means no
+# worker can claim a member whose digest someone else already took.
+CLAIM_LUA = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+    return false
+end
+local fields = redis.call('HGETALL', KEYS[2])
+redis.call('DEL', KEYS[2])
+return fields
+"""
+
+_paused_until = 0.0
+_claim_script = None
+
+
+def digest_key(telegram_id: int) -> str:
+    """Redis hash with a user's pending lines and counts."""
+    return f"notify:{telegram_id}"
+
+
+async def queue_notification(telegram_id: int, line: str, key: str | None = None) -> None:
+    """Add ``line`` to the user's next digest.
+
+    Lines with the same ``key`` replace each other and are shown with how
+    many events they stand for. No-op when the bot is not configured.
+    """
+    if not settings.BOT_TOKEN:
+        return
+    key = key or uuid.uuid4().hex
+    due = time.time() + settings.NOTIFY_DIGEST_SECONDS
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.hset(digest_key(telegram_id), f"line:{key}", line)
+        pipe.hincrby(digest_key(telegram_id), f"count:{key}", 1)
+        pipe.expire(digest_key(telegram_id), settings.NOTIFY_DIGEST_TTL_SECONDS)
+        # NX: later events join the digest already scheduled
+        pipe.zadd(DUE_KEY, {str(telegram_id): due}, nx=True)
+        await pipe.execute()
+
+
+def render_digest(fields: dict[str, str]) -> str | None:
+    """Message text for a digest hash, or None if it holds nothing."""
+    lines = []
+    for field, line in fields.items():
+        if not field.startswith("line:"):
+            continue
+        count = int(fields.get(f"count:{field[5:]}", 1))
+        lines.append(f"{line} (×{count})" if count > 1 else line)
+    if not lines:
+        return None
+    if len(lines) == 1:
+        return lines[0]
+
+    text = f"<b>{len(lines)} updates</b>\n\n" + "\n".join(f"• {line}" for line in lines)
+    if len(text) > MAX_MESSAGE_CHARS:
+        text = text[: MAX_MESSAGE_CHARS - 1] + "…"
+    return text
+
+
+def app_markup(text: str = "Open ገበያ", **query: str) -> dict:
+    """Inline keyboard with a button opening the Mini App.
+
+    ``query`` is added to the app URL, e.g. ``listing=<id>`` opens a listing.
+    """
+    url = f"{settings.APP_URL}?{urlencode(query)}" if query else settings.APP_URL
+    return {"inline_keyboard": [[{"text": text, "web_app": {"url": url}}]]}
+
+
+def escape(text: str) -> str:
+    """Escape user content for HTML parse mode."""
+    return html.escape(text, quote=False)
+
+
+async def _claim_due(limit: int) -> list[tuple[int, str]]:
+    """Take up to ``limit`` due digests; a digest is claimed by one worker only."""
+    global _claim_script
+    redis = get_redis()
+    if _claim_script is None or _claim_script.registered_client is not redis:
+        _claim_script = redis.register_script(CLAIM_LUA)
+    due = await redis.zrangebyscore(DUE_KEY, "-inf", time.time(), start=0, num=limit)
+    claimed = []
+    for member in due:
+        flat = await _claim_script(keys=[DUE_KEY, digest_key(member)], args=[member])
+        if flat is None:
+            continue
+        text = render_digest(dict(zip(flat[::2], flat[1::2])))
+        if text:
+            claimed.append((int(member), text))
+    return claimed
+
+
+async def _wait_for_tokens(chat_id: int) -> None:
+    """Block until both the per-chat and the global budget allow a message."""
+    for key, rate, burst in (
+        (f"bot:chat:{chat_id}", settings.NOTIFY_CHAT_PER_SECOND, 1),
+        ("bot:global", settings.NOTIFY_GLOBAL_PER_SECOND, settings.NOTIFY_GLOBAL_PER_SECOND),
+    ):
+        while True:
+            decision, _ = await take_token(f"ratelimit:{key}", rate, burst)
+            if decision.allowed:
+                break
+            await asyncio.sleep(decision.retry_after)
+
+
+async def send_digest(chat_id: int, text: str) -> bool:
+    """Send one digest within the rate limits; True if Telegram accepted it."""
+    global _paused_until
+    markup = app_markup()
+    markup["inline_keyboard"].append([{"text": "🔕 Mute", "callback_data": MUTE_CALLBACK}])
+
+    for attempt in range(1, settings.NOTIFY_MAX_ATTEMPTS + 1):
+        pause = _paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        await _wait_for_tokens(chat_id)
+        try:
+            await bot_client.send_message(chat_id, text, reply_markup=markup)
+            BOT_MESSAGES.labels(result="sent").inc()
+            return True
+        except TelegramError as e:
+            if e.code == 429:
+                BOT_MESSAGES.labels(result="throttled").inc()
+                _paused_until = time.monotonic() + (e.retry_after or 1)
+                continue
+            if e.code in (400, 403):
+                # Blocked the bot, never started it, or bad chat: retrying will not help
+                BOT_MESSAGES.labels(result="rejected").inc()
+                logger.info("bot_message_rejected", chat_id=chat_id, error=e.description)
+                return False
+            logger.warning("bot_message_failed", chat_id=chat_id, attempt=attempt, error=str(e))
+            await asyncio.sleep(2 ** attempt)
+
+    BOT_MESSAGES.labels(result="failed").inc()
+    return False
+
+
+async def run_dispatcher() -> None:
+    """Lifespan task: send due digests until cancelled."""
+    if not settings.BOT_TOKEN:
+        return
+    slots = asyncio.Semaphore(settings.NOTIFY_CONCURRENCY)
+    running: set[asyncio.Task] = set()
+
+    async def send(chat_id: int, text: str) -> None:
+        try:
+            await send_digest(chat_id, text)
+        except Exception:
+            logger.exception("bot_message_error", chat_id=chat_id)
+        finally:
+            slots.release()
+
+    try:
+        while True:
+            try:
+                claimed = await _claim_due(settings.NOTIFY_BATCH_SIZE)
+            except Exception:
+                logger.exception("notification_claim_failed")
+                claimed = []
+
+            for chat_id, text in claimed:
+                await slots.acquire()
+                task = asyncio.create_task(send(chat_id, text))
+                running.add(task)
+                task.add_done_callback(running.discard)
+
+            if len(claimed) < settings.NOTIFY_BATCH_SIZE:
+                await asyncio.sleep(settings.NOTIFY_POLL_SECONDS)
+    finally:
+        for task in running:
+            task.cancel()
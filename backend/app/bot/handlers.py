@@ -0,0 +1,198 @@
+"""Bot update handlers: commands, contact shares and button callbacks.
+
+Handlers run in the background workers of ``app.bot.webhook``, after
+Telegram already has its answer, so they can take their time.
+"""
+
+import uuid
+from datetime import UTC, datetime
+
+import structlog
+
+from app.bot.client import TelegramError, bot_client
+from app.bot.dispatcher import MUTE_CALLBACK, UNMUTE_CALLBACK, app_markup, escape
+from app.core.database import get_db_context
+from app.core.phone import normalize_phone
+from app.core.queries import LISTING_DETAIL, USER_BY_TELEGRAM_ID
+from app.models.listing import ListingStatus
+
+logger = structlog.get_logger()
+
+# /start payload of listing deep links: t.me/<bot>?start=listing_<uuid>
+LISTING_LINK_PREFIX = "listing_"
+
+SHARE_CONTACT_MARKUP = {
+    "keyboard": [[{"text": "📱 Share my phone number", "request_contact": True}]],
+    "resize_keyboard": True,
+    "one_time_keyboard": True,
+}
+
+
+def update_kind(update: dict) -> str:
+    """Type of an update, for routing and metrics."""
+    for kind in ("message", "callback_query", "edited_message", "my_chat_member"):
+        if kind in update:
+            return kind
+    return "other"
+
+
+async def reply(chat_id: int, text: str, reply_markup: dict | None = None) -> None:
+    """Send a reply; a user who blocked the bot is not an error."""
+    try:
+        await bot_client.send_message(chat_id, text, reply_markup=reply_markup)
+    except TelegramError as e:
+        logger.info("bot_reply_failed", chat_id=chat_id, error=str(e))
+
+
+async def handle_update(update: dict) -> None:
+    """Route one update to its handler; other update types are ignored."""
+    kind = update_kind(update)
+    if kind == "message":
+        await handle_message(update["message"])
+    elif kind == "callback_query":
+        await handle_callback(update["callback_query"])
+
+
+async def handle_message(message: dict) -> None:
+    """Commands and contact shares in private chats."""
+    # Groups the bot was added to are not supported
+    if message.get("chat", {}).get("type") != "private" or "from" not in message:
+        return
+    chat_id = message["chat"]["id"]
+
+    if "contact" in message:
+        await handle_contact(message)
+        return
+
+    text = (message.get("text") or "").strip()
+    command, _, argument = text.partition(" ")
+    # "/start@MyBot" in clients that add the bot's name
+    command = command.split("@", 1)[0]
+
+    if command == "/start":
+        await handle_start(chat_id, argument.strip())
+    elif command == "/phone":
+        await reply(
+            chat_id,
+            "Tap the button below to verify your phone number.",
+            SHARE_CONTACT_MARKUP,
+        )
+    else:
+        await reply(chat_id, "Browse, buy and sell in the app 👇", app_markup())
+
+
+async def handle_start(chat_id: int, payload: str) -> None:
+    """``/start``, optionally with a deep link payload."""
+    if payload.startswith(LISTING_LINK_PREFIX):
+        await send_listing(chat_id, payload.removeprefix(LISTING_LINK_PREFIX))
+        return
+    await reply(
+        chat_id,
+        "👋 Welcome to <b>ገበያ</b>, the marketplace inside Telegram.\n\n"
+        "Open the app to browse listings or post your own. "
+        "Send /phone to verify your phone number.",
+        app_markup(),
+    )
+
+
+async def send_listing(chat_id: int, raw_id: str) -> None:
+    """Reply to a listing deep link with the listing and a button to open it."""
+    try:
+        listing_id = uuid.UUID(raw_id)
+    except ValueError:
+        listing_id = None
+
+    listing = None
+    if listing_id:
+        async with get_db_context() as db:
+            result = await db.execute(LISTING_DETAIL, {"listing_id": listing_id})
+            listing = result.scalar_one_or_none()
+
+    if not listing or listing.status != ListingStatus.ACTIVE:
+        await reply(chat_id, "This listing is no longer available.", app_markup())
+        return
+    await reply(
+        chat_id,
+        f"<b>{escape(listing.title)}</b>\n"
+        f"{listing.price:,.0f} {listing.currency}"
+        f"{' · negotiable' if listing.is_negotiable else ''}\n"
+        f"📍 {escape(listing.city)}",
+        app_markup("View listing", listing=str(listing.id)),
+    )
+
+
+async def handle_contact(message: dict) -> None:
+    """Verify the sender's phone number from a shared contact."""
+    chat_id = message["chat"]["id"]
+    contact = message["contact"]
+    # Anyone can forward someone else's contact; only the sender's own counts
+    if contact.get("user_id") != message["from"]["id"]:
+        await reply(
+            chat_id,
+            "Please share your own number with the button below.",
+            SHARE_CONTACT_MARKUP,
+        )
+        return
+
+    phone = normalize_phone(contact["phone_number"])
+    async with get_db_context() as db:
+        result = await db.execute(USER_BY_TELEGRAM_ID, {"telegram_id": contact["user_id"]})
+        user = result.scalar_one_or_none()
+        if user:
+            user.phone = phone
+            user.is_phone_verified = True
+            user.phone_verified_at = datetime.now(UTC)
+
+    if not user:
+        await reply(
+            chat_id, "Open the app once to create your account, then try again.", app_markup()
+        )
+        return
+    await reply(chat_id, f"✅ Phone number verified: {escape(phone)}", {"remove_keyboard": True})
+
+
+async def handle_callback(query: dict) -> None:
+    """Inline button presses. Every callback query is answered, or the
+    button keeps spinning in the client."""
+    notice = None
+    try:
+        if query.get("data") in (MUTE_CALLBACK, UNMUTE_CALLBACK):
+            enabled = query["data"] == UNMUTE_CALLBACK
+            if await set_notifications(query["from"]["id"], enabled):
+                notice = "🔔 Notifications on" if enabled else "🔕 Notifications muted"
+    finally:
+        try:
+            await bot_client.call("answerCallbackQuery", callback_query_id=query["id"], text=notice)
+        except TelegramError as e:
+            logger.info("bot_callback_answer_failed", error=str(e))
+
+    if notice and query.get("message"):
+        # Swap the button so the user can undo
+        button = (
+            {"text": "🔕 Mute", "callback_data": MUTE_CALLBACK}
+            if enabled
+            else {"text": "🔔 Unmute", "callback_data": UNMUTE_CALLBACK}
+        )
+        markup = app_markup()
+        markup["inline_keyboard"].append([button])
+        try:
+            await bot_client.call(
+                "editMessageReplyMarkup",
+                chat_id=query["message"]["chat"]["id"],
+                message_id=query["message"]["message_id"],
+                reply_markup=markup,
+            )
+        except TelegramError as e:
+            logger.info("bot_markup_edit_failed", error=str(e))
+
+
+async def set_notifications(telegram_id: int, enabled: bool) -> bool:
+    """Turn bot notifications on or off; False if there is no such user."""
+    async with get_db_context() as db:
+        result = await db.execute(USER_BY_TELEGRAM_ID, {"telegram_id": telegram_id})
+        user = result.scalar_one_or_none()
+        if not user:
+            return False
+        # Reassigned, not mutated: the column does not track in-place changes
+        user.settings = {**(user.settings or {}), "notifications": enabled}
+    return True
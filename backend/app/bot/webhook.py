@@ -0,0 +1,130 @@
+"""Telegram webhook: ``POST /bot/webhook``.
+
+Telegram waits for each answer and redelivers updates that are not answered
+in time, so the endpoint does as little as possible: it checks the secret
+token, drops updates it has already seen (by ``update_id``, in Redis, so
+across workers) and puts the rest on an in-process queue. Background
+workers started in the lifespan handle them, at most ``BOT_UPDATE_WORKERS``
+at once; a slow handler never delays the answer.
+
+When the queue is full the endpoint answers 503 and Telegram delivers the
+update again later.
+"""
+
+import asyncio
+import hmac
+
+import structlog
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+
+from app.bot.handlers import handle_update, update_kind
+from app.core.config import settings
+from app.core.metrics import BOT_UPDATES
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+router = APIRouter()
+
+_queue: asyncio.Queue[dict] | None = None
+
+
+def get_update_queue() -> asyncio.Queue[dict]:
+    """Queue of accepted updates, created on first use."""
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue(maxsize=settings.BOT_UPDATE_QUEUE_SIZE)
+    return _queue
+
+
+def dedup_key(update_id: int) -> str:
+    return f"bot:update:{update_id}"
+
+
+async def first_delivery(update_id: int) -> bool:
+    """Record ``update_id``; False if it was already accepted."""
+    try:
+        return bool(await get_redis().set(
+            dedup_key(update_id), 1, nx=True, ex=settings.BOT_UPDATE_DEDUP_SECONDS
+        ))
+    except Exception:
+        # Handling a rare duplicate beats losing updates while Redis is down
+        logger.warning("bot_update_dedup_unavailable", update_id=update_id)
+        return True
+
+
+@router.post("/webhook", include_in_schema=False)
+async def webhook(
+    request: Request,
+    secret_token: str | None = Header(None, alias="X-Telegram-Bot-Api-Secret-Token"),
+) -> Response:
+    """Accept an update from Telegram."""
+    if not settings.BOT_WEBHOOK_SECRET:
+        raise HTTPException(status_code=404)
+    if not secret_token or not hmac.compare_digest(secret_token, settings.BOT_WEBHOOK_SECRET):
+        raise HTTPException(status_code=403)
+
+    try:
+        update = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if not isinstance(update, dict) or not isinstance(update.get("update_id"), int):
+        raise HTTPException(status_code=400, detail="Not an update")
+
+    kind = update_kind(update)
+    queue = get_update_queue()
+    if queue.full():
+        BOT_UPDATES.labels(kind=kind, result="overloaded").inc()
+        raise HTTPException(status_code=503)
+    if not await first_delivery(update["update_id"]):
+        BOT_UPDATES.labels(kind=kind, result="duplicate").inc()
+        return Response(status_code=200)
+
+    try:
+        queue.put_nowait(update)
+    except asyncio.QueueFull:
+        # Filled up while checking Redis: forget the update so the redelivery is accepted
+        try:
+            await get_redis().delete(dedup_key(update["update_id"]))
+        except Exception:
+            pass
+        BOT_UPDATES.labels(kind=kind, result="overloaded").inc()
+        raise HTTPException(status_code=503)
+    return Response(status_code=200)
+
+
+async def _work(queue: asyncio.Queue[dict]) -> None:
+    while True:
+        update = await queue.get()
+        kind = update_kind(update)
+        try:
+            await asyncio.wait_for(handle_update(update), settings.BOT_UPDATE_TIMEOUT_SECONDS)
+            BOT_UPDATES.labels(kind=kind, result="handled").inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            BOT_UPDATES.labels(kind=kind, result="failed").inc()
+            logger.exception("bot_update_failed", kind=kind, update_id=update["update_id"])
+        finally:
+            queue.task_done()
+
+
+async def run_update_workers() -> None:
+    """Lifespan task: handle queued updates until cancelled."""
+    if not settings.BOT_WEBHOOK_SECRET:
+        return
+    queue = get_update_queue()
+    await asyncio.gather(*(_work(queue) for _ in range(settings.BOT_UPDATE_WORKERS)))
+
+
+async def drain_updates(timeout: float) -> None:
+    """On shutdown: give queued updates up to ``timeout`` seconds to finish.
+
+    Telegram already has its answer for them, so they are not redelivered.
+    """
+    if _queue is None or _queue.empty():
+        return
+    try:
+        await asyncio.wait_for(_queue.join(), timeout)
+    except TimeoutError:
+        logger.warning("bot_updates_dropped", count=_queue.qsize())
@@ -0,0 +1,181 @@
+"""Per-request SQL instrumentation and N+1 detection."""
+
+import re
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = structlog.get_logger("app.sql")
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\bIN \((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\$\d+(?:::[\w\[\]]+)?|%\(\w+\)s")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in strict mode when a request runs too many or repeated queries."""
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse literals, placeholders and IN lists so equal shapes compare equal."""
+    sql = _STRING.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+@dataclass
+class QueryStats:
+    """Queries executed during one request."""
+
+    budget: int | None = None
+    strict: bool = False
+    count: int = 0
+    total_ms: float = 0.0
+    slowest_ms: float = 0.0
+    slowest_sql: str | None = None
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        sql = normalize_sql(statement)
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements[sql] += 1
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_sql = sql
+
+        if not self.strict:
+            return
+        if self.budget is not None and self.count > self.budget:
+            raise QueryBudgetExceeded(
+                f"Query budget of {self.budget} exceeded: {self.count} queries"
+            )
+        if self.statements[sql] >= settings.SQL_REPEAT_THRESHOLD:
+            raise QueryBudgetExceeded(
+                f"Possible N+1: statement ran {self.statements[sql]} times: {sql}"
+            )
+
+    @property
+    def repeated(self) -> dict[str, int]:
+        """Statements that ran often enough to look like an N+1 pattern."""
+        return {
+            sql: n
+            for sql, n in self.statements.items()
+            if n >= settings.SQL_REPEAT_THRESHOLD
+        }
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    """Stats for the request being handled, if any."""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(
+    budget: int | None = None, strict: bool | None = None
+) -> Iterator[QueryStats]:
+    """Collect query stats for the enclosed block.
+
+    Tests can wrap a request in ``track_queries(budget=3, strict=True)`` to
+    fail as soon as the budget is exceeded or a statement repeats.
+    """
+    stats = QueryStats(
+        budget=settings.SQL_QUERY_BUDGET if budget is None else budget,
+        strict=settings.SQL_STRICT if strict is None else strict,
+    )
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach timing hooks to a (sync) engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+
+        if elapsed_ms >= settings.SQL_SLOW_QUERY_MS:
+            logger.warning(
+                "slow_query",
+                duration_ms=round(elapsed_ms, 2),
+                sql=normalize_sql(statement),
+            )
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed_ms)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # A failed statement never reaches after_cursor_execute; drop its start
+        # time so it does not stay on the pooled connection
+        if context.execution_context is not None and context.connection is not None:
+            starts = context.connection.info.get("query_start")
+            if starts:
+                starts.pop()
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware that logs SQL stats for every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if stats.count:
+                    logger.info(
+                        "request_sql",
+                        method=scope["method"],
+                        path=scope["path"],
+                        status=status_code,
+                        queries=stats.count,
+                        db_ms=round(stats.total_ms, 2),
+                        slowest_ms=round(stats.slowest_ms, 2),
+                        slowest_sql=stats.slowest_sql,
+                    )
+                if stats.repeated:
+                    logger.warning(
+                        "n_plus_one_suspected",
+                        method=scope["method"],
+                        path=scope["path"],
+                        statements=stats.repeated,
+                    )
@@ -0,0 +1,242 @@
+"""Prometheus metrics.
+
+Metrics aggregate in-process. When ``PROMETHEUS_MULTIPROC_DIR`` is set (one
+directory shared by all uvicorn workers), values are written to mmap'd files
+and ``/metrics`` merges them across workers.
+"""
+
+import asyncio
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+from starlette.routing import Match
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# --- HTTP ---
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS = Counter(
+    "http_requests_total",
+    "Requests by route template and status code",
+    ["method", "route", "status"],
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+RATE_LIMIT_DECISIONS = Counter(
+    "rate_limit_decisions_total",
+    "Rate limit checks by budget, result (allowed/limited) and backend (redis/local)",
+    ["limit", "result", "backend"],
+)
+
+# --- Database pool ---
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent acquiring a connection from the pool",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+# --- Caches ---
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss)",
+    ["cache", "result"],
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Coalesced calls by role: leader ran it, shared joined a local call, remote "
+    "used another worker's result",
+    ["name", "role"],
+)
+
+SIMILAR_INDEX_LISTINGS = Gauge(
+    "similar_index_listings",
+    "Active listings in the similar-listings index",
+    multiprocess_mode="max",
+)
+
+# --- Object storage ---
+
+STORAGE_LATENCY = Histogram(
+    "storage_request_duration_seconds",
+    "Object storage calls by operation, including executor queueing",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+STORAGE_ERRORS = Counter(
+    "storage_errors_total",
+    "Failed object storage calls by operation",
+    ["operation"],
+)
+STORAGE_IN_FLIGHT = Gauge(
+    "storage_requests_in_flight",
+    "Object storage calls queued or running on the executor",
+    multiprocess_mode="livesum",
+)
+
+IMAGE_GC_OBJECTS = Counter(
+    "image_gc_objects_total",
+    "Objects removed by image garbage collection, or counted in dry-run mode",
+    ["source", "mode"],
+)
+
+# --- Background jobs ---
+
+JOBS_PROCESSED = Counter(
+    "jobs_processed_total",
+    "Background jobs by kind and result (done/retry/failed/lost)",
+    ["kind", "result"],
+)
+JOB_DURATION = Histogram(
+    "job_duration_seconds",
+    "Background job run time by kind",
+    ["kind"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0),
+)
+
+# --- Bot ---
+
+BOT_MESSAGES = Counter(
+    "bot_messages_total",
+    "Bot notification sends by result (sent/throttled/rejected/failed)",
+    ["result"],
+)
+
+BOT_UPDATES = Counter(
+    "bot_updates_total",
+    "Bot webhook updates by type and result (handled/duplicate/overloaded/failed)",
+    ["kind", "result"],
+)
+
+# --- Event loop ---
+
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "Delay between when a timer was due and when it ran",
+    multiprocess_mode="livemax",
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache hit or miss."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Serialize all metrics in the Prometheus text format."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the multiprocess directory."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def instrument_pool(pool: Pool) -> None:
+    """Keep pool gauges in sync on every checkout and checkin."""
+    if not hasattr(pool, "checkedout"):
+        return  # NullPool (PgBouncer mode) has nothing to report
+
+    def _update(*_):
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    event.listen(pool, "checkout", _update)
+    event.listen(pool, "checkin", _update)
+
+
+async def monitor_event_loop(interval: float = 0.5) -> None:
+    """Measure how late the loop wakes a sleeping task."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(loop.time() - start - interval, 0.0))
+
+
+def _route_template(scope) -> str:
+    """Route path pattern (e.g. /api/v1/listings/{listing_id}) for a request."""
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    if router is None:
+        return "unmatched"
+    partial = None
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(scope)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = IN_FLIGHT.labels(method=method, route=route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            REQUEST_LATENCY.labels(method=method, route=route).observe(
+                time.perf_counter() - start
+            )
+            REQUESTS.labels(method=method, route=route, status=status_code).inc()
@@ -0,0 +1,21 @@
+"""Opaque keyset cursors over (timestamp, id) pairs."""
+
+import base64
+import uuid
+from datetime import datetime
+
+
+def encode_cursor(timestamp: datetime, row_id: uuid.UUID) -> str:
+    """Encode a position as a URL-safe token."""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID] | None:
+    """Decode a token from ``encode_cursor``. Returns None if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(timestamp), uuid.UUID(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
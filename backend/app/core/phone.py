@@ -0,0 +1,17 @@
+"""Phone number normalization."""
+
+
+def normalize_phone(raw: str) -> str:
+    """Normalize a phone number to ``+<country code><number>``.
+
+    Numbers without a country code are taken to be Ethiopian.
+    """
+    phone = raw.strip().replace(" ", "").replace("-", "")
+    if not phone.startswith("+"):
+        if phone.startswith("0"):
+            phone = "+251" + phone[1:]
+        elif phone.startswith("251"):
+            phone = "+" + phone
+        else:
+            phone = "+251" + phone
+    return phone
@@ -0,0 +1,388 @@
+"""Pre-built statements for hot queries.
+
+Fixed-shape lookups are module-level constructs with bind parameters, so they
+are built once and hit SQLAlchemy's compiled cache on every execution. Queries
+with optional filters use lambda statements, which cache per filter combination
+and skip rebuilding the construct on each request.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import (
+    DateTime,
+    StatementLambdaElement,
+    bindparam,
+    case,
+    func,
+    lambda_stmt,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import selectinload
+
+from app.models.archive import ArchivedListing
+from app.models.category import Category
+from app.models.chat import Chat, Message
+from app.models.favorite import Favorite
+from app.models.image import StoredImage
+from app.models.listing import Listing, ListingStatus
+from app.models.user import User
+
+# --- Users ---
+
+USER_BY_TELEGRAM_ID = select(User).where(User.telegram_id == bindparam("telegram_id"))
+
+# --- Categories ---
+
+CATEGORIES_ALL = select(Category).order_by(Category.sort_order, Category.name_en)
+
+CATEGORY_BY_SLUG = select(Category).where(Category.slug == bindparam("slug"))
+
+# --- Listings ---
+
+LISTING_BY_ID = select(Listing).where(Listing.id == bindparam("listing_id"))
+
+LISTING_DETAIL = (
+    select(Listing)
+    .where(Listing.id == bindparam("listing_id"))
+    .options(selectinload(Listing.user))
+)
+
+LISTINGS_BY_IDS = (
+    select(Listing)
+    .where(Listing.id.in_(bindparam("ids", expanding=True)))
+    .options(selectinload(Listing.user))
+)
+
+ADD_LISTING_VIEWS = (
+    update(Listing)
+    .where(Listing.id == bindparam("listing_id"))
+    # Keeps updated_at: a view is not a change to the listing, and the
+    # archive and the similar/suggest indexes poll updated_at for changes
+    .values(
+        views_count=Listing.views_count + bindparam("views"),
+        updated_at=Listing.updated_at,
+    )
+)
+
+# Active listings expiring within a window, soonest first; keyset-paginated
+# on (expires_at, id), starting after the last row of the previous page
+EXPIRING_LISTINGS = (
+    select(Listing.id, Listing.expires_at)
+    .where(
+        Listing.status == ListingStatus.ACTIVE,
+        tuple_(Listing.expires_at, Listing.id)
+        > tuple_(
+            bindparam("after_expires_at", type_=DateTime(timezone=True)),
+            bindparam("after_id", type_=UUID(as_uuid=True)),
+        ),
+        Listing.expires_at <= bindparam("until"),
+    )
+    .order_by(Listing.expires_at, Listing.id)
+    .limit(bindparam("limit"))
+)
+
+# Similar-listings index: full load, then changes since the last poll
+SIMILAR_INDEX_SOURCE = (
+    select(Listing)
+    .where(Listing.status == ListingStatus.ACTIVE)
+    .order_by(Listing.created_at.desc())
+    .limit(bindparam("limit"))
+)
+
+LISTINGS_CHANGED_SINCE = select(Listing).where(Listing.updated_at > bindparam("since"))
+
+# Search suggestions: titles of active listings, then changes since the last poll
+SUGGEST_LISTINGS = select(Listing.id, Listing.title, Listing.category_id).where(
+    Listing.status == ListingStatus.ACTIVE
+)
+
+SUGGEST_LISTINGS_CHANGED = select(
+    Listing.id, Listing.title, Listing.category_id, Listing.status
+).where(Listing.updated_at > bindparam("since"))
+
+ARCHIVED_LISTING_DETAIL = (
+    select(ArchivedListing)
+    .where(ArchivedListing.id == bindparam("listing_id"))
+    .options(selectinload(ArchivedListing.user))
+)
+
+# --- Favorites ---
+
+FAVORITE_BY_USER_LISTING = select(Favorite).where(
+    Favorite.user_id == bindparam("user_id"),
+    Favorite.listing_id == bindparam("listing_id"),
+)
+
+FAVORITE_USER_IDS = select(Favorite.user_id).where(
+    Favorite.listing_id == bindparam("listing_id")
+)
+
+# Category and price of a user's most recent favorites, for feed ranking
+FAVORITE_PROFILE = (
+    select(Listing.category_id, Listing.price)
+    .join(Favorite, Favorite.listing_id == Listing.id)
+    .join(User, Favorite.user_id == User.id)
+    .where(User.telegram_id == bindparam("telegram_id"))
+    .order_by(Favorite.created_at.desc())
+    .limit(bindparam("limit"))
+)
+
+
+# --- Images ---
+
+STORED_IMAGES_BY_URL = select(StoredImage).where(
+    StoredImage.url.in_(bindparam("urls", expanding=True))
+)
+
+STORED_IMAGES_BY_KEY = select(StoredImage).where(
+    StoredImage.key.in_(bindparam("keys", expanding=True))
+)
+
+STORED_IMAGE_BY_SHA256 = select(StoredImage).where(
+    StoredImage.sha256 == bindparam("sha256")
+)
+
+TOUCH_IMAGE_BY_SHA256 = (
+    update(StoredImage)
+    .where(StoredImage.sha256 == bindparam("sha256"))
+    .values(refs_changed_at=func.now())
+    .returning(StoredImage)
+)
+
+# Same, limited to one uploader's images: a hash alone is no proof of
+# having the bytes, so the hash-only shortcut only finds the caller's own
+TOUCH_OWN_IMAGE_BY_SHA256 = (
+    update(StoredImage)
+    .where(
+        StoredImage.sha256 == bindparam("sha256"),
+        StoredImage.owner_id == bindparam("owner_id"),
+    )
+    .values(refs_changed_at=func.now())
+    .returning(StoredImage)
+)
+
+
+# --- Chats ---
+
+# Keep cursor timestamps timezone-aware when bound
+_CURSOR_TYPES = (DateTime(timezone=True), UUID(as_uuid=True))
+
+CHAT_BY_ID = select(Chat).where(Chat.id == bindparam("chat_id"))
+
+CHAT_BY_LISTING_BUYER = select(Chat).where(
+    Chat.listing_id == bindparam("listing_id"),
+    Chat.buyer_id == bindparam("buyer_id"),
+)
+
+
+def inbox_query(
+    user_id, before: tuple[datetime, object] | None = None, limit: int = 20
+) -> StatementLambdaElement:
+    """A user's chats by latest message, with listing thumbnail and counterpart.
+
+    One statement served by the (buyer_id|seller_id, last_message_at) indexes;
+    chats without messages are not listed.
+    """
+    stmt = lambda_stmt(
+        lambda: select(
+            Chat,
+            Listing.title.label("listing_title"),
+            Listing.images[1].label("listing_image"),
+            User,
+        )
+        .outerjoin(Listing, Listing.id == Chat.listing_id)
+        .join(
+            User,
+            User.id == case(
+                (Chat.buyer_id == user_id, Chat.seller_id), else_=Chat.buyer_id
+            ),
+        )
+        .where(
+            or_(Chat.buyer_id == user_id, Chat.seller_id == user_id),
+            Chat.last_message_at.is_not(None),
+        )
+    )
+    if before is not None:
+        before_at, before_id = before
+        stmt += lambda s: s.where(
+            tuple_(Chat.last_message_at, Chat.id)
+            < tuple_(before_at, before_id, types=_CURSOR_TYPES)
+        )
+    stmt += lambda s: s.order_by(
+        Chat.last_message_at.desc(), Chat.id.desc()
+    ).limit(limit)
+    return stmt
+
+
+def message_history_query(
+    chat_id,
+    not_before: datetime,
+    before: tuple[datetime, object] | None = None,
+    limit: int = 50,
+) -> StatementLambdaElement:
+    """Latest messages of a chat, newest first, older than an optional cursor.
+
+    The plain ``created_at`` bounds (``not_before`` is derived from the chat's
+    creation time) let Postgres prune partitions outside the chat's lifetime;
+    the row comparison pins the exact keyset position.
+    """
+    stmt = lambda_stmt(
+        lambda: select(Message).where(
+            Message.chat_id == chat_id,
+            Message.created_at >= not_before,
+        )
+    )
+    if before is not None:
+        before_at, before_id = before
+        stmt += lambda s: s.where(
+            Message.created_at <= before_at,
+            tuple_(Message.created_at, Message.id)
+            < tuple_(before_at, before_id, types=_CURSOR_TYPES),
+        )
+    stmt += lambda s: s.order_by(
+        Message.created_at.desc(), Message.id.desc()
+    ).limit(limit)
+    return stmt
+
+
+def messages_since_query(
+    chat_id, since: tuple[datetime, object], limit: int = 50
+) -> StatementLambdaElement:
+    """Messages after a cursor, oldest first, for reconnecting clients."""
+    since_at, since_id = since
+    return lambda_stmt(
+        lambda: select(Message)
+        .where(
+            Message.chat_id == chat_id,
+            Message.created_at >= since_at,
+            tuple_(Message.created_at, Message.id)
+            > tuple_(since_at, since_id, types=_CURSOR_TYPES),
+        )
+        .order_by(Message.created_at, Message.id)
+        .limit(limit)
+    )
+
+
+def _feed_filters(
+    stmt: StatementLambdaElement,
+    category: str | None,
+    search: str | None,
+    min_price: float | None,
+    max_price: float | None,
+    condition: str | None,
+) -> StatementLambdaElement:
+    """Append optional feed filters; each combination caches separately."""
+    if category:
+        stmt += lambda s: s.where(Listing.category_id == category)
+    if search:
+        pattern = f"%{search}%"
+        stmt += lambda s: s.where(Listing.title.ilike(pattern))
+    if min_price:
+        stmt += lambda s: s.where(Listing.price >= min_price)
+    if max_price:
+        stmt += lambda s: s.where(Listing.price <= max_price)
+    if condition:
+        stmt += lambda s: s.where(Listing.condition == condition)
+    return stmt
+
+
+def feed_query(
+    *,
+    city: str,
+    category: str | None = None,
+    search: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    condition: str | None = None,
+    offset: int = 0,
+    limit: int = 20,
+) -> StatementLambdaElement:
+    """Active listings page for the feed, featured first."""
+    stmt = lambda_stmt(
+        lambda: select(Listing)
+        .where(Listing.status == "active", Listing.city == city)
+        .options(selectinload(Listing.user))
+    )
+    stmt = _feed_filters(stmt, category, search, min_price, max_price, condition)
+    stmt += lambda s: s.order_by(
+        Listing.is_featured.desc(), Listing.created_at.desc()
+    ).offset(offset).limit(limit)
+    return stmt
+
+
+def feed_candidates_query(
+    *,
+    city: str,
+    category: str | None = None,
+    search: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    condition: str | None = None,
+    limit: int = 500,
+) -> StatementLambdaElement:
+    """Scoring columns of the newest listings matching the feed filters."""
+    stmt = lambda_stmt(
+        lambda: select(
+            Listing.id,
+            Listing.category_id,
+            Listing.price,
+            func.extract("epoch", Listing.created_at),
+            Listing.is_featured,
+            User.rating,
+        )
+        .join(User, Listing.user_id == User.id)
+        .where(Listing.status == "active", Listing.city == city)
+    )
+    stmt = _feed_filters(stmt, category, search, min_price, max_price, condition)
+    stmt += lambda s: s.order_by(Listing.created_at.desc()).limit(limit)
+    return stmt
+
+
+def feed_count_query(
+    *,
+    city: str,
+    category: str | None = None,
+    search: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    condition: str | None = None,
+) -> StatementLambdaElement:
+    """Total number of listings matching the feed filters."""
+    stmt = lambda_stmt(
+        lambda: select(func.count())
+        .select_from(Listing)
+        .where(Listing.status == "active", Listing.city == city)
+    )
+    return _feed_filters(stmt, category, search, min_price, max_price, condition)
+
+
+def user_listings_query(
+    user_id, status: ListingStatus | None = None
+) -> StatementLambdaElement:
+    """A user's own listings, newest first."""
+    stmt = lambda_stmt(lambda: select(Listing).where(Listing.user_id == user_id))
+    if status:
+        stmt += lambda s: s.where(Listing.status == status)
+    else:
+        stmt += lambda s: s.where(Listing.status != ListingStatus.DELETED)
+    stmt += lambda s: s.order_by(Listing.created_at.desc())
+    return stmt
+
+
+def archived_user_listings_query(
+    user_id, status: ListingStatus | None = None
+) -> StatementLambdaElement:
+    """A user's archived listings, newest first. Deleted ones only on request."""
+    stmt = lambda_stmt(
+        lambda: select(ArchivedListing).where(ArchivedListing.user_id == user_id)
+    )
+    if status:
+        stmt += lambda s: s.where(ArchivedListing.status == status)
+    else:
+        stmt += lambda s: s.where(ArchivedListing.status != ListingStatus.DELETED)
+    stmt += lambda s: s.order_by(ArchivedListing.created_at.desc())
+    return stmt
@@ -0,0 +1,206 @@
+"""Token-bucket rate limiting for expensive endpoints.
+
+Each route budget is a bucket of ``burst`` tokens refilled at ``per_minute``;
+a request takes one token or is answered 429 with ``Retry-After``. Buckets
+live in Redis and are updated by one Lua script, so all workers share them
+and check-and-take is atomic. Callers are identified by Telegram user ID
+(from the JWT or initData, without touching the database), else by IP.
+
+If Redis is unreachable the limiter falls back to per-worker in-memory
+buckets for ``RATE_LIMIT_REDIS_RETRY_SECONDS`` before trying Redis again;
+limits are then enforced per worker rather than globally.
+
+Limits are route dependencies, so they run before the endpoint's own
+dependencies (authentication, the database session)::
+
+    @router.post("", dependencies=[Depends(listing_write_limit)])
+"""
+
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import structlog
+from fastapi import HTTPException, Request, Response, status
+
+from app.core.config import settings
+from app.core.metrics import RATE_LIMIT_DECISIONS
+from app.core.redis import get_redis
+from app.core.security import telegram_id_from_credentials
+
+logger = structlog.get_logger()
+
+# KEYS[1] bucket; ARGV: refill per second, burst, cost.
+# Returns {allowed, tokens left, seconds until allowed}; floats as strings,
+# since Lua numbers are truncated to integers in replies.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {allowed, tostring(tokens), tostring(wait)}
+"""
+
+_script = None
+_redis_down_until = 0.0
+
+
+@dataclass(frozen=True)
+class Decision:
+    """Outcome of taking a token."""
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+
+class LocalBuckets:
+    """Per-worker token buckets, used while Redis is unavailable."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def take(self, key: str, rate: float, burst: int, cost: int = 1) -> Decision:
+        """Same arithmetic as the Lua script, on a monotonic clock."""
+        now = time.monotonic()
+        tokens, ts = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + max(0.0, now - ts) * rate)
+        if tokens >= cost:
+            decision = Decision(True, tokens - cost, 0.0)
+            tokens -= cost
+        else:
+            decision = Decision(False, tokens, (cost - tokens) / rate)
+        self._buckets[key] = (tokens, now)
+        # Least recently used buckets go first
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return decision
+
+
+_local = LocalBuckets(settings.RATE_LIMIT_LOCAL_MAX_KEYS)
+
+
+async def take_token(key: str, rate: float, burst: int, cost: int = 1) -> tuple[Decision, str]:
+    """Take ``cost`` tokens from bucket ``key``; returns the decision and the backend used."""
+    global _script, _redis_down_until
+    if time.monotonic() >= _redis_down_until:
+        try:
+            redis = get_redis()
+            if _script is None or _script.registered_client is not redis:
+                _script = redis.register_script(TOKEN_BUCKET_LUA)
+            allowed, remaining, wait = await _script(keys=[key], args=[rate, burst, cost])
+            return Decision(bool(int(allowed)), float(remaining), float(wait)), "redis"
+        except Exception:
+            _redis_down_until = time.monotonic() + settings.RATE_LIMIT_REDIS_RETRY_SECONDS
+            logger.warning("rate_limit_redis_unavailable", exc_info=True)
+    return _local.take(key, rate, burst, cost), "local"
+
+
+def client_identity(request: Request) -> str:
+    """Telegram user ID from the credentials if they verify, else the client IP."""
+    identity = getattr(request.state, "rate_limit_identity", None)
+    if identity:
+        return identity
+
+    telegram_id = telegram_id_from_credentials(
+        request.headers.get("authorization"), request.headers.get("x-init-data")
+    )
+    if telegram_id:
+        identity = f"tg:{telegram_id}"
+    else:
+        forwarded = request.headers.get("x-forwarded-for")
+        if settings.RATE_LIMIT_TRUST_PROXY and forwarded:
+            ip = forwarded.split(",")[0].strip()
+        else:
+            ip = request.client.host if request.client else "unknown"
+        identity = f"ip:{ip}"
+
+    request.state.rate_limit_identity = identity
+    return identity
+
+
+class RateLimit:
+    """Route dependency enforcing one token bucket per caller."""
+
+    def __init__(
+        self,
+        name: str,
+        per_minute: int,
+        burst: int,
+        applies: Callable[[Request], bool] | None = None,
+    ):
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.applies = applies
+
+    async def __call__(self, request: Request, response: Response) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        if self.applies is not None and not self.applies(request):
+            return
+
+        key = f"ratelimit:{self.name}:{client_identity(request)}"
+        decision, backend = await take_token(key, self.rate, self.burst)
+        RATE_LIMIT_DECISIONS.labels(
+            limit=self.name,
+            result="allowed" if decision.allowed else "limited",
+            backend=backend,
+        ).inc()
+
+        headers = {
+            "X-RateLimit-Limit": str(self.burst),
+            "X-RateLimit-Remaining": str(math.floor(decision.remaining)),
+        }
+        if not decision.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, slow down",
+                headers={**headers, "Retry-After": str(max(1, math.ceil(decision.retry_after)))},
+            )
+        response.headers.update(headers)
+
+
+# --- Route budgets ---
+
+search_limit = RateLimit(
+    "search",
+    settings.RATE_LIMIT_SEARCH_PER_MINUTE,
+    settings.RATE_LIMIT_SEARCH_BURST,
+    applies=lambda request: bool(request.query_params.get("search")),
+)
+listing_write_limit = RateLimit(
+    "listing_write",
+    settings.RATE_LIMIT_LISTING_WRITE_PER_MINUTE,
+    settings.RATE_LIMIT_LISTING_WRITE_BURST,
+)
+chat_write_limit = RateLimit(
+    "chat_write",
+    settings.RATE_LIMIT_CHAT_WRITE_PER_MINUTE,
+    settings.RATE_LIMIT_CHAT_WRITE_BURST,
+)
+upload_limit = RateLimit(
+    "upload",
+    settings.RATE_LIMIT_UPLOAD_PER_MINUTE,
+    settings.RATE_LIMIT_UPLOAD_BURST,
+)
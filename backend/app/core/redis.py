@@ -0,0 +1,32 @@
+"""Shared Redis connection pool."""
+
+from typing import TYPE_CHECKING
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+_redis: "Redis | None" = None
+
+
+def get_redis() -> "Redis":
+    """Process-wide Redis client, created on first use.
+
+    The client library is imported here, not at module level, so importing
+    the app does not pay for it.
+    """
+    global _redis
+    if _redis is None:
+        from redis.asyncio import Redis
+
+        _redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the pool on shutdown."""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -86,3 +86,19 @@ def verify_token(token: str) -> dict[str, Any] | None:
         return payload
     except JWTError:
         return None
+
+
+def telegram_id_from_credentials(
+    authorization: str | None, init_data: str | None
+) -> int | None:
+    """Telegram user ID from a JWT bearer value or initData, if it verifies.
+
+    No database access; for callers that only need to know who is asking.
+    """
+    if authorization and authorization.startswith("Bearer "):
+        payload = verify_token(authorization.split(" ")[1])
+        return payload.get("telegram_id") if payload else None
+    if init_data:
+        parsed = validate_telegram_init_data(init_data)
+        return parsed["user"].get("id") if parsed and "user" in parsed else None
+    return None
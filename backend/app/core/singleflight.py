@@ -0,0 +1,177 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+While a call for a key is running, later callers with the same key await
+its result instead of starting their own, so a burst of identical requests
+runs the underlying queries once per worker. Nothing is kept after the call
+finishes; this is not a cache.
+
+The shared call runs in its own task, so a caller that disconnects does not
+cancel it for the others, and it must not use a request's session: open a
+short one with ``get_db_context``. Callers share the returned object, so
+return something they will not mutate (e.g. a response model).
+
+With ``SINGLEFLIGHT_REDIS`` enabled, functions declared with a ``model``
+also coalesce across workers: one worker takes a short Redis lock and
+publishes its result for ``SINGLEFLIGHT_RESULT_TTL_MS``; the others poll for
+it and run the call themselves if it does not show up in time.
+"""
+
+import asyncio
+import hashlib
+import json
+from collections.abc import Awaitable, Callable, Hashable
+from enum import Enum
+from functools import wraps
+from typing import Any, ParamSpec, TypeVar
+
+import structlog
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.metrics import SINGLEFLIGHT_CALLS
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# How often workers without the lock look for the published result
+POLL_INTERVAL = 0.02
+
+
+def normalize_key(*args: Any, **kwargs: Any) -> tuple:
+    """Hashable key for call arguments.
+
+    Keyword order does not matter, None-valued keywords are dropped (so an
+    omitted filter and an explicit null coalesce) and enums compare by value.
+    """
+    def norm(value: Any) -> Hashable:
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, (list, tuple)):
+            return tuple(norm(v) for v in value)
+        if isinstance(value, dict):
+            return tuple(sorted((k, norm(v)) for k, v in value.items()))
+        return value if isinstance(value, Hashable) else str(value)
+
+    return (
+        tuple(norm(arg) for arg in args),
+        tuple(sorted((k, norm(v)) for k, v in kwargs.items() if v is not None)),
+    )
+
+
+class SingleFlight:
+    """In-flight calls of one worker, by key."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self) -> int:
+        """Number of calls currently running."""
+        return len(self._calls)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        self._calls.pop(key, None)
+        # Mark the error retrieved in case every caller went away before it
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Result of ``fn()``, shared with every concurrent caller using ``key``."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+            SINGLEFLIGHT_CALLS.labels(name=self.name, role="leader").inc()
+        else:
+            SINGLEFLIGHT_CALLS.labels(name=self.name, role="shared").inc()
+        # Shielded: a cancelled caller stops waiting without cancelling the call
+        return await asyncio.shield(task)
+
+
+async def _across_workers(
+    name: str, key: Hashable, fn: Callable[[], Awaitable[T]], model: type[BaseModel]
+) -> T:
+    """Run ``fn`` in one worker and share its result through Redis.
+
+    Redis problems fall back to running ``fn`` locally; errors from ``fn``
+    itself are raised as usual (and not shared).
+    """
+    digest = hashlib.sha1(json.dumps(key, default=str).encode()).hexdigest()
+    lock_key = f"singleflight:{name}:{digest}:lock"
+    result_key = f"singleflight:{name}:{digest}:result"
+    redis = get_redis()
+    loop = asyncio.get_running_loop()
+
+    try:
+        cached = await redis.get(result_key)
+        if cached is None:
+            leader = await redis.set(lock_key, "1", nx=True, px=settings.SINGLEFLIGHT_LOCK_MS)
+        else:
+            leader = False
+        if not leader:
+            deadline = loop.time() + settings.SINGLEFLIGHT_LOCK_MS / 1000
+            while cached is None and loop.time() < deadline:
+                await asyncio.sleep(POLL_INTERVAL)
+                cached, running = await redis.mget(result_key, lock_key)
+                if cached is None and running is None:
+                    # The leader failed; no result is coming
+                    break
+            if cached is not None:
+                SINGLEFLIGHT_CALLS.labels(name=name, role="remote").inc()
+                return model.model_validate_json(cached)
+    except Exception:
+        logger.warning("singleflight_redis_unavailable", name=name, exc_info=True)
+        return await fn()
+
+    try:
+        result = await fn()
+    except BaseException:
+        if leader:
+            # Release followers at once instead of leaving them to time out
+            try:
+                await redis.delete(lock_key)
+            except Exception:
+                logger.warning("singleflight_unlock_failed", name=name, exc_info=True)
+        raise
+    if leader:
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.set(
+                    result_key,
+                    result.model_dump_json(),
+                    px=settings.SINGLEFLIGHT_RESULT_TTL_MS,
+                )
+                pipe.delete(lock_key)
+                await pipe.execute()
+        except Exception:
+            logger.warning("singleflight_publish_failed", name=name, exc_info=True)
+    return result
+
+
+def singleflight(
+    name: str, model: type[BaseModel] | None = None
+) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
+    """Coalesce concurrent calls of the decorated coroutine with equal arguments.
+
+    ``model`` is the pydantic type the function returns; it is needed to pass
+    results between workers and enables that when ``SINGLEFLIGHT_REDIS`` is on.
+    """
+    def decorator(fn: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
+        flight = SingleFlight(name)
+
+        @wraps(fn)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            key = normalize_key(*args, **kwargs)
+            call = lambda: fn(*args, **kwargs)  # noqa: E731
+            if model is not None and settings.SINGLEFLIGHT_REDIS:
+                return await flight.do(key, lambda: _across_workers(name, key, call, model))
+            return await flight.do(key, call)
+
+        wrapper.flight = flight  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
@@ -0,0 +1,27 @@
+"""Background task helpers for the application lifespan."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+async def run_periodic(
+    name: str,
+    interval_seconds: float,
+    job: Callable[[], Awaitable[object]],
+    initial_delay: float = 0.0,
+) -> None:
+    """Run ``job`` forever, sleeping between runs. Errors are logged, not raised."""
+    if initial_delay:
+        await asyncio.sleep(initial_delay)
+    while True:
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("periodic_job_failed", job=name)
+        await asyncio.sleep(interval_seconds)
@@ -1,13 +1,40 @@
 """FastAPI application entry point."""
 
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 import structlog
 
 from app.api.v1.router import router as v1_router
+from app.bot.client import bot_client
+from app.bot.dispatcher import run_dispatcher
+from app.bot.webhook import drain_updates, run_update_workers
+from app.bot.webhook import router as bot_router
 from app.core.config import settings
+from app.core.database import dispose_engine, get_engine
+from app.core.instrumentation import QueryStatsMiddleware
+from app.core.metrics import (
+    MetricsMiddleware,
+    mark_process_dead,
+    monitor_event_loop,
+    render_metrics,
+)
+from app.core.redis import close_redis
+from app.core.tasks import run_periodic
+from app.services.archive import run_archival
+from app.services.chat_hub import chat_hub
+from app.services.events import event_hub
+from app.services.image_gc import run_bucket_sweep, run_image_gc
+from app.services.images import shutdown_image_pool
+from app.services.jobs import purge_finished_jobs, run_job_workers
+from app.services.notifications import scan_expiring_listings
+from app.services.partitions import maintain_message_partitions
+from app.services.similarity import rebuild_similar_index, refresh_similar_index
+from app.services.storage import storage_service
+from app.services.suggest import refresh_suggest_index
+from app.services.views import flush_views
 
 # Configure structured logging
 structlog.configure(
@@ -30,8 +57,86 @@ logger = structlog.get_logger()
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     logger.info("application_starting", app_name=settings.APP_NAME)
+    # Heavy clients are built here, not on import; the storage client
+    # (boto3 loads its service models) warms up without delaying startup
+    get_engine()
+    background = [
+        asyncio.create_task(storage_service.start()),
+        asyncio.create_task(monitor_event_loop()),
+        asyncio.create_task(run_job_workers()),
+        asyncio.create_task(run_dispatcher()),
+        asyncio.create_task(run_update_workers()),
+        asyncio.create_task(run_periodic(
+            "listing_expiry_reminders",
+            settings.NOTIFY_EXPIRY_SCAN_SECONDS,
+            scan_expiring_listings,
+        )),
+        asyncio.create_task(run_periodic(
+            "job_purge",
+            settings.JOBS_PURGE_INTERVAL_SECONDS,
+            purge_finished_jobs,
+        )),
+        asyncio.create_task(run_periodic(
+            "message_partitions",
+            settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+            maintain_message_partitions,
+        )),
+        asyncio.create_task(run_periodic(
+            "listing_archive",
+            settings.ARCHIVE_INTERVAL_SECONDS,
+            run_archival,
+        )),
+        asyncio.create_task(run_periodic(
+            "listing_views",
+            settings.LISTING_VIEWS_FLUSH_SECONDS,
+            flush_views,
+            initial_delay=settings.LISTING_VIEWS_FLUSH_SECONDS,
+        )),
+        asyncio.create_task(run_periodic(
+            "similar_index_rebuild",
+            settings.SIMILAR_REBUILD_SECONDS,
+            rebuild_similar_index,
+        )),
+        asyncio.create_task(run_periodic(
+            "similar_index_refresh",
+            settings.SIMILAR_REFRESH_SECONDS,
+            refresh_similar_index,
+            initial_delay=settings.SIMILAR_REFRESH_SECONDS,
+        )),
+        asyncio.create_task(run_periodic(
+            "suggest_index",
+            settings.SUGGEST_REFRESH_SECONDS,
+            refresh_suggest_index,
+        )),
+        asyncio.create_task(run_periodic(
+            "image_gc",
+            settings.IMAGE_GC_INTERVAL_SECONDS,
+            run_image_gc,
+        )),
+        asyncio.create_task(run_periodic(
+            "image_sweep",
+            settings.IMAGE_SWEEP_INTERVAL_SECONDS,
+            run_bucket_sweep,
+            initial_delay=settings.IMAGE_GC_INTERVAL_SECONDS,
+        )),
+    ]
     yield
     logger.info("application_stopping")
+    await drain_updates(timeout=5.0)
+    for task in background:
+        task.cancel()
+    await chat_hub.close()
+    await event_hub.close()
+    await close_redis()
+    await bot_client.close()
+    try:
+        await flush_views()
+    except Exception:
+        logger.exception("listing_views_flush_failed")
+    await dispose_engine()
+    await asyncio.to_thread(storage_service.close)
+    await asyncio.to_thread(shutdown_image_pool)
+    mark_process_dead()
 
 
 app = FastAPI(
@@ -53,6 +158,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request SQL stats
+app.add_middleware(QueryStatsMiddleware)
+
+# Prometheus request metrics (outermost, so it times the whole stack)
+app.add_middleware(MetricsMiddleware)
+
 
 # Health check
 @app.get("/health")
@@ -61,8 +172,17 @@ async def health_check():
     return {"status": "healthy", "app": settings.APP_NAME}
 
 
+# Prometheus scrape target
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 # API routes
 app.include_router(v1_router, prefix="/api/v1")
+app.include_router(bot_router, prefix="/bot", tags=["bot"])
 
 
 if __name__ == "__main__":
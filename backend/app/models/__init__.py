@@ -5,6 +5,9 @@ from app.models.category import Category
 from app.models.listing import Listing, ListingStatus, ListingCondition
 from app.models.chat import Chat, Message
 from app.models.favorite import Favorite
+from app.models.archive import ArchivedListing, ArchivedFavorite
+from app.models.image import StoredImage
+from app.models.job import Job, JobStatus
 
 __all__ = [
     "User",
@@ -15,4 +18,9 @@ __all__ = [
     "Chat",
     "Message",
     "Favorite",
+    "ArchivedListing",
+    "ArchivedFavorite",
+    "StoredImage",
+    "Job",
+    "JobStatus",
 ]
@@ -0,0 +1,83 @@
+"""Cold-storage copies of listings that left the live marketplace."""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Enum, Float, ForeignKey, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.database import Base
+from app.models.listing import ListingCondition, ListingStatus
+
+
+class ArchivedListing(Base):
+    """Sold, expired or deleted listing moved out of ``listings``.
+
+    Mirrors the ``listings`` columns so archived rows can be rendered with the
+    same response code, plus ``archived_at``.
+    """
+
+    __tablename__ = "listings_archive"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False, index=True
+    )
+    category_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+
+    # Content
+    title: Mapped[str] = mapped_column(String(200), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text)
+    price: Mapped[float] = mapped_column(Float, nullable=False)
+    currency: Mapped[str] = mapped_column(String(3))
+    is_negotiable: Mapped[bool] = mapped_column(Boolean)
+    condition: Mapped[ListingCondition] = mapped_column(Enum(ListingCondition))
+    images: Mapped[list] = mapped_column(ARRAY(String), default=list)
+
+    # Location
+    city: Mapped[str] = mapped_column(String(100))
+    area: Mapped[str | None] = mapped_column(String(100))
+    latitude: Mapped[float | None] = mapped_column(Float)
+    longitude: Mapped[float | None] = mapped_column(Float)
+
+    # Status and stats at the time of archiving
+    status: Mapped[ListingStatus] = mapped_column(Enum(ListingStatus))
+    views_count: Mapped[int] = mapped_column(Integer, default=0)
+    favorites_count: Mapped[int] = mapped_column(Integer, default=0)
+    is_featured: Mapped[bool] = mapped_column(Boolean, default=False)
+    featured_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    metadata_: Mapped[dict] = mapped_column("metadata", JSONB, default=dict)
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    sold_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    # Relationships
+    user = relationship("User")
+
+    def __repr__(self) -> str:
+        return f"<ArchivedListing {self.title[:30]}>"
+
+
+class ArchivedFavorite(Base):
+    """Favorite that pointed at an archived listing."""
+
+    __tablename__ = "favorites_archive"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+    listing_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<ArchivedFavorite user={self.user_id} listing={self.listing_id}>"
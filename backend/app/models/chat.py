@@ -1,9 +1,9 @@
 """Chat and Message models for marketplace."""
 
 import uuid
-from datetime import datetime
+from datetime import UTC, datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text, func
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -14,6 +14,11 @@ class Chat(Base):
     """Chat conversation between buyer and seller."""
 
     __tablename__ = "chats"
+    __table_args__ = (
+        # Inbox: a participant's chats by most recent activity
+        Index("ix_chats_buyer_last_message", "buyer_id", "last_message_at"),
+        Index("ix_chats_seller_last_message", "seller_id", "last_message_at"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -28,11 +33,11 @@ class Chat(Base):
     # Participants
     buyer_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"),
-        nullable=False, index=True
+        nullable=False
     )
     seller_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"),
-        nullable=False, index=True
+        nullable=False
     )
     
     # Status
@@ -44,6 +49,21 @@ class Chat(Base):
     )
     last_message_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     
+    # Denormalized last message (messages is partitioned, so no FK)
+    last_message_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True))
+    last_message_sender_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True))
+    last_message_preview: Mapped[str | None] = mapped_column(String(200))
+    
+    # Unread counters, maintained when messages are sent and read
+    buyer_unread_count: Mapped[int] = mapped_column(Integer, default=0)
+    seller_unread_count: Mapped[int] = mapped_column(Integer, default=0)
+    
+    # Read watermarks: each participant has read everything up to this message
+    buyer_last_read_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    buyer_last_read_message_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True))
+    seller_last_read_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    seller_last_read_message_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True))
+    
     # Relationships
     listing = relationship("Listing", back_populates="chats")
     buyer = relationship("User", foreign_keys=[buyer_id], backref="chats_as_buyer")
@@ -55,9 +75,19 @@ class Chat(Base):
 
 
 class Message(Base):
-    """Individual message in a chat."""
+    """Individual message in a chat.
+
+    The table is range-partitioned by month on ``created_at`` (see
+    ``app.services.partitions``), so ``created_at`` is part of the primary key
+    and queries should bound it to let Postgres prune partitions.
+    """
 
     __tablename__ = "messages"
+    __table_args__ = (
+        # History pages walk this index backwards from a (created_at, id) cursor
+        Index("ix_messages_chat_created", "chat_id", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -65,7 +95,7 @@ class Message(Base):
     
     chat_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("chats.id", ondelete="CASCADE"),
-        nullable=False, index=True
+        nullable=False
     )
     
     sender_id: Mapped[uuid.UUID] = mapped_column(
@@ -77,12 +107,10 @@ class Message(Base):
     text: Mapped[str | None] = mapped_column(Text)
     image_url: Mapped[str | None] = mapped_column(String(500))
     
-    # Status
-    is_read: Mapped[bool] = mapped_column(Boolean, default=False)
-    
-    # Timestamps
+    # Timestamps (partition key)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), primary_key=True,
+        default=lambda: datetime.now(UTC), server_default=func.now()
     )
     
     # Relationships
@@ -0,0 +1,62 @@
+"""Uploaded images and their derivatives."""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class StoredImage(Base):
+    """An original image in object storage and the variants rendered from it.
+
+    Images are deduplicated by content hash: uploading the same bytes again
+    returns the existing row. ``ref_count`` counts the listing image slots
+    pointing at the image. Images unreferenced for a grace period are removed
+    by the collector in ``app.services.image_gc``.
+    """
+
+    __tablename__ = "stored_images"
+    __table_args__ = (
+        # Collector scan: unreferenced images by age
+        Index(
+            "ix_stored_images_unreferenced", "refs_changed_at",
+            postgresql_where=text("ref_count <= 0"),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    
+    owner_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False, index=True
+    )
+    
+    # Original object
+    key: Mapped[str] = mapped_column(String(500), unique=True, nullable=False)
+    url: Mapped[str] = mapped_column(String(500), unique=True, nullable=False)
+    content_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    width: Mapped[int | None] = mapped_column(Integer)
+    height: Mapped[int | None] = mapped_column(Integer)
+    sha256: Mapped[str | None] = mapped_column(String(64), unique=True)
+    ref_count: Mapped[int] = mapped_column(Integer, default=0)
+    refs_changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    
+    # Derivatives: {"thumb": url, "card": url, "full": url}; empty if undecodable
+    variants: Mapped[dict] = mapped_column(JSONB, default=dict)
+    placeholder: Mapped[str | None] = mapped_column(Text)  # Tiny WebP data URI
+    
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<StoredImage {self.key}>"
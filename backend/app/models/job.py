@@ -0,0 +1,63 @@
+"""Background jobs (transactional outbox)."""
+
+import enum
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Job(Base):
+    """A side effect to run after the transaction that enqueued it commits.
+
+    Rows are inserted in the request's transaction, so a job exists exactly
+    when the write that caused it does. Workers in ``app.services.jobs`` claim
+    due rows with ``SKIP LOCKED`` and hold them for a lease; a worker that
+    dies mid-job leaves the row to be claimed again once the lease expires.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Worker scan: jobs that are due or whose lease may have expired
+        Index(
+            "ix_jobs_due", "run_after",
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+
+    kind: Mapped[str] = mapped_column(String(100), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, default=dict)
+    # Enqueueing the same key again is a no-op while the row is kept
+    idempotency_key: Mapped[str | None] = mapped_column(String(200), unique=True)
+
+    status: Mapped[str] = mapped_column(String(20), default=JobStatus.PENDING.value)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False)
+    run_after: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    last_error: Mapped[str | None] = mapped_column(Text)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+    def __repr__(self) -> str:
+        return f"<Job {self.kind} {self.status}>"
@@ -0,0 +1,104 @@
+"""Move inactive listings out of the hot ``listings`` table."""
+
+from datetime import UTC, datetime, timedelta
+
+import structlog
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import get_engine
+from app.models.archive import ArchivedFavorite, ArchivedListing
+from app.models.favorite import Favorite
+from app.models.listing import Listing
+
+logger = structlog.get_logger()
+
+_LISTING_COLUMNS = ", ".join(
+    c.name for c in Listing.__table__.columns if c.name in ArchivedListing.__table__.columns
+)
+_FAVORITE_COLUMNS = ", ".join(
+    c.name for c in Favorite.__table__.columns if c.name in ArchivedFavorite.__table__.columns
+)
+
+# Expire active listings past their expiry date (bounded batch)
+EXPIRE_BATCH = text("""
+    UPDATE listings SET status = 'expired', updated_at = now()
+    WHERE id IN (
+        SELECT id FROM listings
+        WHERE status = 'active' AND expires_at < now()
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+# Move one batch of listings and their favorites in a single statement.
+# Listings that still have chats are kept: deleting them would cascade to the
+# conversation history.
+ARCHIVE_BATCH = text(f"""
+    WITH batch AS (
+        SELECT id FROM listings
+        WHERE status IN ('sold', 'expired', 'deleted')
+          AND updated_at < :cutoff
+          AND NOT EXISTS (SELECT 1 FROM chats WHERE chats.listing_id = listings.id)
+        ORDER BY updated_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    moved_favorites AS (
+        DELETE FROM favorites USING batch
+        WHERE favorites.listing_id = batch.id
+        RETURNING favorites.*
+    ),
+    archived_favorites AS (
+        INSERT INTO favorites_archive ({_FAVORITE_COLUMNS}, archived_at)
+        SELECT {_FAVORITE_COLUMNS}, now() FROM moved_favorites
+    ),
+    moved AS (
+        DELETE FROM listings USING batch
+        WHERE listings.id = batch.id
+        RETURNING listings.*
+    )
+    INSERT INTO listings_archive ({_LISTING_COLUMNS}, archived_at)
+    SELECT {_LISTING_COLUMNS}, now() FROM moved
+""")
+
+
+async def expire_listings(batch_size: int) -> int:
+    """Mark active listings past ``expires_at`` as expired."""
+    async with get_engine().begin() as conn:
+        result = await conn.execute(EXPIRE_BATCH, {"batch_size": batch_size})
+    return result.rowcount
+
+
+async def archive_listings(
+    older_than_days: int | None = None,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> int:
+    """Archive inactive listings in bounded batches, one transaction per batch.
+
+    Returns the number of listings moved.
+    """
+    older_than_days = older_than_days or settings.ARCHIVE_AFTER_DAYS
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    max_batches = max_batches or settings.ARCHIVE_MAX_BATCHES
+    cutoff = datetime.now(UTC) - timedelta(days=older_than_days)
+
+    total = 0
+    for _ in range(max_batches):
+        async with get_engine().begin() as conn:
+            result = await conn.execute(
+                ARCHIVE_BATCH, {"cutoff": cutoff, "batch_size": batch_size}
+            )
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            break
+    return total
+
+
+async def run_archival() -> None:
+    """Periodic job: expire overdue listings, then archive old inactive ones."""
+    expired = await expire_listings(settings.ARCHIVE_BATCH_SIZE)
+    archived = await archive_listings()
+    if expired or archived:
+        logger.info("listings_archived", expired=expired, archived=archived)
@@ -0,0 +1,121 @@
+"""Chat messaging: persistence and cross-worker fan-out."""
+
+import json
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis import get_redis
+from app.models.chat import Chat, Message
+from app.services import events, notifications
+
+
+def chat_channel(chat_id: uuid.UUID | str) -> str:
+    """Redis pub/sub channel carrying new messages for a chat."""
+    return f"chat:{chat_id}"
+
+
+def is_participant(chat: Chat, user_id: uuid.UUID) -> bool:
+    """Whether the user is the buyer or the seller in a chat."""
+    return user_id in (chat.buyer_id, chat.seller_id)
+
+
+def message_preview(text: str | None, image_url: str | None) -> str:
+    """Short text shown for the last message in the inbox."""
+    if text:
+        return text[:200]
+    return "📷" if image_url else ""
+
+
+def unread_count(chat: Chat, user_id: uuid.UUID) -> int:
+    """Unread messages in a chat for one participant."""
+    return chat.buyer_unread_count if user_id == chat.buyer_id else chat.seller_unread_count
+
+
+def recipient_id(chat: Chat, sender_id: uuid.UUID) -> uuid.UUID:
+    """The participant who receives a message from ``sender_id``."""
+    return chat.seller_id if sender_id == chat.buyer_id else chat.buyer_id
+
+
+def message_payload(message: Message) -> dict:
+    """JSON-serializable representation of a message."""
+    return {
+        "id": str(message.id),
+        "chat_id": str(message.chat_id),
+        "sender_id": str(message.sender_id),
+        "text": message.text,
+        "image_url": message.image_url,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+async def send_message(
+    db: AsyncSession,
+    chat: Chat,
+    sender_id: uuid.UUID,
+    text: str | None = None,
+    image_url: str | None = None,
+) -> Message:
+    """Store a message and update the chat's denormalized inbox fields."""
+    message = Message(
+        chat_id=chat.id,
+        sender_id=sender_id,
+        text=text,
+        image_url=image_url,
+    )
+    db.add(message)
+    await db.flush()
+
+    chat.last_message_at = message.created_at
+    chat.last_message_id = message.id
+    chat.last_message_sender_id = sender_id
+    chat.last_message_preview = message_preview(text, image_url)
+
+    # Atomic increment of the recipient's counter
+    if sender_id == chat.buyer_id:
+        chat.seller_unread_count = Chat.seller_unread_count + 1
+    else:
+        chat.buyer_unread_count = Chat.buyer_unread_count + 1
+
+    await notifications.chat_message(db, chat, message, recipient_id(chat, sender_id))
+    return message
+
+
+async def mark_read(db: AsyncSession, chat: Chat, user_id: uuid.UUID) -> None:
+    """Move the participant's read watermark to the chat's last message.
+
+    One UPDATE of the chat row, whatever the number of unread messages. The
+    watermark is copied from the row itself inside the statement, so a message
+    sent concurrently is either covered by it or still counted as unread.
+    """
+    if user_id == chat.buyer_id:
+        chat.buyer_last_read_at = Chat.last_message_at
+        chat.buyer_last_read_message_id = Chat.last_message_id
+        chat.buyer_unread_count = 0
+    else:
+        chat.seller_last_read_at = Chat.last_message_at
+        chat.seller_last_read_message_id = Chat.last_message_id
+        chat.seller_unread_count = 0
+    await db.flush()
+
+
+async def publish_message(
+    payload: dict,
+    recipient: uuid.UUID,
+    client_id: str | None = None,
+) -> None:
+    """Fan a committed message out to open chat sockets and the recipient's event stream."""
+    data = {**payload, "client_id": client_id} if client_id else payload
+    await get_redis().publish(chat_channel(payload["chat_id"]), json.dumps(data))
+    await events.publish_event(
+        recipient,
+        events.MESSAGE,
+        {
+            "chat_id": payload["chat_id"],
+            "message_id": payload["id"],
+            "sender_id": payload["sender_id"],
+            "preview": message_preview(payload["text"], payload["image_url"]),
+            "created_at": payload["created_at"],
+        },
+        coalesce_key=f"chat:{payload['chat_id']}",
+    )
@@ -0,0 +1,215 @@
+"""Per-worker WebSocket hub fed by Redis pub/sub.
+
+Each worker keeps one pub/sub connection and subscribes to a chat's channel
+only while at least one local socket is in that chat. Messages are handed to
+sockets through bounded queues: a client that cannot keep up is disconnected
+(and resyncs on reconnect) instead of growing memory without limit.
+"""
+
+import asyncio
+import json
+from typing import TYPE_CHECKING
+
+import structlog
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.services.chat import chat_channel
+
+if TYPE_CHECKING:
+    from redis.asyncio.client import PubSub
+
+logger = structlog.get_logger()
+
+# Close code for clients that fall too far behind ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class ChatConnection:
+    """One WebSocket and its outbound queue."""
+
+    def __init__(self, websocket: WebSocket, chat_id: str):
+        self.websocket = websocket
+        self.chat_id = chat_id
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self.overflowed = False
+        self.closing = False
+
+    def offer(self, payload: dict) -> bool:
+        """Queue a payload without blocking; False if the client is too slow."""
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+
+    async def run_sender(self) -> None:
+        """Send queued messages in batches, and a ping every heartbeat interval.
+
+        Pings go out on a fixed schedule however busy the chat is: the
+        client's pongs are what keep a read-only client alive.
+        """
+        loop = asyncio.get_running_loop()
+        next_ping = loop.time() + settings.WS_HEARTBEAT_SECONDS
+        while True:
+            try:
+                first = await asyncio.wait_for(
+                    self.queue.get(), timeout=max(next_ping - loop.time(), 0)
+                )
+            except TimeoutError:
+                first = None
+
+            if first is not None:
+                # Drain whatever else arrived in the same burst into one frame
+                batch = [first]
+                while len(batch) < settings.WS_MAX_BATCH and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                await self.websocket.send_json({"type": "messages", "messages": batch})
+
+            if loop.time() >= next_ping:
+                await self.websocket.send_json({"type": "ping"})
+                next_ping = loop.time() + settings.WS_HEARTBEAT_SECONDS
+
+
+class ChatHub:
+    """Routes pub/sub messages to the sockets of this worker."""
+
+    def __init__(self):
+        self._rooms: dict[str, set[ChatConnection]] = {}
+        self._pubsub: "PubSub | None" = None
+        self._listener: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        # Close calls for slow consumers, kept so they are not garbage-collected
+        self._closing: set[asyncio.Task] = set()
+
+    @property
+    def connection_count(self) -> int:
+        return sum(len(room) for room in self._rooms.values())
+
+    async def join(self, conn: ChatConnection) -> None:
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            room = self._rooms.setdefault(conn.chat_id, set())
+            if not room:
+                await self._pubsub.subscribe(chat_channel(conn.chat_id))
+            room.add(conn)
+            if self._listener is None or self._listener.done():
+                self._listener = asyncio.create_task(self._listen())
+
+    async def leave(self, conn: ChatConnection) -> None:
+        async with self._lock:
+            room = self._rooms.get(conn.chat_id)
+            if room is None:
+                return
+            room.discard(conn)
+            if not room:
+                del self._rooms[conn.chat_id]
+                if self._pubsub is not None:
+                    await self._pubsub.unsubscribe(chat_channel(conn.chat_id))
+
+    async def _listen(self) -> None:
+        while self._rooms:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("chat_pubsub_failed")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            try:
+                chat_id = message["channel"].split(":", 1)[1]
+                payload = json.loads(message["data"])
+            except (IndexError, ValueError):
+                logger.warning("chat_pubsub_bad_message", channel=message.get("channel"))
+                continue
+            self._dispatch(chat_id, payload)
+
+    def _dispatch(self, chat_id: str, payload: dict) -> None:
+        for conn in list(self._rooms.get(chat_id, ())):
+            if conn.closing or conn.offer(payload):
+                continue
+            # Closed once, however many messages overflow before it goes away
+            conn.closing = True
+            logger.warning("chat_slow_consumer", chat_id=chat_id)
+            task = asyncio.create_task(conn.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE))
+            self._closing.add(task)
+            task.add_done_callback(self._close_done)
+
+    def _close_done(self, task: asyncio.Task) -> None:
+        self._closing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # The socket may already be gone; the reader loop cleans up either way
+            logger.info("chat_slow_consumer_close_failed", error=str(task.exception()))
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self._rooms.clear()
+
+
+async def serve_connection(
+    conn: ChatConnection,
+    on_frame,
+) -> None:
+    """Pump a joined connection until it disconnects.
+
+    ``on_frame`` is awaited for every JSON object the client sends. Bad
+    frames, and frames ``on_frame`` rejects, get an ``{"type": "error"}``
+    reply and the connection carries on. A client that stays silent for two
+    heartbeat intervals is considered gone.
+    """
+    sender = asyncio.create_task(conn.run_sender())
+    try:
+        while not conn.overflowed:
+            raw = await asyncio.wait_for(
+                conn.websocket.receive_text(),
+                timeout=settings.WS_HEARTBEAT_SECONDS * 2,
+            )
+            try:
+                frame = json.loads(raw)
+            except ValueError:
+                await _send_error(conn, 400, "Frame is not valid JSON")
+                continue
+            if not isinstance(frame, dict):
+                await _send_error(conn, 400, "Frame must be a JSON object")
+                continue
+            if frame.get("type") == "pong":
+                continue
+
+            client_id = frame.get("client_id")
+            client_id = client_id if isinstance(client_id, str) else None
+            try:
+                await on_frame(frame)
+            except ValidationError as e:
+                await _send_error(conn, 422, e.errors(include_url=False, include_context=False), client_id)
+            except HTTPException as e:
+                await _send_error(conn, e.status_code, e.detail, client_id)
+            except Exception:
+                logger.exception("chat_frame_failed", chat_id=conn.chat_id)
+                await _send_error(conn, 500, "Message could not be sent", client_id)
+    except (WebSocketDisconnect, TimeoutError):
+        pass
+    finally:
+        sender.cancel()
+        await chat_hub.leave(conn)
+
+
+async def _send_error(
+    conn: ChatConnection, status_code: int, detail, client_id: str | None = None
+) -> None:
+    await conn.websocket.send_json(
+        {"type": "error", "status": status_code, "detail": detail, "client_id": client_id}
+    )
+
+
+chat_hub = ChatHub()
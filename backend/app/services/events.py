@@ -0,0 +1,157 @@
+"""Per-user notification events on Redis streams.
+
+Every user has a capped stream ``events:{user_id}``. Producers append after
+their transaction commits; the SSE endpoint tails the stream, so a client that
+reconnects with ``Last-Event-ID`` receives what it missed while the entry is
+still within the cap and TTL.
+
+SSE clients do not block on Redis themselves: each worker runs one
+``EventHub`` reader that waits on the streams of all its connected users in
+a single ``XREAD`` and wakes the clients whose stream moved. A woken client
+reads its own entries without blocking, so a worker holds one waiting Redis
+connection however many clients it serves.
+"""
+
+import asyncio
+import json
+import uuid
+from collections.abc import Iterable
+
+import structlog
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+# Event types
+MESSAGE = "message"
+LISTING_FAVORITED = "listing_favorited"
+LISTING_SOLD = "listing_sold"
+
+
+def event_stream_key(user_id: uuid.UUID | str) -> str:
+    """Redis stream holding a user's notifications."""
+    return f"events:{user_id}"
+
+
+async def publish_event(
+    user_ids: uuid.UUID | Iterable[uuid.UUID],
+    event_type: str,
+    data: dict,
+    coalesce_key: str | None = None,
+) -> None:
+    """Append an event to the streams of one or more users.
+
+    Events sharing a ``coalesce_key`` that are read in the same burst are
+    collapsed into the latest one (e.g. several messages in one chat).
+    """
+    if isinstance(user_ids, uuid.UUID):
+        user_ids = [user_ids]
+    fields = {"type": event_type, "data": json.dumps(data, default=str)}
+    if coalesce_key:
+        fields["key"] = coalesce_key
+
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for user_id in user_ids:
+            key = event_stream_key(user_id)
+            pipe.xadd(key, fields, maxlen=settings.EVENTS_STREAM_MAXLEN, approximate=True)
+            pipe.expire(key, settings.EVENTS_STREAM_TTL_SECONDS)
+        await pipe.execute()
+
+
+async def latest_event_id(user_id: uuid.UUID) -> str:
+    """Id of the newest event, so a fresh client only sees what comes next."""
+    entries = await get_redis().xrevrange(event_stream_key(user_id), count=1)
+    return entries[0][0] if entries else "0-0"
+
+
+async def read_events(user_id: uuid.UUID, after_id: str) -> list[tuple[str, dict]]:
+    """Events newer than ``after_id``, without waiting."""
+    response = await get_redis().xread(
+        {event_stream_key(user_id): after_id}, count=settings.EVENTS_BATCH_SIZE
+    )
+    return response[0][1] if response else []
+
+
+class EventHub:
+    """Watches the streams of this worker's SSE clients with a single reader."""
+
+    def __init__(self):
+        self._waiters: dict[str, set[asyncio.Event]] = {}
+        # Newest id the reader has seen per stream
+        self._positions: dict[str, str] = {}
+        self._reader: asyncio.Task | None = None
+
+    def subscribe(self, user_id: uuid.UUID, position: str) -> asyncio.Event:
+        """Event set whenever the user's stream gets entries after ``position``.
+
+        Register before reading, so nothing added in between is missed.
+        """
+        key = event_stream_key(user_id)
+        wake = asyncio.Event()
+        self._waiters.setdefault(key, set()).add(wake)
+        self._positions.setdefault(key, position)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._run())
+        return wake
+
+    def unsubscribe(self, user_id: uuid.UUID, wake: asyncio.Event) -> None:
+        key = event_stream_key(user_id)
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            return
+        waiters.discard(wake)
+        if not waiters:
+            del self._waiters[key]
+            self._positions.pop(key, None)
+
+    async def _run(self) -> None:
+        # Streams subscribed while a read is blocked join the next read, at
+        # most EVENTS_HUB_BLOCK_MS later
+        while self._waiters:
+            try:
+                response = await get_redis().xread(
+                    dict(self._positions),
+                    count=settings.EVENTS_BATCH_SIZE,
+                    block=settings.EVENTS_HUB_BLOCK_MS,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("event_hub_read_failed")
+                await asyncio.sleep(1.0)
+                continue
+            for key, entries in response or ():
+                if key not in self._positions:
+                    continue
+                self._positions[key] = entries[-1][0]
+                for wake in self._waiters.get(key, ()):
+                    wake.set()
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+        self._waiters.clear()
+        self._positions.clear()
+
+
+def coalesce(entries: list[tuple[str, dict]]) -> list[tuple[str, dict]]:
+    """Keep only the latest entry per coalesce key, preserving stream order."""
+    latest: dict[str, str] = {}
+    for entry_id, fields in entries:
+        if "key" in fields:
+            latest[fields["key"]] = entry_id
+    return [
+        (entry_id, fields)
+        for entry_id, fields in entries
+        if "key" not in fields or latest[fields["key"]] == entry_id
+    ]
+
+
+def format_sse(entry_id: str, fields: dict) -> str:
+    """Render a stream entry as an SSE frame."""
+    return f"id: {entry_id}\nevent: {fields['type']}\ndata: {fields['data']}\n\n"
+
+
+event_hub = EventHub()
@@ -0,0 +1,188 @@
+"""Garbage collection of listing images.
+
+Two passes:
+
+* ``collect_unreferenced_images`` deletes ``stored_images`` rows whose
+  reference count has been zero for ``IMAGE_GC_GRACE_HOURS`` and removes their
+  objects. Rows are claimed with ``SKIP LOCKED``, so workers can run it
+  concurrently.
+* ``sweep_orphaned_objects`` diffs the bucket against ``stored_images`` and
+  removes objects no row knows about (failed deletes, uploads that never
+  committed). It lists the whole prefix, so it runs rarely and under an
+  advisory lock.
+
+Deletes go out through ``DeleteObjects`` in batches of up to 1000 keys,
+throttled to ``IMAGE_GC_DELETES_PER_SECOND``. With ``IMAGE_GC_DRY_RUN`` both
+passes only log what they would delete.
+"""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import structlog
+from sqlalchemy import bindparam, text
+
+from app.core.config import settings
+from app.core.database import get_engine
+from app.core.metrics import IMAGE_GC_OBJECTS
+from app.services.image_render import VARIANTS
+from app.services.images import image_object_keys
+from app.services.storage import DELETE_BATCH_LIMIT, storage_service
+from app.services.uploads import IMAGE_TYPES
+
+logger = structlog.get_logger()
+
+# Any stable key works; it only has to be the same across workers
+_LOCK_KEY = 0x696D6763  # "imgc"
+
+# Claim and delete one batch of long-unreferenced images
+COLLECT_BATCH = text("""
+    DELETE FROM stored_images
+    WHERE id IN (
+        SELECT id FROM stored_images
+        WHERE ref_count <= 0 AND refs_changed_at < :cutoff
+        ORDER BY refs_changed_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING key, variants
+""")
+
+PREVIEW_BATCH = text("""
+    SELECT key, variants FROM stored_images
+    WHERE ref_count <= 0 AND refs_changed_at < :cutoff
+    ORDER BY refs_changed_at
+    LIMIT :batch_size
+""")
+
+KNOWN_KEYS = text(
+    "SELECT key FROM stored_images WHERE key IN :keys"
+).bindparams(bindparam("keys", expanding=True))
+
+
+def _dry_run(dry_run: bool | None) -> bool:
+    return settings.IMAGE_GC_DRY_RUN if dry_run is None else dry_run
+
+
+def _cutoff() -> datetime:
+    return datetime.now(UTC) - timedelta(hours=settings.IMAGE_GC_GRACE_HOURS)
+
+
+def _original_stem(key: str) -> str:
+    """Key without extension or variant suffix, shared by an image and its variants."""
+    stem = key.rsplit(".", 1)[0]
+    for name in VARIANTS:
+        if stem.endswith(f"_{name}"):
+            return stem[: -len(name) - 1]
+    return stem
+
+
+async def _delete(keys: list[str], source: str, dry_run: bool) -> int:
+    """Delete keys in rate-limited batches; returns how many were (or would be) removed."""
+    if dry_run:
+        if keys:
+            logger.info("image_gc_dry_run", source=source, count=len(keys), sample=keys[:20])
+        IMAGE_GC_OBJECTS.labels(source=source, mode="dry_run").inc(len(keys))
+        return len(keys)
+
+    deleted = 0
+    for start in range(0, len(keys), DELETE_BATCH_LIMIT):
+        batch = keys[start:start + DELETE_BATCH_LIMIT]
+        failed = await storage_service.delete_keys(batch)
+        if failed:
+            logger.warning("image_gc_delete_failed", source=source, failed=failed[:20])
+        removed = len(batch) - len(failed)
+        deleted += removed
+        IMAGE_GC_OBJECTS.labels(source=source, mode="deleted").inc(removed)
+        # Throttle so a large backlog does not hammer the storage backend
+        await asyncio.sleep(len(batch) / settings.IMAGE_GC_DELETES_PER_SECOND)
+    return deleted
+
+
+async def collect_unreferenced_images(dry_run: bool | None = None) -> int:
+    """Remove images unreferenced for longer than the grace period.
+
+    One transaction per batch of rows; objects are deleted after the rows, so
+    a failed object delete leaves an orphan for the sweep, never a row
+    pointing at a missing object. Returns the number of objects removed.
+    """
+    dry_run = _dry_run(dry_run)
+    params = {"cutoff": _cutoff(), "batch_size": settings.IMAGE_GC_BATCH_SIZE}
+
+    if dry_run:
+        async with get_engine().connect() as conn:
+            rows = (await conn.execute(PREVIEW_BATCH, params)).all()
+        keys = [k for key, variants in rows for k in image_object_keys(key, variants)]
+        return await _delete(keys, "unreferenced", dry_run)
+
+    total = 0
+    for _ in range(settings.IMAGE_GC_MAX_BATCHES):
+        async with get_engine().begin() as conn:
+            rows = (await conn.execute(COLLECT_BATCH, params)).all()
+        keys = [k for key, variants in rows for k in image_object_keys(key, variants)]
+        total += await _delete(keys, "unreferenced", dry_run)
+        if len(rows) < settings.IMAGE_GC_BATCH_SIZE:
+            break
+    return total
+
+
+async def sweep_orphaned_objects(dry_run: bool | None = None) -> int:
+    """Delete bucket objects under ``IMAGE_GC_PREFIX`` that no image row owns.
+
+    Only objects older than the grace period are considered, which covers
+    uploads whose row is not committed yet. Returns the number of objects
+    removed.
+    """
+    dry_run = _dry_run(dry_run)
+    cutoff = _cutoff()
+    extensions = set(IMAGE_TYPES.values())
+    total = 0
+
+    # Session-level lock on an autocommit connection: the listing can take
+    # minutes and must not hold a transaction open meanwhile
+    async with get_engine().connect() as lock_conn:
+        lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        locked = (
+            await lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _LOCK_KEY})
+        ).scalar()
+        if not locked:
+            return 0
+        try:
+            async for page in storage_service.list_objects(settings.IMAGE_GC_PREFIX):
+                old = [obj["Key"] for obj in page if obj["LastModified"] < cutoff]
+                if not old:
+                    continue
+                stems = {key: _original_stem(key) for key in old}
+                candidates = [
+                    f"{stem}.{ext}" for stem in set(stems.values()) for ext in extensions
+                ]
+                async with get_engine().connect() as conn:
+                    known = (await conn.execute(KNOWN_KEYS, {"keys": candidates})).scalars()
+                    known_stems = {_original_stem(key) for key in known}
+                orphans = [key for key, stem in stems.items() if stem not in known_stems]
+                total += await _delete(orphans, "orphaned", dry_run)
+        finally:
+            try:
+                await lock_conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY}
+                )
+            except BaseException:
+                # A connection still holding the lock must not go back to the pool
+                await lock_conn.invalidate()
+                raise
+
+    return total
+
+
+async def run_image_gc() -> None:
+    """Periodic job: collect images that lost their last reference."""
+    removed = await collect_unreferenced_images()
+    if removed:
+        logger.info("images_collected", objects=removed, dry_run=settings.IMAGE_GC_DRY_RUN)
+
+
+async def run_bucket_sweep() -> None:
+    """Periodic job: remove objects no image row owns."""
+    removed = await sweep_orphaned_objects()
+    if removed:
+        logger.info("orphaned_objects_swept", objects=removed, dry_run=settings.IMAGE_GC_DRY_RUN)
@@ -0,0 +1,59 @@
+"""Image decoding and resizing, executed in worker processes.
+
+Kept free of application imports so spawned workers start quickly.
+"""
+
+import base64
+import io
+
+# Variant name -> longest edge in pixels, largest first
+VARIANTS = {"full": 1280, "card": 480, "thumb": 150}
+PLACEHOLDER_EDGE = 16
+
+# EXIF Orientation tag, and the values that swap width and height
+ORIENTATION_TAG = 0x0112
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def render_variants(path: str, max_pixels: int, quality: int) -> dict | None:
+    """Decode an image once and encode every variant. Runs in a worker process.
+
+    Returns None for files Pillow cannot decode, so the original is still
+    usable without derivatives.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(path) as source:
+            # Full-size dimensions, taken before draft() shrinks the decode,
+            # and as displayed: orientations 5-8 rotate by 90 degrees
+            width, height = source.size
+            if source.getexif().get(ORIENTATION_TAG, 1) in ROTATED_ORIENTATIONS:
+                width, height = height, width
+            # JPEG can decode at a reduced scale, far cheaper than a full decode
+            source.draft("RGB", (VARIANTS["full"], VARIANTS["full"]))
+            image = ImageOps.exif_transpose(source)
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return None
+
+    # Each variant is resized from the previous one, not from the original
+    variants = {}
+    for name, edge in VARIANTS.items():
+        image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", quality=quality, method=4)
+        variants[name] = buffer.getvalue()
+
+    image.thumbnail((PLACEHOLDER_EDGE, PLACEHOLDER_EDGE), Image.Resampling.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, "WEBP", quality=30)
+    placeholder = "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+    return {
+        "width": width,
+        "height": height,
+        "variants": variants,
+        "placeholder": placeholder,
+    }
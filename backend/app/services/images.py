@@ -0,0 +1,212 @@
+"""Uploaded images: derivatives, deduplication and reference counting.
+
+Decoding and resizing are CPU-bound and hold the GIL, so they run on a
+process pool. The upload is spooled to a temp file as it streams to storage;
+the worker reads that file, so only the small encoded variants cross the
+process boundary.
+
+Images are deduplicated by SHA-256 of their bytes and reference-counted by
+listing image slots; ``app.services.image_gc`` removes unreferenced ones.
+"""
+
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import uuid
+from collections import Counter
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+import structlog
+from botocore.exceptions import BotoCoreError, ClientError
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_db_context
+from app.core.queries import (
+    STORED_IMAGES_BY_URL,
+    TOUCH_IMAGE_BY_SHA256,
+    TOUCH_OWN_IMAGE_BY_SHA256,
+)
+from app.models.image import StoredImage
+from app.models.listing import Listing
+from app.services.image_render import render_variants
+from app.services.storage import storage_service
+
+logger = structlog.get_logger()
+
+_executor: ProcessPoolExecutor | None = None
+
+
+class DuplicateImage(Exception):
+    """The uploaded bytes are already stored as ``image``."""
+
+    def __init__(self, image: StoredImage):
+        super().__init__(image.key)
+        self.image = image
+
+
+async def process_image(path: str) -> dict | None:
+    """Render variants for a spooled upload on the process pool."""
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that runs an event loop and I/O threads is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    loop = asyncio.get_running_loop()
+    rendered = await loop.run_in_executor(
+        _executor,
+        render_variants,
+        path,
+        settings.IMAGE_MAX_PIXELS,
+        settings.IMAGE_WEBP_QUALITY,
+    )
+    if rendered is None:
+        logger.warning("image_not_decodable", path=path)
+    return rendered
+
+
+@asynccontextmanager
+async def spooled_upload():
+    """Temp file path for a spooled upload, removed afterwards."""
+    fd, path = await asyncio.to_thread(tempfile.mkstemp, prefix="upload-")
+    os.close(fd)
+    try:
+        yield path
+    finally:
+        await asyncio.to_thread(os.unlink, path)
+
+
+async def tee_to_file(chunks: AsyncIterator[bytes], path: str) -> AsyncIterator[bytes]:
+    """Pass chunks through while appending them to ``path``."""
+    file = await asyncio.to_thread(open, path, "wb")
+    try:
+        async for chunk in chunks:
+            await asyncio.to_thread(file.write, chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(file.close)
+
+
+async def find_image(sha256: str, owner_id: uuid.UUID | None = None) -> StoredImage | None:
+    """Stored image with these contents, looked up in a short session.
+
+    Uploads run for seconds; holding the request's session across them would
+    pin a pooled connection for the whole transfer. A hit restarts the
+    image's grace period so the collector does not remove it while the
+    client is about to attach it to a listing. With ``owner_id`` only that
+    user's uploads match.
+    """
+    async with get_db_context() as db:
+        if owner_id is None:
+            result = await db.execute(TOUCH_IMAGE_BY_SHA256,
+    TOUCH_OWN_IMAGE_BY_SHA256, {"sha256": sha256})
+        else:
+            result = await db.execute(
+                TOUCH_OWN_IMAGE_BY_SHA256, {"sha256": sha256, "owner_id": owner_id}
+            )
+        return result.scalar_one_or_none()
+
+
+async def hashing_stream(
+    chunks: AsyncIterator[bytes], digest: "hashlib._Hash"
+) -> AsyncIterator[bytes]:
+    """Pass chunks through while feeding them to ``digest``."""
+    async for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+
+
+def variant_key(key: str, name: str) -> str:
+    """Storage key of a variant, next to the original."""
+    return f"{key.rsplit('.', 1)[0]}_{name}.webp"
+
+
+async def store_variants(key: str, rendered: dict) -> dict[str, str]:
+    """Upload rendered variants next to the original; returns name -> URL."""
+    keys = {name: variant_key(key, name) for name in rendered["variants"]}
+    await asyncio.gather(*(
+        storage_service.put_bytes(rendered["variants"][name], variant, "image/webp")
+        for name, variant in keys.items()
+    ))
+    return {name: storage_service.public_url(variant) for name, variant in keys.items()}
+
+
+async def swap_image_refs(
+    db: AsyncSession, old: list[str] | None, new: list[str] | None
+) -> None:
+    """Move references from a listing's old images to its new ones.
+
+    URLs that are not stored images (e.g. external links) are ignored. Images
+    left without references are not deleted here: the collector removes them
+    after a grace period, so a re-post shortly after a delete can reuse them.
+    """
+    counts = Counter(new or [])
+    counts.subtract(Counter(old or []))
+
+    # One UPDATE per distinct delta (normally just +1 and -1)
+    by_delta: dict[int, list[str]] = {}
+    for url, delta in counts.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(url)
+    for delta, urls in by_delta.items():
+        await db.execute(
+            update(StoredImage)
+            .where(StoredImage.url.in_(urls))
+            .values(ref_count=StoredImage.ref_count + delta, refs_changed_at=func.now())
+        )
+
+
+async def refresh_listing_images(
+    db: AsyncSession, listing: Listing, old_images: list[str] | None
+) -> None:
+    """Sync references and variant metadata after ``listing.images`` changed.
+
+    Variant URLs are copied into the listing's metadata so feed pages render
+    thumbnails without another query.
+    """
+    variants = {}
+    if listing.images:
+        result = await db.execute(STORED_IMAGES_BY_URL, {"urls": list(listing.images)})
+        variants = {
+            image.url: {
+                **image.variants,
+                "placeholder": image.placeholder,
+                "width": image.width,
+                "height": image.height,
+            }
+            for image in result.scalars()
+        }
+    listing.metadata_ = {**(listing.metadata_ or {}), "image_variants": variants}
+    await swap_image_refs(db, old_images, listing.images)
+
+
+def image_object_keys(key: str, variants: dict) -> list[str]:
+    """Storage keys of an original and its variants."""
+    return [key, *filter(None, map(storage_service.key_from_url, variants.values()))]
+
+
+async def delete_image_objects(removed: list[tuple[str, dict]]) -> None:
+    """Delete originals and variants of images no row points to any more."""
+    keys = [k for key, variants in removed for k in image_object_keys(key, variants)]
+    try:
+        failed = await storage_service.delete_keys(keys)
+    except (BotoCoreError, ClientError):
+        logger.exception("image_delete_failed", keys=len(keys))
+        return
+    if failed:
+        logger.warning("image_delete_incomplete", failed=failed)
+
+
+def shutdown_image_pool() -> None:
+    """Stop worker processes."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,356 @@
+"""Post-commit background jobs.
+
+Side effects that do not have to finish before the response (counters,
+notifications, fan-out) are enqueued inside the request's transaction and run
+after it commits::
+
+    @job_handler("users.listing_created")
+    async def count_listing(db: AsyncSession, payload: dict) -> None:
+        ...
+
+    await enqueue(db, "users.listing_created", {"user_id": str(user.id)})
+
+Handlers get their own session and the job is marked done in that same
+transaction, fenced by its attempt count so a worker whose lease ran out
+rolls back instead, so database side effects apply exactly once; anything outside
+the database (HTTP calls, Redis) is at-least-once and should be safe to
+repeat. Failed jobs are retried with exponential backoff up to
+``max_attempts``.
+
+Two backends, chosen by ``JOBS_BACKEND``:
+
+* ``db`` (default): a transactional outbox. Jobs are rows in ``jobs``;
+  workers started in the lifespan claim them with ``SKIP LOCKED`` under a
+  lease. A commit wakes the local workers immediately; other workers pick
+  jobs up on their next poll.
+* ``memory``: jobs are handed to an in-process queue when the transaction
+  commits and dropped if it rolls back. Nothing survives a restart; meant
+  for tests and local runs.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+import structlog
+from sqlalchemy import event, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_db_context, get_engine
+from app.core.metrics import JOB_DURATION, JOBS_PROCESSED
+from app.models.job import Job, JobStatus
+
+logger = structlog.get_logger()
+
+Handler = Callable[[AsyncSession, dict], Awaitable[None]]
+
+
+class LeaseLost(Exception):
+    """The job's lease expired and another worker claimed it."""
+
+
+# Session.info keys: jobs held until commit (memory backend), rows inserted (db backend)
+_PENDING_KEY = "pending_jobs"
+_ENQUEUED_KEY = "jobs_enqueued"
+
+CLAIM_JOBS = text("""
+    UPDATE jobs
+    SET status = 'running',
+        attempts = attempts + 1,
+        locked_until = now() + make_interval(secs => :lease)
+    WHERE id IN (
+        SELECT id FROM jobs
+        WHERE (status = 'pending' AND run_after <= now())
+           OR (status = 'running' AND locked_until < now())
+        ORDER BY run_after
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, kind, payload, attempts, max_attempts
+""")
+
+MARK_DONE = text("""
+    UPDATE jobs
+    SET status = 'done', locked_until = NULL, last_error = NULL, finished_at = now()
+    WHERE id = :id AND status = 'running' AND attempts = :attempts
+""")
+
+MARK_FAILED = text("""
+    UPDATE jobs
+    SET status = :status,
+        run_after = now() + make_interval(secs => :delay),
+        locked_until = NULL,
+        last_error = :error,
+        finished_at = CASE WHEN :final THEN now() END
+    WHERE id = :id AND status = 'running' AND attempts = :attempts
+""")
+
+PURGE_DONE = text("DELETE FROM jobs WHERE status = 'done' AND finished_at < :cutoff")
+
+
+@dataclass(frozen=True)
+class JobHandler:
+    """A registered job kind."""
+    fn: Handler
+    max_attempts: int
+    limit: asyncio.Semaphore | None
+
+
+@dataclass
+class QueuedJob:
+    """A claimed (or, in memory, queued) job."""
+    id: object
+    kind: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+
+
+_handlers: dict[str, JobHandler] = {}
+_wake = asyncio.Event()
+_memory_queue: asyncio.Queue[QueuedJob] | None = None
+_memory_keys: set[str] = set()
+
+
+def job_handler(
+    kind: str, max_attempts: int | None = None, concurrency: int | None = None
+) -> Callable[[Handler], Handler]:
+    """Register ``fn`` as the handler for ``kind``.
+
+    ``concurrency`` caps how many jobs of this kind run at once per worker,
+    on top of ``JOBS_CONCURRENCY``.
+    """
+    def decorator(fn: Handler) -> Handler:
+        _handlers[kind] = JobHandler(
+            fn=fn,
+            max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+            limit=asyncio.Semaphore(concurrency) if concurrency else None,
+        )
+        return fn
+
+    return decorator
+
+
+async def enqueue(
+    db: AsyncSession,
+    kind: str,
+    payload: dict,
+    idempotency_key: str | None = None,
+    run_after: datetime | None = None,
+) -> None:
+    """Add a job to ``db``'s transaction; it runs only if that transaction commits.
+
+    ``payload`` must be JSON-serializable. A job whose ``idempotency_key`` was
+    already enqueued is skipped.
+    """
+    handler = _handlers.get(kind)
+    if handler is None:
+        raise ValueError(f"No handler registered for job kind {kind!r}")
+
+    if settings.JOBS_BACKEND == "memory":
+        job = QueuedJob(None, kind, payload, 0, handler.max_attempts)
+        db.sync_session.info.setdefault(_PENDING_KEY, []).append((idempotency_key, job))
+        return
+
+    values = {
+        "kind": kind,
+        "payload": payload,
+        "idempotency_key": idempotency_key,
+        "max_attempts": handler.max_attempts,
+    }
+    if run_after is not None:
+        values["run_after"] = run_after
+    stmt = insert(Job).values(**values)
+    if idempotency_key is not None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["idempotency_key"])
+    await db.execute(stmt)
+    db.sync_session.info[_ENQUEUED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, [])
+    enqueued = session.info.pop(_ENQUEUED_KEY, False)
+    for key, job in pending:
+        if key is not None:
+            if key in _memory_keys:
+                continue
+            _memory_keys.add(key)
+        _get_memory_queue().put_nowait(job)
+    if pending or enqueued:
+        _wake.set()
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_ENQUEUED_KEY, None)
+
+
+def _get_memory_queue() -> asyncio.Queue[QueuedJob]:
+    global _memory_queue
+    if _memory_queue is None:
+        _memory_queue = asyncio.Queue()
+    return _memory_queue
+
+
+def _retry_delay(attempts: int) -> float:
+    return min(
+        settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+        settings.JOBS_RETRY_MAX_SECONDS,
+    )
+
+
+async def execute(job: QueuedJob) -> bool:
+    """Run one job and record the outcome; True if it succeeded."""
+    handler = _handlers.get(job.kind)
+    persistent = job.id is not None
+    if not persistent:
+        # Claiming counts attempts in the db backend
+        job.attempts += 1
+    start = time.perf_counter()
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind {job.kind!r}")
+        if job.attempts > job.max_attempts:
+            raise TimeoutError("Lease expired on the last attempt")
+        if handler.limit is not None:
+            await handler.limit.acquire()
+        try:
+            async with get_db_context() as db:
+                await handler.fn(db, job.payload)
+                if persistent:
+                    # ``attempts`` fences the lease: if another worker claimed
+                    # the job meanwhile, this transaction must not commit
+                    result = await db.execute(
+                        MARK_DONE, {"id": job.id, "attempts": job.attempts}
+                    )
+                    if result.rowcount == 0:
+                        raise LeaseLost(f"Job {job.id} was claimed by another worker")
+        finally:
+            if handler.limit is not None:
+                handler.limit.release()
+    except asyncio.CancelledError:
+        raise
+    except LeaseLost:
+        # The current holder records the outcome
+        logger.warning("job_lease_lost", kind=job.kind, job_id=str(job.id), attempts=job.attempts)
+        JOBS_PROCESSED.labels(kind=job.kind, result="lost").inc()
+        return False
+    except Exception as e:
+        final = handler is None or job.attempts >= job.max_attempts
+        outcome = "failed" if final else "retry"
+        logger.exception(
+            "job_failed", kind=job.kind, job_id=str(job.id), attempts=job.attempts, final=final
+        )
+        await _record_failure(job, final, repr(e))
+        JOBS_PROCESSED.labels(kind=job.kind, result=outcome).inc()
+        return False
+    finally:
+        JOB_DURATION.labels(kind=job.kind).observe(time.perf_counter() - start)
+
+    JOBS_PROCESSED.labels(kind=job.kind, result="done").inc()
+    return True
+
+
+async def _record_failure(job: QueuedJob, final: bool, error: str) -> None:
+    delay = 0.0 if final else _retry_delay(job.attempts)
+    if job.id is None:
+        if not final:
+            # Memory backend: requeue after the backoff
+            asyncio.get_running_loop().call_later(
+                delay, _get_memory_queue().put_nowait, job
+            )
+        return
+    try:
+        async with get_engine().begin() as conn:
+            await conn.execute(MARK_FAILED, {
+                "id": job.id,
+                "attempts": job.attempts,
+                "status": JobStatus.FAILED.value if final else JobStatus.PENDING.value,
+                "final": final,
+                "delay": delay,
+                "error": error[:2000],
+            })
+    except Exception:
+        # The lease expires and the job is retried anyway
+        logger.exception("job_failure_not_recorded", job_id=str(job.id))
+
+
+async def claim_jobs(limit: int) -> list[QueuedJob]:
+    """Lease up to ``limit`` due jobs to this worker."""
+    async with get_engine().begin() as conn:
+        rows = (await conn.execute(
+            CLAIM_JOBS, {"limit": limit, "lease": settings.JOBS_LEASE_SECONDS}
+        )).all()
+    return [QueuedJob(*row) for row in rows]
+
+
+async def _wait_for_work(timeout: float) -> None:
+    try:
+        await asyncio.wait_for(_wake.wait(), timeout)
+    except TimeoutError:
+        pass
+
+
+async def run_job_workers() -> None:
+    """Lifespan task: execute jobs until cancelled.
+
+    At most ``JOBS_CONCURRENCY`` jobs run at once. On cancellation running
+    jobs are cancelled too; in the ``db`` backend they run again after their
+    lease expires.
+    """
+    running: set[asyncio.Task] = set()
+
+    def start(job: QueuedJob) -> None:
+        task = asyncio.create_task(execute(job))
+        running.add(task)
+        task.add_done_callback(running.discard)
+        # A free slot may mean more jobs can be claimed
+        task.add_done_callback(lambda _: _wake.set())
+
+    try:
+        while True:
+            free = settings.JOBS_CONCURRENCY - len(running)
+            if free <= 0:
+                _wake.clear()
+                await _wait_for_work(settings.JOBS_POLL_SECONDS)
+                continue
+
+            if settings.JOBS_BACKEND == "memory":
+                start(await _get_memory_queue().get())
+                continue
+
+            _wake.clear()
+            try:
+                claimed = await claim_jobs(free)
+            except Exception:
+                logger.exception("job_claim_failed")
+                claimed = []
+            for job in claimed:
+                start(job)
+            if len(claimed) < free:
+                await _wait_for_work(settings.JOBS_POLL_SECONDS)
+    finally:
+        for task in running:
+            task.cancel()
+
+
+async def purge_finished_jobs() -> None:
+    """Periodic job: delete completed jobs past ``JOBS_RETENTION_HOURS``.
+
+    Idempotency keys only deduplicate while their row is kept. Failed jobs
+    stay for inspection.
+    """
+    if settings.JOBS_BACKEND != "db":
+        return
+    cutoff = datetime.now(UTC) - timedelta(hours=settings.JOBS_RETENTION_HOURS)
+    async with get_engine().begin() as conn:
+        result = await conn.execute(PURGE_DONE, {"cutoff": cutoff})
+    if result.rowcount:
+        logger.info("jobs_purged", count=result.rowcount)
@@ -0,0 +1,68 @@
+"""Side effects of listing writes, run as background jobs after commit."""
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.queries import FAVORITE_USER_IDS
+from app.models.listing import Listing
+from app.models.user import User
+from app.services import events
+from app.services.jobs import enqueue, job_handler
+
+LISTING_CREATED = "listings.created"
+LISTING_SOLD = "listings.sold"
+
+
+async def listing_created(db: AsyncSession, listing: Listing) -> None:
+    """Enqueue the side effects of a new listing (``listing.id`` must be set)."""
+    await enqueue(
+        db,
+        LISTING_CREATED,
+        {"user_id": str(listing.user_id)},
+        idempotency_key=f"{LISTING_CREATED}:{listing.id}",
+    )
+
+
+async def listing_sold(db: AsyncSession, listing: Listing) -> None:
+    """Enqueue the side effects of a listing being marked sold."""
+    await enqueue(
+        db,
+        LISTING_SOLD,
+        {
+            "listing_id": str(listing.id),
+            "user_id": str(listing.user_id),
+            "title": listing.title,
+        },
+        # A listing can be re-listed and sold again; each sale counts once
+        idempotency_key=f"{LISTING_SOLD}:{listing.id}:{listing.sold_at.timestamp()}",
+    )
+
+
+@job_handler(LISTING_CREATED)
+async def count_listing(db: AsyncSession, payload: dict) -> None:
+    """Bump the seller's listing counter."""
+    await db.execute(
+        update(User)
+        .where(User.id == payload["user_id"])
+        .values(total_listings=User.total_listings + 1)
+    )
+
+
+@job_handler(LISTING_SOLD)
+async def count_sale(db: AsyncSession, payload: dict) -> None:
+    """Bump the seller's sales counter and notify the seller and watchers."""
+    await db.execute(
+        update(User)
+        .where(User.id == payload["user_id"])
+        .values(total_sales=User.total_sales + 1)
+    )
+    result = await db.execute(FAVORITE_USER_IDS, {"listing_id": payload["listing_id"]})
+    watchers = result.scalars().all()
+    # Published before the job commits, so a retry can repeat it; the
+    # coalesce key collapses repeats that are read together
+    await events.publish_event(
+        [payload["user_id"], *watchers],
+        events.LISTING_SOLD,
+        {"listing_id": payload["listing_id"], "title": payload["title"]},
+        coalesce_key=f"sold:{payload['listing_id']}",
+    )
@@ -0,0 +1,145 @@
+"""Bot notifications for marketplace events.
+
+Request handlers enqueue a job in their transaction; the job looks up the
+recipient and adds a line to their digest (``app.bot.dispatcher``), which
+goes out batched and rate-limited. Users can opt out with
+``settings.notifications = false``.
+"""
+
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.bot.dispatcher import escape, queue_notification
+from app.core.config import settings
+from app.core.database import get_db_context
+from app.core.queries import EXPIRING_LISTINGS, LISTING_DETAIL
+from app.models.chat import Chat, Message
+from app.models.listing import Listing, ListingStatus
+from app.models.user import User
+from app.services.jobs import enqueue, job_handler
+
+CHAT_MESSAGE = "notify.chat_message"
+LISTING_FAVORITED = "notify.listing_favorited"
+LISTING_EXPIRING = "notify.listing_expiring"
+
+
+def wants_notifications(user: User | None) -> bool:
+    """Whether a user can and wants to get bot messages."""
+    return bool(
+        user
+        and user.is_active
+        and not user.is_banned
+        and (user.settings or {}).get("notifications", True)
+    )
+
+
+# --- Enqueue (inside the request's transaction) ---
+
+async def chat_message(
+    db: AsyncSession, chat: Chat, message: Message, recipient_id: uuid.UUID
+) -> None:
+    """Tell the recipient about a new chat message."""
+    if not settings.BOT_TOKEN:
+        return
+    await enqueue(db, CHAT_MESSAGE, {
+        "chat_id": str(chat.id),
+        "sender_id": str(message.sender_id),
+        "recipient_id": str(recipient_id),
+        "preview": chat.last_message_preview,
+    })
+
+
+async def listing_favorited(db: AsyncSession, listing: Listing) -> None:
+    """Tell the seller their listing was saved."""
+    if not settings.BOT_TOKEN:
+        return
+    await enqueue(db, LISTING_FAVORITED, {
+        "listing_id": str(listing.id),
+        "user_id": str(listing.user_id),
+        "title": listing.title,
+    })
+
+
+# --- Handlers ---
+
+@job_handler(CHAT_MESSAGE)
+async def notify_chat_message(db: AsyncSession, payload: dict) -> None:
+    """Add a chat message to the recipient's digest, one line per chat."""
+    recipient = await db.get(User, uuid.UUID(payload["recipient_id"]))
+    if not wants_notifications(recipient):
+        return
+    sender = await db.get(User, uuid.UUID(payload["sender_id"]))
+    name = escape(sender.display_name) if sender else "Someone"
+    await queue_notification(
+        recipient.telegram_id,
+        f"💬 <b>{name}</b>: {escape(payload['preview'] or '')}",
+        key=f"chat:{payload['chat_id']}",
+    )
+
+
+@job_handler(LISTING_FAVORITED)
+async def notify_listing_favorited(db: AsyncSession, payload: dict) -> None:
+    """Add a favorite to the seller's digest, one line per listing."""
+    seller = await db.get(User, uuid.UUID(payload["user_id"]))
+    if not wants_notifications(seller):
+        return
+    await queue_notification(
+        seller.telegram_id,
+        f"❤️ Someone saved <b>{escape(payload['title'])}</b>",
+        key=f"favorited:{payload['listing_id']}",
+    )
+
+
+@job_handler(LISTING_EXPIRING)
+async def notify_listing_expiring(db: AsyncSession, payload: dict) -> None:
+    """Remind the seller of a listing that is about to expire."""
+    result = await db.execute(LISTING_DETAIL, {"listing_id": uuid.UUID(payload["listing_id"])})
+    listing = result.scalar_one_or_none()
+    # Renewed, sold or removed since the scan
+    if not listing or listing.status != ListingStatus.ACTIVE or not listing.expires_at:
+        return
+    if listing.expires_at > datetime.now(UTC) + timedelta(hours=settings.NOTIFY_EXPIRY_HOURS):
+        return
+    if not wants_notifications(listing.user):
+        return
+    await queue_notification(
+        listing.user.telegram_id,
+        f"⏳ <b>{escape(listing.title)}</b> expires {listing.expires_at:%b %d}. "
+        "Renew it to keep it visible.",
+        key=f"expiring:{listing.id}",
+    )
+
+
+async def scan_expiring_listings() -> None:
+    """Periodic job: enqueue one reminder per listing about to expire.
+
+    Pages through the whole window, so every listing in it is reached on
+    each scan. The idempotency key includes the expiry date, so each
+    listing is reminded once per expiry even though every scan sees it again.
+    """
+    if not settings.BOT_TOKEN:
+        return
+    now = datetime.now(UTC)
+    params = {
+        "after_expires_at": now,
+        # Sorts before every id, so the first page starts right at ``now``
+        "after_id": uuid.UUID(int=0),
+        "until": now + timedelta(hours=settings.NOTIFY_EXPIRY_HOURS),
+        "limit": settings.NOTIFY_BATCH_SIZE * 10,
+    }
+    while True:
+        # One transaction per page
+        async with get_db_context() as db:
+            rows = (await db.execute(EXPIRING_LISTINGS, params)).all()
+            for listing_id, expires_at in rows:
+                await enqueue(
+                    db,
+                    LISTING_EXPIRING,
+                    {"listing_id": str(listing_id)},
+                    idempotency_key=f"{LISTING_EXPIRING}:{listing_id}:{expires_at:%Y-%m-%d}",
+                )
+        if len(rows) < params["limit"]:
+            return
+        params["after_expires_at"], params["after_id"] = rows[-1]
@@ -0,0 +1,156 @@
+"""Monthly partition maintenance for the messages table."""
+
+from datetime import UTC, date, datetime
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.core.database import get_engine
+
+logger = structlog.get_logger()
+
+PARENT_TABLE = "messages"
+ARCHIVE_SCHEMA = "archive"
+PARTITION_PREFIX = f"{PARENT_TABLE}_p"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+
+# Any stable key works; it only has to be the same across workers
+_LOCK_KEY = 0x6D736770  # "msgp"
+
+
+def add_months(month: date, n: int) -> date:
+    """First day of the month ``n`` months after ``month``."""
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Partition table name for a month, e.g. ``messages_p2024_03``."""
+    return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def partition_month(name: str) -> date | None:
+    """Parse the month back out of a partition name."""
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        year, month = name[len(PARTITION_PREFIX):].split("_")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+async def list_partitions(conn: AsyncConnection) -> list[str]:
+    """Names of partitions currently attached to the messages table."""
+    result = await conn.execute(
+        text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+        """),
+        {"parent": PARENT_TABLE},
+    )
+    return [row[0] for row in result]
+
+
+async def _create_partition(conn: AsyncConnection, month: date) -> None:
+    """Create one month's partition, moving its rows out of the default partition.
+
+    Postgres refuses to create a partition whose range has rows in the
+    default partition, so the default is detached while they are moved.
+    """
+    name = partition_name(month)
+    bounds = {"lo": month, "hi": add_months(month, 1)}
+    stray = (await conn.execute(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+            "WHERE created_at >= :lo AND created_at < :hi)"
+        ),
+        bounds,
+    )).scalar()
+    if stray:
+        await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    await conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') "
+        f"TO ('{add_months(month, 1).isoformat()}')"
+    ))
+    if stray:
+        moved = await conn.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE created_at >= :lo AND created_at < :hi RETURNING *) "
+                f"INSERT INTO {PARENT_TABLE} SELECT * FROM moved"
+            ),
+            bounds,
+        )
+        await conn.execute(
+            text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+        )
+        logger.info("message_partition_rows_moved", partition=name, rows=moved.rowcount)
+
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: int) -> list[str]:
+    """Create partitions for the current month and ``months_ahead`` after it.
+
+    Each month runs in its own savepoint; a failure is logged and the
+    remaining months are still tried.
+    """
+    existing = set(await list_partitions(conn))
+    current = datetime.now(UTC).date().replace(day=1)
+    created = []
+    for n in range(months_ahead + 1):
+        month = add_months(current, n)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        try:
+            async with conn.begin_nested():
+                await _create_partition(conn, month)
+        except Exception:
+            logger.exception("message_partition_create_failed", partition=name)
+            continue
+        created.append(name)
+    return created
+
+
+async def detach_old_partitions(conn: AsyncConnection, retain_months: int) -> list[str]:
+    """Detach partitions older than the retention window into the archive schema.
+
+    Detached tables keep their data and can be dumped or dropped independently,
+    without vacuuming or index bloat on the live table.
+    """
+    cutoff = add_months(datetime.now(UTC).date().replace(day=1), -retain_months)
+    detached = []
+    for name in await list_partitions(conn):
+        month = partition_month(name)
+        if month is None or month >= cutoff:
+            continue
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        detached.append(name)
+    return detached
+
+
+async def maintain_message_partitions() -> None:
+    """Create upcoming partitions and archive expired ones.
+
+    Runs under a transaction-scoped advisory lock so only one worker does the
+    DDL at a time.
+    """
+    async with get_engine().begin() as conn:
+        locked = (
+            await conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+        ).scalar()
+        if not locked:
+            return
+        created = await ensure_partitions(conn, settings.MESSAGES_PARTITIONS_AHEAD)
+        detached = await detach_old_partitions(conn, settings.MESSAGES_RETENTION_MONTHS)
+
+    if created or detached:
+        logger.info("message_partitions_maintained", created=created, detached=detached)
@@ -0,0 +1,217 @@
+"""Personalized ("for you") feed ranking.
+
+A user's preferences are summarized as an ``Affinity``: how much they care
+about each category and what price range they look at, learned from their
+favorites and their recent listing views (kept in Redis by
+``record_feed_view``). Affinities are cached per worker for
+``FEED_AFFINITY_TTL_SECONDS``.
+
+Ranking pulls the newest ``FEED_RANK_CANDIDATES`` listings matching the
+feed filters in one query and scores them all at once with NumPy::
+
+    score = 3.0 * category affinity (0..1)
+          + 2.0 * recency (halves every FEED_RECENCY_HALF_LIFE_HOURS)
+          + 1.0 * price fit (1 at the user's usual price, falling off in log space)
+          + 0.5 * seller rating / 5
+          + 0.5 if featured
+
+Users without history get recency, rating and featured only.
+"""
+
+import math
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.core.queries import FAVORITE_PROFILE, feed_candidates_query
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+AFFINITY_WEIGHT = 3.0
+RECENCY_WEIGHT = 2.0
+PRICE_WEIGHT = 1.0
+RATING_WEIGHT = 0.5
+FEATURED_WEIGHT = 0.5
+
+# A favorite says more than a view; older views count less
+FAVORITE_SIGNAL = 3.0
+VIEW_SIGNAL = 1.0
+VIEW_DECAY = 0.95
+
+# Floor for the spread of a user's prices (in log space), so one
+# favorite does not make every other price score zero
+MIN_PRICE_SIGMA = 0.5
+
+
+@dataclass(frozen=True)
+class Affinity:
+    """What a user tends to look at."""
+    categories: dict[str, float]  # category id -> weight, the top one is 1
+    log_price: float | None
+    log_price_sigma: float
+
+    @property
+    def empty(self) -> bool:
+        return not self.categories
+
+
+NO_AFFINITY = Affinity({}, None, MIN_PRICE_SIGMA)
+
+
+# --- View history ---
+
+def view_history_key(telegram_id: int) -> str:
+    return f"feed:views:{telegram_id}"
+
+
+async def record_feed_view(telegram_id: int, category_id: str, price: float) -> None:
+    """Remember a listing view for ranking; at most ``FEED_VIEW_HISTORY`` are kept."""
+    key = view_history_key(telegram_id)
+    async with get_redis().pipeline(transaction=False) as pipe:
+        pipe.lpush(key, f"{category_id}|{price}")
+        pipe.ltrim(key, 0, settings.FEED_VIEW_HISTORY - 1)
+        pipe.expire(key, settings.FEED_VIEW_HISTORY_TTL_SECONDS)
+        await pipe.execute()
+
+
+async def _recent_views(telegram_id: int) -> list[tuple[str, float]]:
+    try:
+        raw = await get_redis().lrange(view_history_key(telegram_id), 0, -1)
+    except Exception:
+        logger.warning("feed_view_history_unavailable", exc_info=True)
+        return []
+    views = []
+    for entry in raw:
+        category_id, _, price = entry.partition("|")
+        views.append((category_id, float(price)))
+    return views
+
+
+# --- Affinity ---
+
+def build_affinity(
+    favorites: list[tuple[str, float]], views: list[tuple[str, float]]
+) -> Affinity:
+    """Combine favorites and views (newest first) into an ``Affinity``."""
+    signals = [(category_id, price, FAVORITE_SIGNAL) for category_id, price in favorites]
+    signals += [
+        (category_id, price, VIEW_SIGNAL * VIEW_DECAY ** i)
+        for i, (category_id, price) in enumerate(views)
+    ]
+    if not signals:
+        return NO_AFFINITY
+
+    categories: dict[str, float] = {}
+    for category_id, _, weight in signals:
+        categories[category_id] = categories.get(category_id, 0.0) + weight
+    top = max(categories.values())
+
+    total = sum(weight for _, _, weight in signals)
+    logs = [(math.log(max(price, 1.0)), weight) for _, price, weight in signals]
+    mean = sum(value * weight for value, weight in logs) / total
+    variance = sum(weight * (value - mean) ** 2 for value, weight in logs) / total
+    return Affinity(
+        categories={category_id: weight / top for category_id, weight in categories.items()},
+        log_price=mean,
+        log_price_sigma=max(math.sqrt(variance), MIN_PRICE_SIGMA),
+    )
+
+
+class AffinityCache:
+    """Per-worker TTL cache of affinities, least recently used evicted first."""
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._entries: OrderedDict[int, tuple[float, Affinity]] = OrderedDict()
+
+    def get(self, telegram_id: int) -> Affinity | None:
+        entry = self._entries.get(telegram_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        self._entries.move_to_end(telegram_id)
+        return entry[1]
+
+    def put(self, telegram_id: int, affinity: Affinity) -> None:
+        self._entries[telegram_id] = (
+            time.monotonic() + settings.FEED_AFFINITY_TTL_SECONDS, affinity
+        )
+        self._entries.move_to_end(telegram_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+    def discard(self, telegram_id: int) -> None:
+        self._entries.pop(telegram_id, None)
+
+
+affinity_cache = AffinityCache(settings.FEED_AFFINITY_MAX_USERS)
+
+
+async def get_affinity(db: AsyncSession, telegram_id: int) -> Affinity:
+    """The user's affinity, from the cache or their favorites and views."""
+    affinity = affinity_cache.get(telegram_id)
+    record_cache("feed_affinity", hit=affinity is not None)
+    if affinity is not None:
+        return affinity
+
+    result = await db.execute(FAVORITE_PROFILE, {
+        "telegram_id": telegram_id,
+        "limit": settings.FEED_AFFINITY_FAVORITES,
+    })
+    favorites = [(str(category_id), price) for category_id, price in result.all()]
+    affinity = build_affinity(favorites, await _recent_views(telegram_id))
+    affinity_cache.put(telegram_id, affinity)
+    return affinity
+
+
+# --- Ranking ---
+
+def score_candidates(rows: list[tuple], affinity: Affinity, now: float) -> list[uuid.UUID]:
+    """Candidate ids ordered by score, best first.
+
+    ``rows`` are ``(id, category_id, price, created_epoch, is_featured,
+    seller_rating)``, newest first; ties keep that order.
+    """
+    # Imported here to keep it off the startup path
+    import numpy as np
+
+    if not rows:
+        return []
+    ids, category_ids, prices, created, featured, ratings = zip(*rows)
+    prices = np.asarray(prices, dtype=np.float64)
+    created = np.asarray(created, dtype=np.float64)
+
+    age_hours = np.maximum(now - created, 0.0) / 3600
+    score = RECENCY_WEIGHT * np.exp2(-age_hours / settings.FEED_RECENCY_HALF_LIFE_HOURS)
+    score += RATING_WEIGHT * np.asarray(ratings, dtype=np.float64) / 5
+    score += FEATURED_WEIGHT * np.asarray(featured, dtype=bool)
+
+    if not affinity.empty:
+        # One dictionary lookup per distinct category, not per listing
+        categories, index = np.unique(
+            np.asarray(category_ids, dtype=object), return_inverse=True
+        )
+        weights = np.array([affinity.categories.get(str(c), 0.0) for c in categories])
+        score += AFFINITY_WEIGHT * weights[index]
+        z = (np.log(np.maximum(prices, 1.0)) - affinity.log_price) / affinity.log_price_sigma
+        score += PRICE_WEIGHT * np.exp(-0.5 * z * z)
+
+    order = np.argsort(-score, kind="stable")
+    return np.asarray(ids, dtype=object)[order].tolist()
+
+
+async def rank_feed(
+    db: AsyncSession, telegram_id: int | None, **filters
+) -> list[uuid.UUID]:
+    """Ids of the candidate listings matching ``filters``, best first for this user."""
+    affinity = await get_affinity(db, telegram_id) if telegram_id else NO_AFFINITY
+    result = await db.execute(
+        feed_candidates_query(**filters, limit=settings.FEED_RANK_CANDIDATES)
+    )
+    return score_candidates(result.all(), affinity, time.time())
@@ -0,0 +1,236 @@
+"""In-memory index for "similar listings".
+
+Each active listing is a TF-IDF vector over hashed features of its title
+(words and character trigrams, which also match Amharic word forms),
+description and category. Rows are L2-normalized, so a sparse matrix
+product gives cosine similarity to every listing at once; the matrix is
+kept transposed (feature -> listings) so a query only touches the listings
+that share a feature with it.
+
+Every worker keeps its own copy. ``rebuild_similar_index`` reloads all
+active listings and recomputes IDF; ``refresh_similar_index`` applies
+listings changed since the last poll in between. Both build a new snapshot
+off the event loop and swap it in, so queries never wait on them and never
+touch Postgres.
+"""
+
+import asyncio
+import re
+import zlib
+from dataclasses import dataclass, replace
+from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import structlog
+
+from app.core.config import settings
+from app.core.database import get_db_context
+from app.core.metrics import SIMILAR_INDEX_LISTINGS
+from app.core.queries import CATEGORIES_ALL, LISTINGS_CHANGED_SINCE, SIMILAR_INDEX_SOURCE
+from app.models.listing import Listing, ListingStatus
+
+if TYPE_CHECKING:
+    from app.services.similarity_matrix import Snapshot
+
+logger = structlog.get_logger()
+
+# Hashed feature space; collisions are rare enough not to matter for ranking
+N_FEATURES = 2 ** 18
+
+TITLE_WORD_WEIGHT = 3.0
+TITLE_TRIGRAM_WEIGHT = 1.0
+DESCRIPTION_WORD_WEIGHT = 1.0
+CATEGORY_WEIGHT = 3.0
+
+# Only the start of long descriptions is indexed
+DESCRIPTION_CHARS = 1000
+
+# Polls look back this far so rows committed late are not missed
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Lowercased words of two or more characters."""
+    return [w for w in WORD.findall((text or "").lower()) if len(w) > 1]
+
+
+@lru_cache(maxsize=2 ** 17)
+def feature_id(token: str) -> int:
+    # crc32, unlike hash(), is the same in every worker
+    return zlib.crc32(token.encode()) & (N_FEATURES - 1)
+
+
+def listing_features(
+    title: str, description: str | None, category_tokens: list[str]
+) -> list[tuple[int, float]]:
+    """Weighted hashed features of one listing; repeated features are summed later."""
+    feats = []
+    for word in tokenize(title):
+        feats.append((feature_id(f"w:{word}"), TITLE_WORD_WEIGHT))
+        padded = f"^{word}$"
+        feats.extend(
+            (feature_id(f"c:{padded[i:i + 3]}"), TITLE_TRIGRAM_WEIGHT)
+            for i in range(len(padded) - 2)
+        )
+    feats.extend(
+        (feature_id(f"w:{word}"), DESCRIPTION_WORD_WEIGHT)
+        for word in tokenize((description or "")[:DESCRIPTION_CHARS])
+    )
+    feats.extend((feature_id(f"k:{token}"), CATEGORY_WEIGHT) for token in category_tokens)
+    return feats
+
+
+def listing_card(listing: Listing) -> dict:
+    """Fields of ``ListingResponse`` kept in the index; no description or seller."""
+    variants = (listing.metadata_ or {}).get("image_variants", {})
+    return {
+        "id": str(listing.id),
+        "title": listing.title,
+        "description": None,
+        "price": listing.price,
+        "currency": listing.currency,
+        "is_negotiable": listing.is_negotiable,
+        "condition": listing.condition.value,
+        "images": listing.images or [],
+        "image_variants": [{"url": url, **variants.get(url, {})} for url in listing.images or []],
+        "city": listing.city,
+        "area": listing.area,
+        "status": listing.status.value,
+        "views_count": listing.views_count,
+        "favorites_count": listing.favorites_count,
+        "is_featured": listing.is_featured,
+        "created_at": listing.created_at.isoformat(),
+        "category_id": str(listing.category_id),
+    }
+
+
+@dataclass(frozen=True)
+class Document:
+    """A listing reduced to what the index needs."""
+    id: str
+    features: list[tuple[int, float]]
+    city: str
+    price: float
+    card: dict
+
+
+def to_document(listing: Listing, categories: dict[str, list[str]]) -> Document:
+    category_id = str(listing.category_id)
+    return Document(
+        id=str(listing.id),
+        features=listing_features(
+            listing.title, listing.description, [category_id, *categories.get(category_id, [])]
+        ),
+        city=listing.city,
+        price=listing.price,
+        card=listing_card(listing),
+    )
+
+
+def build_snapshot(docs: list[Document], synced_until: datetime) -> "Snapshot":
+    """Run in a thread; the first call also imports NumPy and SciPy."""
+    from app.services.similarity_matrix import Snapshot
+
+    return Snapshot.build(docs, synced_until)
+
+
+class SimilarityIndex:
+    """The current snapshot and the jobs that replace it."""
+
+    def __init__(self):
+        self.snapshot: "Snapshot | None" = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.snapshot is not None
+
+    def similar(
+        self, listing_id: str, limit: int, same_city: bool = True, price_band: float = 0.0
+    ) -> list[tuple[dict, float]]:
+        """Most similar active listings; empty until the first build."""
+        if self.snapshot is None:
+            return []
+        return self.snapshot.similar([listing_id], limit, same_city, price_band)[0]
+
+    async def rebuild(self) -> None:
+        """Reload every active listing and recompute IDF."""
+        async with self._lock:
+            started = datetime.now(UTC)
+            async with get_db_context() as db:
+                categories = await _category_tokens(db)
+                result = await db.execute(
+                    SIMILAR_INDEX_SOURCE, {"limit": settings.SIMILAR_MAX_LISTINGS}
+                )
+                listings = result.scalars().all()
+                # Tokenizing is CPU work: off the event loop, before the rows expire
+                docs = await asyncio.to_thread(
+                    lambda: [to_document(listing, categories) for listing in listings]
+                )
+
+            snapshot = await asyncio.to_thread(build_snapshot, docs, started)
+            self.snapshot = snapshot
+            SIMILAR_INDEX_LISTINGS.set(snapshot.live)
+            logger.info(
+                "similar_index_built",
+                listings=snapshot.live,
+                seconds=round((datetime.now(UTC) - started).total_seconds(), 2),
+            )
+
+    async def refresh(self) -> None:
+        """Apply listings changed since the last build or refresh."""
+        if self.snapshot is None or self._lock.locked():
+            return
+        async with self._lock:
+            snapshot = self.snapshot
+            started = datetime.now(UTC)
+            async with get_db_context() as db:
+                result = await db.execute(
+                    LISTINGS_CHANGED_SINCE, {"since": snapshot.synced_until - REFRESH_OVERLAP}
+                )
+                changed = result.scalars().all()
+                if not changed:
+                    self.snapshot = replace(snapshot, synced_until=started)
+                    return
+                categories = await _category_tokens(db)
+                # Off the event loop like the rebuild, before the rows expire
+                upserts = await asyncio.to_thread(lambda: [
+                    to_document(listing, categories)
+                    for listing in changed
+                    if listing.status == ListingStatus.ACTIVE
+                ])
+                removed = {
+                    str(listing.id) for listing in changed
+                    if listing.status != ListingStatus.ACTIVE
+                }
+
+            self.snapshot = await asyncio.to_thread(snapshot.apply, upserts, removed, started)
+            SIMILAR_INDEX_LISTINGS.set(self.snapshot.live)
+
+
+async def _category_tokens(db) -> dict[str, list[str]]:
+    """Category id -> words of its English and Amharic names."""
+    result = await db.execute(CATEGORIES_ALL)
+    return {
+        str(category.id): tokenize(f"{category.name_en} {category.name_am}")
+        for category in result.scalars().all()
+    }
+
+
+# Singleton
+similarity_index = SimilarityIndex()
+
+
+async def rebuild_similar_index() -> None:
+    """Periodic job: full rebuild, which also drops archived listings."""
+    if settings.SIMILAR_ENABLED:
+        await similarity_index.rebuild()
+
+
+async def refresh_similar_index() -> None:
+    """Periodic job: apply recent listing changes."""
+    if settings.SIMILAR_ENABLED:
+        await similarity_index.refresh()
@@ -0,0 +1,167 @@
+"""Sparse TF-IDF snapshot behind ``app.services.similarity``.
+
+Kept apart because it needs NumPy and SciPy: it is imported on the first
+index build, off the event loop, instead of at startup.
+"""
+
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import numpy as np
+from scipy import sparse
+
+from app.services.similarity import N_FEATURES, Document
+
+
+def term_matrix(docs: list[Document]) -> sparse.csr_matrix:
+    """Rows of sublinear term weights (1 + log w), one per document."""
+    rows, cols, vals = [], [], []
+    for i, doc in enumerate(docs):
+        for col, weight in doc.features:
+            rows.append(i)
+            cols.append(col)
+            vals.append(weight)
+    matrix = sparse.csr_matrix(
+        (np.array(vals, dtype=np.float32), (rows, cols)),
+        shape=(len(docs), N_FEATURES),
+    )
+    # Duplicates are summed on construction
+    matrix.sum_duplicates()
+    matrix.data = 1.0 + np.log(matrix.data)
+    return matrix
+
+
+def weigh(terms: sparse.csr_matrix, idf: np.ndarray) -> sparse.csr_matrix:
+    """Apply IDF and L2-normalize rows, so dot products are cosines."""
+    matrix = terms.copy()
+    matrix.data *= idf[matrix.indices]
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags((1.0 / norms).astype(np.float32)) @ matrix
+
+
+@dataclass
+class Snapshot:
+    """Immutable once published; updates build a new one."""
+    vectors: sparse.csr_matrix  # listings x features
+    postings: sparse.csr_matrix  # features x listings
+    idf: np.ndarray
+    ids: list[str]
+    row_of: dict[str, int]
+    alive: np.ndarray
+    city: np.ndarray  # city code per row
+    city_codes: dict[str, int]
+    price: np.ndarray
+    cards: list[dict]
+    built_at: datetime
+    synced_until: datetime
+    live: int
+
+    @classmethod
+    def build(cls, docs: list[Document], synced_until: datetime) -> "Snapshot":
+        terms = term_matrix(docs)
+        # Smoothed IDF; document frequency counts each feature once per row
+        df = np.bincount(terms.indices, minlength=N_FEATURES)
+        idf = (np.log((1 + len(docs)) / (1 + df)) + 1).astype(np.float32)
+        vectors = weigh(terms, idf)
+        city_codes: dict[str, int] = {}
+        return cls(
+            vectors=vectors,
+            postings=vectors.T.tocsr(),
+            idf=idf,
+            ids=[doc.id for doc in docs],
+            row_of={doc.id: i for i, doc in enumerate(docs)},
+            alive=np.ones(len(docs), dtype=bool),
+            city=np.array(
+                [city_codes.setdefault(doc.city, len(city_codes)) for doc in docs],
+                dtype=np.int32,
+            ),
+            city_codes=city_codes,
+            price=np.array([doc.price for doc in docs], dtype=np.float64),
+            cards=[doc.card for doc in docs],
+            built_at=datetime.now(UTC),
+            synced_until=synced_until,
+            live=len(docs),
+        )
+
+    def apply(
+        self, upserts: list[Document], removed: set[str], synced_until: datetime
+    ) -> "Snapshot":
+        """New snapshot with changed listings appended and stale rows masked.
+
+        IDF stays as computed at the last rebuild.
+        """
+        alive = self.alive.copy()
+        for listing_id in removed | {doc.id for doc in upserts}:
+            row = self.row_of.get(listing_id)
+            if row is not None:
+                alive[row] = False
+
+        base = len(self.ids)
+        city_codes = dict(self.city_codes)
+        vectors = sparse.vstack(
+            [self.vectors, weigh(term_matrix(upserts), self.idf)], format="csr"
+        ) if upserts else self.vectors
+        row_of = dict(self.row_of)
+        for i, doc in enumerate(upserts):
+            row_of[doc.id] = base + i
+        for listing_id in removed:
+            row_of.pop(listing_id, None)
+        alive = np.concatenate([alive, np.ones(len(upserts), dtype=bool)])
+
+        return Snapshot(
+            vectors=vectors,
+            postings=vectors.T.tocsr() if upserts else self.postings,
+            idf=self.idf,
+            ids=self.ids + [doc.id for doc in upserts],
+            row_of=row_of,
+            alive=alive,
+            city=np.concatenate([self.city, np.array(
+                [city_codes.setdefault(doc.city, len(city_codes)) for doc in upserts],
+                dtype=np.int32,
+            )]),
+            city_codes=city_codes,
+            price=np.concatenate([self.price, [doc.price for doc in upserts]]),
+            cards=self.cards + [doc.card for doc in upserts],
+            built_at=self.built_at,
+            synced_until=synced_until,
+            live=int(alive.sum()),
+        )
+
+    def similar(
+        self, listing_ids: list[str], limit: int, same_city: bool, price_band: float
+    ) -> list[list[tuple[dict, float]]]:
+        """Top ``limit`` (card, score) pairs for each listing, in one matrix product.
+
+        ``price_band`` keeps prices within a factor of ``1 + price_band`` of
+        the listing's (0 disables it). Unknown listings get no results.
+        """
+        rows = [self.row_of.get(listing_id) for listing_id in listing_ids]
+        known = [row for row in rows if row is not None]
+        results: dict[int, list[tuple[dict, float]]] = {}
+        if known:
+            queries = self.vectors[known]
+            # Only the posting lists of the queries' own features are read
+            features = np.unique(queries.indices)
+            scores = self.postings[features].T @ queries[:, features].toarray().T
+            for i, row in enumerate(known):
+                results[row] = self._top(row, scores[:, i], limit, same_city, price_band)
+        return [results.get(row, []) if row is not None else [] for row in rows]
+
+    def _top(
+        self, row: int, scores: np.ndarray, limit: int, same_city: bool, price_band: float
+    ) -> list[tuple[dict, float]]:
+        keep = self.alive & (scores > 0)
+        keep[row] = False
+        if same_city:
+            keep &= self.city == self.city[row]
+        if price_band > 0:
+            keep &= self.price >= self.price[row] / (1 + price_band)
+            keep &= self.price <= self.price[row] * (1 + price_band)
+        candidates = np.flatnonzero(keep)
+        values = scores[candidates]
+        if len(candidates) > limit:
+            best = np.argpartition(-values, limit)[:limit]
+            candidates, values = candidates[best], values[best]
+        order = np.argsort(-values)
+        return [(self.cards[candidates[i]], float(values[i])) for i in order]
@@ -1,55 +1,144 @@
-"""S3/MinIO storage service."""
+"""S3/MinIO storage service.
 
+boto3 is synchronous, so every network call runs on a bounded thread pool
+instead of the event loop. All threads share one client and therefore one
+urllib3 connection pool, sized by ``S3_MAX_POOL_CONNECTIONS`` and kept alive
+between requests.
+"""
+
+import asyncio
+import json
+import time
 import uuid
-from datetime import timedelta
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-import boto3
-from botocore.config import Config
+import structlog
+from botocore.exceptions import BotoCoreError, ClientError
 
 from app.core.config import settings
+from app.core.metrics import STORAGE_ERRORS, STORAGE_IN_FLIGHT, STORAGE_LATENCY
+
+logger = structlog.get_logger()
+
+# Maximum keys per DeleteObjects request
+DELETE_BATCH_LIMIT = 1000
+
+
+def _build_client():
+    """S3 client for the configured backend."""
+    if settings.S3_BACKEND == "memory":
+        from app.services.storage_memory import InMemoryS3Client
+
+        return InMemoryS3Client(endpoint_url=settings.S3_ENDPOINT)
+
+    # boto3 loads its service models on import; keep that off the import path
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        "s3",
+        endpoint_url=settings.S3_ENDPOINT,
+        aws_access_key_id=settings.S3_ACCESS_KEY,
+        aws_secret_access_key=settings.S3_SECRET_KEY,
+        region_name=settings.S3_REGION,
+        config=Config(
+            signature_version="s3v4",
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            tcp_keepalive=True,
+            connect_timeout=settings.S3_CONNECT_TIMEOUT,
+            read_timeout=settings.S3_READ_TIMEOUT,
+            retries={"max_attempts": settings.S3_MAX_ATTEMPTS, "mode": "standard"},
+        ),
+    )
 
 
 class StorageService:
-    """S3-compatible storage service."""
+    """S3-compatible storage service with an async interface."""
 
     def __init__(self):
-        self.client = boto3.client(
-            "s3",
-            endpoint_url=settings.S3_ENDPOINT,
-            aws_access_key_id=settings.S3_ACCESS_KEY,
-            aws_secret_access_key=settings.S3_SECRET_KEY,
-            region_name=settings.S3_REGION,
-            config=Config(signature_version="s3v4"),
-        )
         self.bucket = settings.S3_BUCKET
+        self._client = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def client(self):
+        """Shared boto3 client, created on first use (boto3 import and setup are slow)."""
+        if self._client is None:
+            self._client = _build_client()
+        return self._client
+
+    async def start(self) -> None:
+        """Build the client on the executor so the first request does not pay for it."""
+        await self._run("connect", lambda: self.client)
+
+    async def _call(self, operation: str, **kwargs):
+        """Run a client method on the storage executor, timed and counted."""
+        return await self._run(operation, partial(getattr(self.client, operation), **kwargs))
+
+    async def _run(self, operation: str, fn: Callable[[], object]):
+        """Run blocking storage work on the executor, recorded under ``operation``."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.S3_MAX_WORKERS, thread_name_prefix="storage"
+            )
+        loop = asyncio.get_running_loop()
 
-    def ensure_bucket(self):
+        STORAGE_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, fn)
+        except (BotoCoreError, ClientError):
+            STORAGE_ERRORS.labels(operation=operation).inc()
+            raise
+        finally:
+            STORAGE_IN_FLIGHT.dec()
+            STORAGE_LATENCY.labels(operation=operation).observe(time.perf_counter() - start)
+
+    def public_url(self, key: str) -> str:
+        """Public URL of an object."""
+        return f"{settings.S3_ENDPOINT}/{self.bucket}/{key}"
+
+    def key_from_url(self, url: str) -> str | None:
+        """Object key for a URL from ``public_url``, or None for foreign URLs."""
+        prefix = f"{settings.S3_ENDPOINT}/{self.bucket}/"
+        return url[len(prefix):] if url.startswith(prefix) else None
+
+    @staticmethod
+    def new_key(filename: str, folder: str = "uploads") -> str:
+        """Unique object key keeping the file extension."""
+        ext = filename.rsplit(".", 1)[-1] if "." in filename else ""
+        return f"{folder}/{uuid.uuid4()}.{ext}" if ext else f"{folder}/{uuid.uuid4()}"
+
+    async def ensure_bucket(self) -> None:
         """Create bucket if it doesn't exist."""
         try:
-            self.client.head_bucket(Bucket=self.bucket)
-        except Exception:
-            try:
-                self.client.create_bucket(Bucket=self.bucket)
-                # Set bucket policy for public read
-                policy = {
-                    "Version": "2012-10-17",
-                    "Statement": [
-                        {
-                            "Effect": "Allow",
-                            "Principal": "*",
-                            "Action": ["s3:GetObject"],
-                            "Resource": [f"arn:aws:s3:::{self.bucket}/*"],
-                        }
-                    ],
-                }
-                import json
-                self.client.put_bucket_policy(
-                    Bucket=self.bucket, Policy=json.dumps(policy)
-                )
-            except Exception as e:
-                print(f"Failed to create bucket: {e}")
+            await self._call("head_bucket", Bucket=self.bucket)
+            return
+        except ClientError:
+            pass
+        try:
+            await self._call("create_bucket", Bucket=self.bucket)
+            # Set bucket policy for public read
+            policy = {
+                "Version": "2012-10-17",
+                "Statement": [
+                    {
+                        "Effect": "Allow",
+                        "Principal": "*",
+                        "Action": ["s3:GetObject"],
+                        "Resource": [f"arn:aws:s3:::{self.bucket}/*"],
+                    }
+                ],
+            }
+            await self._call(
+                "put_bucket_policy", Bucket=self.bucket, Policy=json.dumps(policy)
+            )
+        except (BotoCoreError, ClientError):
+            logger.exception("storage_create_bucket_failed", bucket=self.bucket)
 
-    def upload_file(
+    async def upload_file(
         self,
         file_data: bytes,
         filename: str,
@@ -57,40 +146,221 @@ class StorageService:
         folder: str = "uploads",
     ) -> str:
         """Upload file and return public URL."""
-        # Generate unique filename
-        ext = filename.rsplit(".", 1)[-1] if "." in filename else ""
-        unique_name = f"{folder}/{uuid.uuid4()}.{ext}" if ext else f"{folder}/{uuid.uuid4()}"
+        key = self.new_key(filename, folder)
+        await self.put_bytes(file_data, key, content_type)
+        return self.public_url(key)
 
-        self.client.put_object(
+    async def put_bytes(
+        self, data: bytes, key: str, content_type: str = "application/octet-stream"
+    ) -> None:
+        """Store ``data`` under an exact key."""
+        await self._call(
+            "put_object",
             Bucket=self.bucket,
-            Key=unique_name,
-            Body=file_data,
+            Key=key,
+            Body=data,
             ContentType=content_type,
+            CacheControl="public, max-age=31536000, immutable",
         )
 
-        # Return public URL
-        return f"{settings.S3_ENDPOINT}/{self.bucket}/{unique_name}"
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        key: str,
+        content_type: str = "application/octet-stream",
+        finalize: Callable[[], Awaitable[None]] | None = None,
+    ) -> int:
+        """Upload an async byte stream to ``key`` and return its size.
+
+        Chunks are gathered into ``UPLOAD_PART_SIZE`` parts; at most one part is
+        being sent while the next one fills, so memory stays around two parts
+        whatever the object size. Streams that fit in one part use a plain
+        PUT. ``finalize`` is awaited once the stream is exhausted, before the
+        object becomes visible. Any error, including one raised by ``chunks``
+        or ``finalize``, aborts the upload.
+        """
+        part_size = settings.UPLOAD_PART_SIZE
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        parts: list[dict] = []
+        pending: asyncio.Task | None = None
+
+        async def send_part(number: int, body: bytes) -> None:
+            response = await self._call(
+                "upload_part",
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=body,
+            )
+            parts.append({"PartNumber": number, "ETag": response["ETag"]})
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                if len(buffer) < part_size:
+                    continue
+                if upload_id is None:
+                    response = await self._call(
+                        "create_multipart_upload",
+                        Bucket=self.bucket,
+                        Key=key,
+                        ContentType=content_type,
+                    )
+                    upload_id = response["UploadId"]
+                if pending is not None:
+                    await pending
+                body, buffer = bytes(buffer), bytearray()
+                pending = asyncio.create_task(send_part(len(parts) + 1, body))
+
+            if finalize is not None:
+                await finalize()
+
+            if upload_id is None:
+                await self._call(
+                    "put_object",
+                    Bucket=self.bucket,
+                    Key=key,
+                    Body=bytes(buffer),
+                    ContentType=content_type,
+                )
+                return size
+
+            if pending is not None:
+                await pending
+                pending = None
+            if buffer:
+                await send_part(len(parts) + 1, bytes(buffer))
+            await self._call(
+                "complete_multipart_upload",
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": sorted(parts, key=lambda p: p["PartNumber"])},
+            )
+            return size
+        except BaseException:
+            if pending is not None:
+                pending.cancel()
+            if upload_id is not None:
+                try:
+                    await self._call(
+                        "abort_multipart_upload",
+                        Bucket=self.bucket,
+                        Key=key,
+                        UploadId=upload_id,
+                    )
+                except (BotoCoreError, ClientError):
+                    logger.exception("storage_abort_failed", key=key)
+            raise
 
     def get_presigned_url(self, key: str, expires_in: int = 3600) -> str:
-        """Get presigned URL for upload."""
+        """Get presigned URL for upload (signed locally, no network call)."""
         return self.client.generate_presigned_url(
             "put_object",
             Params={"Bucket": self.bucket, "Key": key},
             ExpiresIn=expires_in,
         )
 
-    def delete_file(self, url: str) -> bool:
-        """Delete file by URL."""
+    def presigned_post(
+        self, key: str, content_type: str, max_bytes: int, expires_in: int = 900
+    ) -> dict:
+        """Browser form upload straight to the bucket (signed locally).
+
+        The policy pins the key and content type and caps the size, so the
+        client cannot store anything else with it. Returns ``url`` and the
+        form ``fields`` to post along with the file.
+        """
+        return self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_bytes],
+            ],
+            ExpiresIn=expires_in,
+        )
+
+    async def head(self, key: str) -> dict | None:
+        """Object metadata, or None if it does not exist."""
+        try:
+            return await self._call("head_object", Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def read_range(self, key: str, start: int, end: int) -> bytes:
+        """Bytes ``start``..``end`` (inclusive) of an object."""
+
+        def _read() -> bytes:
+            # The body streams from the socket, so read it on the executor too
+            response = self.client.get_object(
+                Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}"
+            )
+            return response["Body"].read()
+
+        return await self._run("get_object", _read)
+
+    async def delete_key(self, key: str) -> None:
+        """Delete an object by key."""
+        await self._call("delete_object", Bucket=self.bucket, Key=key)
+
+    async def delete_keys(self, keys: Iterable[str]) -> list[str]:
+        """Delete objects in batches of up to 1000 (the S3 limit per request).
+
+        Returns the keys that could not be deleted.
+        """
+        keys = list(keys)
+        failed = []
+        for start in range(0, len(keys), DELETE_BATCH_LIMIT):
+            batch = keys[start:start + DELETE_BATCH_LIMIT]
+            response = await self._call(
+                "delete_objects",
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+            failed.extend(error["Key"] for error in response.get("Errors", []))
+        return failed
+
+    async def list_objects(self, prefix: str = "") -> AsyncIterator[list[dict]]:
+        """Pages of objects under ``prefix`` (``Key``, ``Size``, ``LastModified``)."""
+        token = None
+        while True:
+            params = {"Bucket": self.bucket, "Prefix": prefix, "MaxKeys": 1000}
+            if token:
+                params["ContinuationToken"] = token
+            response = await self._call("list_objects_v2", **params)
+            yield response.get("Contents", [])
+            if not response.get("IsTruncated"):
+                return
+            token = response["NextContinuationToken"]
+
+    async def delete_file(self, url: str) -> bool:
+        """Delete file by URL.
+
+        Listing images are reference-counted and removed by the collector in
+        ``app.services.image_gc``; do not delete them directly.
+        """
+        key = self.key_from_url(url)
+        if key is None:
+            return False
         try:
-            # Extract key from URL
-            prefix = f"{settings.S3_ENDPOINT}/{self.bucket}/"
-            if url.startswith(prefix):
-                key = url[len(prefix):]
-                self.client.delete_object(Bucket=self.bucket, Key=key)
-                return True
-        except Exception as e:
-            print(f"Failed to delete file: {e}")
-        return False
+            await self.delete_key(key)
+            return True
+        except (BotoCoreError, ClientError):
+            logger.exception("storage_delete_failed", key=key)
+            return False
+
+    def close(self) -> None:
+        """Stop the executor; in-flight calls finish first."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
 
 
 # Singleton
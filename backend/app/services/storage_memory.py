@@ -0,0 +1,177 @@
+"""In-process stand-in for the subset of the boto3 S3 client the app uses.
+
+Selected with ``S3_BACKEND=memory``. It keeps objects in a dict and raises
+``botocore`` ``ClientError`` like the real client, so ``StorageService`` runs
+unchanged against it in tests and local development without MinIO.
+"""
+
+import io
+import threading
+import uuid
+from datetime import UTC, datetime
+
+from botocore.exceptions import ClientError
+
+
+def _error(code: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+class InMemoryS3Client:
+    """Thread-safe dict-backed S3 client."""
+
+    def __init__(self, endpoint_url: str):
+        self.endpoint_url = endpoint_url
+        self._buckets: dict[str, dict[str, dict]] = {}
+        self._uploads: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, bucket: str, operation: str) -> dict[str, dict]:
+        if bucket not in self._buckets:
+            raise _error("NoSuchBucket", operation)
+        return self._buckets[bucket]
+
+    # --- Buckets ---
+
+    def head_bucket(self, Bucket: str) -> dict:
+        with self._lock:
+            self._bucket(Bucket, "HeadBucket")
+        return {}
+
+    def create_bucket(self, Bucket: str, **_) -> dict:
+        with self._lock:
+            self._buckets.setdefault(Bucket, {})
+        return {}
+
+    def put_bucket_policy(self, Bucket: str, Policy: str) -> dict:
+        with self._lock:
+            self._bucket(Bucket, "PutBucketPolicy")
+        return {}
+
+    # --- Objects ---
+
+    def put_object(
+        self, Bucket: str, Key: str, Body: bytes, ContentType: str = "binary/octet-stream", **_
+    ) -> dict:
+        with self._lock:
+            self._bucket(Bucket, "PutObject")[Key] = {
+                "Body": bytes(Body),
+                "ContentType": ContentType,
+                "LastModified": datetime.now(UTC),
+            }
+        return {}
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        with self._lock:
+            obj = self._bucket(Bucket, "HeadObject").get(Key)
+        if obj is None:
+            raise _error("404", "HeadObject")
+        return {
+            "ContentLength": len(obj["Body"]),
+            "ContentType": obj["ContentType"],
+            "LastModified": obj["LastModified"],
+        }
+
+    def get_object(self, Bucket: str, Key: str, Range: str | None = None) -> dict:
+        with self._lock:
+            obj = self._bucket(Bucket, "GetObject").get(Key)
+        if obj is None:
+            raise _error("NoSuchKey", "GetObject")
+        body = obj["Body"]
+        if Range:
+            start, end = Range.removeprefix("bytes=").split("-")
+            body = body[int(start):int(end) + 1]
+        return {"Body": io.BytesIO(body), "ContentType": obj["ContentType"]}
+
+    def delete_object(self, Bucket: str, Key: str) -> dict:
+        with self._lock:
+            self._bucket(Bucket, "DeleteObject").pop(Key, None)
+        return {}
+
+    # --- Multipart ---
+
+    def create_multipart_upload(
+        self, Bucket: str, Key: str, ContentType: str = "binary/octet-stream", **_
+    ) -> dict:
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self._bucket(Bucket, "CreateMultipartUpload")
+            self._uploads[upload_id] = {
+                "Bucket": Bucket, "Key": Key, "ContentType": ContentType, "Parts": {}
+            }
+        return {"UploadId": upload_id}
+
+    def upload_part(
+        self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes, **_
+    ) -> dict:
+        with self._lock:
+            upload = self._uploads.get(UploadId)
+            if upload is None:
+                raise _error("NoSuchUpload", "UploadPart")
+            upload["Parts"][PartNumber] = bytes(Body)
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(
+        self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict
+    ) -> dict:
+        with self._lock:
+            upload = self._uploads.pop(UploadId, None)
+            if upload is None:
+                raise _error("NoSuchUpload", "CompleteMultipartUpload")
+            body = b"".join(
+                upload["Parts"][part["PartNumber"]] for part in MultipartUpload["Parts"]
+            )
+            self._bucket(Bucket, "CompleteMultipartUpload")[Key] = {
+                "Body": body,
+                "ContentType": upload["ContentType"],
+                "LastModified": datetime.now(UTC),
+            }
+        return {}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> dict:
+        with self._lock:
+            if self._uploads.pop(UploadId, None) is None:
+                raise _error("NoSuchUpload", "AbortMultipartUpload")
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: dict) -> dict:
+        with self._lock:
+            objects = self._bucket(Bucket, "DeleteObjects")
+            for item in Delete["Objects"]:
+                objects.pop(item["Key"], None)
+        if Delete.get("Quiet"):
+            return {}
+        return {"Deleted": [{"Key": item["Key"]} for item in Delete["Objects"]]}
+
+    def list_objects_v2(
+        self, Bucket: str, Prefix: str = "", MaxKeys: int = 1000, ContinuationToken: str | None = None
+    ) -> dict:
+        with self._lock:
+            keys = sorted(k for k in self._bucket(Bucket, "ListObjectsV2") if k.startswith(Prefix))
+            if ContinuationToken:
+                keys = [k for k in keys if k > ContinuationToken]
+            page = keys[:MaxKeys]
+            contents = [
+                {
+                    "Key": k,
+                    "Size": len(self._buckets[Bucket][k]["Body"]),
+                    "LastModified": self._buckets[Bucket][k]["LastModified"],
+                }
+                for k in page
+            ]
+        response = {"Contents": contents, "KeyCount": len(page), "IsTruncated": len(keys) > MaxKeys}
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = page[-1]
+        return response
+
+    def generate_presigned_url(self, ClientMethod: str, Params: dict, ExpiresIn: int = 3600) -> str:
+        return f"{self.endpoint_url}/{Params['Bucket']}/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+    def generate_presigned_post(
+        self, Bucket: str, Key: str, Fields: dict | None = None,
+        Conditions: list | None = None, ExpiresIn: int = 3600,
+    ) -> dict:
+        return {
+            "url": f"{self.endpoint_url}/{Bucket}",
+            "fields": {**(Fields or {}), "key": Key, "policy": "memory"},
+        }
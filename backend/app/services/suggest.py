@@ -0,0 +1,402 @@
+"""Search autocomplete from a prefix index shared through a snapshot file.
+
+Suggestions come from three sources, each weighted by how common it is:
+words in active listing titles (by how many listings use them), category
+names in both languages (by listings in the category) and past searches
+that found something. A search counts once per searcher per day (a
+HyperLogLog per query and day tells repeats apart), in daily buckets kept
+for ``SUGGEST_QUERY_DAYS``; older days count for less, halving every
+``SUGGEST_QUERY_HALF_LIFE_DAYS``, and a search is suggested once its
+decayed total reaches ``SUGGEST_MIN_QUERY_COUNT``.
+
+One worker per host, elected with a Redis lock, keeps word counts in
+memory, applies listings changed since its last pass, and writes every
+entry, sorted by key, to ``SUGGEST_SNAPSHOT_PATH``. Writes go to a temp
+file that replaces the snapshot, so readers never see a partial one. Every
+worker maps the current snapshot with ``mmap`` (the page cache holds one
+copy per host) and answers a prefix by binary search over the sorted keys
+plus a top-k over the matching range's weights.
+
+Snapshot layout (native byte order; the file never leaves the host)::
+
+    b"MSUG" | version u32 | count u32
+    weights f32[count] | key offsets u32[count + 1] | text offsets u32[count + 1]
+    kinds u8[count] | key bytes | text bytes
+
+Keys are normalized UTF-8, whose byte order is code point order, so a
+prefix's entries are contiguous.
+"""
+
+import asyncio
+import bisect
+import mmap
+import os
+import socket
+import struct
+import time
+import unicodedata
+import uuid
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from itertools import accumulate
+
+import structlog
+
+from app.core.config import settings
+from app.core.database import get_db_context
+from app.core.queries import CATEGORIES_ALL, SUGGEST_LISTINGS, SUGGEST_LISTINGS_CHANGED
+from app.core.redis import get_redis
+from app.models.listing import ListingStatus
+from app.services.similarity import tokenize
+
+logger = structlog.get_logger()
+
+MAGIC = b"MSUG"
+VERSION = 1
+HEADER = struct.Struct("<4sII")
+
+WORD, CATEGORY, QUERY = 0, 1, 2
+KIND_NAMES = {WORD: "word", CATEGORY: "category", QUERY: "query"}
+
+# Decayed totals over the daily buckets, rebuilt by the builder
+QUERIES_KEY = "suggest:queries"
+MAX_QUERY_CHARS = 64
+DAY_SECONDS = 86400
+
+# Polls look back this far so rows committed late are not missed
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+def normalize(text: str) -> str:
+    """Key form of user text: NFKC, lowercased, single spaces."""
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+def title_words(title: str) -> set[str]:
+    """Distinct suggestible words of a title; bare numbers are left out."""
+    return {word for word in tokenize(normalize(title)) if not word.isdigit()}
+
+
+def current_day() -> int:
+    """Days since the epoch, UTC."""
+    return int(time.time() // DAY_SECONDS)
+
+
+def queries_key(day: int) -> str:
+    """Sorted set of a day's searches, scored by distinct searchers."""
+    return f"suggest:queries:{day}"
+
+
+def searchers_key(day: int, query: str) -> str:
+    """HyperLogLog of who made a search that day."""
+    return f"suggest:searchers:{day}:{query}"
+
+
+# --- Snapshot file ---
+
+@dataclass(frozen=True)
+class Entry:
+    key: str
+    text: str
+    kind: int
+    weight: float
+
+
+def encode_snapshot(entries: list[Entry]) -> bytes:
+    """Serialize entries in key order."""
+    rows = sorted(((e.key.encode(), e) for e in entries), key=lambda r: (r[0], -r[1].weight))
+    keys = [key for key, _ in rows]
+    texts = [e.text.encode() for _, e in rows]
+
+    def offsets(blobs: list[bytes]) -> bytes:
+        return array("I", accumulate(map(len, blobs), initial=0)).tobytes()
+
+    return b"".join([
+        HEADER.pack(MAGIC, VERSION, len(rows)),
+        array("f", (e.weight for _, e in rows)).tobytes(),
+        offsets(keys),
+        offsets(texts),
+        bytes(e.kind for _, e in rows),
+        b"".join(keys),
+        b"".join(texts),
+    ])
+
+
+def write_snapshot(path: str, data: bytes) -> None:
+    """Atomically replace the snapshot at ``path``."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class _Keys:
+    """Sequence view of the mapped keys, for ``bisect``."""
+
+    def __init__(self, buf: memoryview, offsets: memoryview, base: int):
+        self._buf = buf
+        self._offsets = offsets
+        self._base = base
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return bytes(self._buf[self._base + self._offsets[i]:self._base + self._offsets[i + 1]])
+
+
+class Snapshot:
+    """A mapped snapshot file; read-only."""
+
+    def __init__(self, path: str):
+        # Imported here to keep it off the startup path
+        import numpy as np
+
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mm)
+        magic, version, count = HEADER.unpack_from(buf)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a suggest snapshot: {path}")
+
+        position = HEADER.size
+        self.weights = np.frombuffer(buf, np.float32, count, position)
+        position += 4 * count
+        key_offsets = buf[position:position + 4 * (count + 1)].cast("I")
+        position += 4 * (count + 1)
+        text_offsets = buf[position:position + 4 * (count + 1)].cast("I")
+        position += 4 * (count + 1)
+        self._kinds = buf[position:position + count]
+        position += count
+        self.keys = _Keys(buf, key_offsets, position)
+        position += key_offsets[count]
+        self._texts = _Keys(buf, text_offsets, position)
+        self.count = count
+
+    def search(self, prefix: str, limit: int) -> list[tuple[str, int, float]]:
+        """Up to ``limit`` (text, kind, weight) entries whose key starts with
+        ``prefix``, heaviest first, one per text."""
+        import numpy as np
+
+        start = prefix.encode()
+        lo = bisect.bisect_left(self.keys, start)
+        # 0xff never occurs in UTF-8, so this sorts after every extension of the prefix
+        hi = bisect.bisect_left(self.keys, start + b"\xff", lo)
+        if lo == hi:
+            return []
+
+        weights = self.weights[lo:hi]
+        # Extra candidates, since a word and a search can share a text
+        k = min(len(weights), limit * 3)
+        best = np.argpartition(-weights, k - 1)[:k] if k < len(weights) else np.arange(len(weights))
+        best = best[np.argsort(-weights[best], kind="stable")]
+
+        results, seen = [], set()
+        for i in best:
+            row = lo + int(i)
+            text = self._texts[row].decode()
+            if text in seen:
+                continue
+            seen.add(text)
+            results.append((text, self._kinds[row], float(self.weights[row])))
+            if len(results) == limit:
+                break
+        return results
+
+
+class SuggestIndex:
+    """The snapshot this worker has mapped, remapped when the file changes."""
+
+    def __init__(self):
+        self.snapshot: Snapshot | None = None
+
+    def suggest(self, query: str, limit: int) -> list[dict]:
+        """Completions of ``query``, heaviest first; empty until a snapshot exists."""
+        prefix = normalize(query)
+        if not prefix or self.snapshot is None:
+            return []
+        suggestions = []
+        for text, kind, _ in self.snapshot.search(prefix, limit):
+            text, _, category_id = text.partition("\t")
+            suggestions.append(
+                {"text": text, "kind": KIND_NAMES[kind], "category_id": category_id or None}
+            )
+        return suggestions
+
+    def reload_if_changed(self) -> bool:
+        """Map the snapshot file if it is new or was replaced; True if it was."""
+        path = settings.SUGGEST_SNAPSHOT_PATH
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        current = self.snapshot
+        if current and (current.stat.st_ino, current.stat.st_mtime_ns) == (
+            stat.st_ino, stat.st_mtime_ns
+        ):
+            return False
+        # The old map closes once no request is reading it
+        self.snapshot = Snapshot(path)
+        return True
+
+
+# --- Building ---
+
+class SuggestBuilder:
+    """Word and category counts over active listings, kept up to date by polling."""
+
+    def __init__(self):
+        self._listings: dict[uuid.UUID, tuple[set[str], str]] = {}
+        self._words: Counter[str] = Counter()
+        self._categories: Counter[str] = Counter()
+        self._synced_until: datetime | None = None
+        # Listing changes, category and search entries since the last write
+        self._dirty = True
+        self._last_extras: list[Entry] = []
+
+    def _add(self, listing_id: uuid.UUID, title: str, category_id: str) -> None:
+        words = title_words(title)
+        self._listings[listing_id] = (words, category_id)
+        self._words.update(words)
+        self._categories[category_id] += 1
+        self._dirty = True
+
+    def _remove(self, listing_id: uuid.UUID) -> None:
+        old = self._listings.pop(listing_id, None)
+        if old is None:
+            return
+        words, category_id = old
+        self._words.subtract(words)
+        self._categories[category_id] -= 1
+        for word in words:
+            if self._words[word] <= 0:
+                del self._words[word]
+        self._dirty = True
+
+    async def sync(self, db) -> None:
+        """Load every active listing the first time, then only changes."""
+        started = datetime.now(UTC)
+        if self._synced_until is None:
+            result = await db.execute(SUGGEST_LISTINGS)
+            for listing_id, title, category_id in result.all():
+                self._add(listing_id, title, str(category_id))
+        else:
+            result = await db.execute(
+                SUGGEST_LISTINGS_CHANGED, {"since": self._synced_until - REFRESH_OVERLAP}
+            )
+            for listing_id, title, category_id, status in result.all():
+                self._remove(listing_id)
+                if status == ListingStatus.ACTIVE:
+                    self._add(listing_id, title, str(category_id))
+        self._synced_until = started
+
+    async def extra_entries(self, db) -> list[Entry]:
+        """Category names and popular searches."""
+        entries = []
+        result = await db.execute(CATEGORIES_ALL)
+        for category in result.scalars().all():
+            # The text carries the id so a pick can select the category
+            text = f"{category.name_am}\t{category.id}"
+            weight = settings.SUGGEST_CATEGORY_WEIGHT * (1 + self._categories[str(category.id)])
+            for name in {normalize(category.name_am), normalize(category.name_en)}:
+                entries.append(Entry(name, text, CATEGORY, weight))
+
+        for query, count in await self.popular_queries():
+            entries.append(Entry(query, query, QUERY, settings.SUGGEST_QUERY_WEIGHT * count))
+        return entries
+
+    async def popular_queries(self) -> list[tuple[str, float]]:
+        """Searches made by enough people lately, with their decayed totals."""
+        redis = get_redis()
+        today = current_day()
+        weights = {
+            queries_key(day): 0.5 ** ((today - day) / settings.SUGGEST_QUERY_HALF_LIFE_DAYS)
+            for day in range(today - settings.SUGGEST_QUERY_DAYS + 1, today + 1)
+        }
+        # Busy days lose only searches too rare to ever be suggested from them,
+        # so popular ones are never pushed out by a flood of one-offs
+        for key in weights:
+            if await redis.zcard(key) > settings.SUGGEST_MAX_QUERIES:
+                await redis.zremrangebyscore(key, "-inf", f"({settings.SUGGEST_MIN_QUERY_COUNT}")
+        await redis.zunionstore(QUERIES_KEY, weights)
+        return await redis.zrevrangebyscore(
+            QUERIES_KEY, "+inf", settings.SUGGEST_MIN_QUERY_COUNT,
+            start=0, num=settings.SUGGEST_MAX_QUERIES, withscores=True,
+        )
+
+    async def publish(self) -> bool:
+        """Sync and rewrite the snapshot if anything changed; True if written."""
+        async with get_db_context() as db:
+            await self.sync(db)
+            extras = await self.extra_entries(db)
+        path = settings.SUGGEST_SNAPSHOT_PATH
+        if not self._dirty and extras == self._last_extras and os.path.exists(path):
+            return False
+
+        entries = [Entry(word, word, WORD, count) for word, count in self._words.items()]
+        entries += extras
+        # Sorting and packing is CPU work: off the event loop
+        data = await asyncio.to_thread(encode_snapshot, entries)
+        await asyncio.to_thread(write_snapshot, path, data)
+        self._dirty = False
+        self._last_extras = extras
+        logger.info("suggest_snapshot_written", entries=len(entries), bytes=len(data))
+        return True
+
+
+# Singletons
+suggest_index = SuggestIndex()
+_builder = SuggestBuilder()
+_builder_token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+async def _is_builder() -> bool:
+    """Hold (or take) this host's builder lock; it lapses if the holder dies."""
+    key = f"suggest:builder:{socket.gethostname()}"
+    ttl = max(int(settings.SUGGEST_REFRESH_SECONDS * 3), 10)
+    redis = get_redis()
+    if await redis.set(key, _builder_token, nx=True, ex=ttl):
+        return True
+    if await redis.get(key) == _builder_token:
+        await redis.expire(key, ttl)
+        return True
+    return False
+
+
+async def record_search(query: str, searcher: str) -> None:
+    """Count a search that found listings, once per ``searcher`` a day."""
+    query = normalize(query)
+    if not 2 <= len(query) <= MAX_QUERY_CHARS:
+        return
+    day = current_day()
+    ttl = (settings.SUGGEST_QUERY_DAYS + 1) * DAY_SECONDS
+    redis = get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.pfadd(searchers_key(day, query), searcher)
+        pipe.expire(searchers_key(day, query), ttl)
+        new_searcher, _ = await pipe.execute()
+    if new_searcher:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zincrby(queries_key(day), 1, query)
+            pipe.expire(queries_key(day), ttl)
+            await pipe.execute()
+
+
+async def refresh_suggest_index() -> None:
+    """Periodic job: the builder worker writes the snapshot; every worker maps it."""
+    if not settings.SUGGEST_ENABLED:
+        return
+    try:
+        building = await _is_builder()
+    except Exception:
+        # Without Redis each worker builds for itself; the writes are atomic
+        logger.warning("suggest_builder_lock_unavailable", exc_info=True)
+        building = True
+    if building:
+        await _builder.publish()
+    await asyncio.to_thread(suggest_index.reload_if_changed)
@@ -0,0 +1,100 @@
+"""Validation and admission control for streamed image uploads."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from app.core.config import settings
+
+# Content type -> file extension
+IMAGE_TYPES = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/heic": "heic",
+}
+
+# Extension -> content type
+IMAGE_EXTENSIONS = {ext: content_type for content_type, ext in IMAGE_TYPES.items()}
+
+# Bytes needed to recognise every supported format
+SNIFF_BYTES = 12
+
+_slots: asyncio.Semaphore | None = None
+
+
+class UploadRejected(Exception):
+    """Upload refused; carries the HTTP status to answer with."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def sniff_image_type(head: bytes) -> str | None:
+    """Content type from the file's magic bytes, if it is a supported image."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:12] in (b"ftypheic", b"ftypheix", b"ftypmif1"):
+        return "image/heic"
+    return None
+
+
+async def checked_image_stream(
+    chunks: AsyncIterator[bytes], declared_type: str
+) -> AsyncIterator[bytes]:
+    """Pass chunks through, rejecting oversized bodies and mismatched content.
+
+    Nothing is held back beyond the first few bytes needed to sniff the type,
+    so a rejected upload is stopped as soon as the limit is crossed.
+    """
+    head = b""
+    size = 0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        size += len(chunk)
+        if size > settings.UPLOAD_MAX_BYTES:
+            raise UploadRejected(413, "File too large")
+
+        if len(head) < SNIFF_BYTES:
+            head += chunk
+            if len(head) < SNIFF_BYTES:
+                continue
+            if sniff_image_type(head) != declared_type:
+                raise UploadRejected(415, "File content does not match its type")
+            chunk, head = head, head[:SNIFF_BYTES]
+        yield chunk
+
+    if size == 0:
+        raise UploadRejected(400, "Empty upload")
+    if len(head) < SNIFF_BYTES:
+        if sniff_image_type(head) != declared_type:
+            raise UploadRejected(415, "File content does not match its type")
+        yield head
+
+
+def user_image_folder(user_id) -> str:
+    """Storage folder holding a user's listing images."""
+    return f"listings/{user_id}"
+
+
+@asynccontextmanager
+async def upload_slot():
+    """Hold one of the worker's upload slots, or reject with 503 when busy."""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.UPLOAD_MAX_CONCURRENCY)
+    try:
+        await asyncio.wait_for(_slots.acquire(), timeout=settings.UPLOAD_SLOT_TIMEOUT)
+    except TimeoutError:
+        raise UploadRejected(503, "Too many uploads in progress, retry shortly")
+    try:
+        yield
+    finally:
+        _slots.release()
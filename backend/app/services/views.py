@@ -0,0 +1,41 @@
+"""Buffered listing view counts.
+
+A shared listing can get hundreds of views a second; one UPDATE per view
+would queue them all on the same row lock. Views are counted in memory and
+written periodically as one batched UPDATE per listing.
+"""
+
+from collections import Counter
+from uuid import UUID
+
+import structlog
+
+from app.core.database import get_engine
+from app.core.queries import ADD_LISTING_VIEWS
+
+logger = structlog.get_logger()
+
+_pending: Counter[UUID] = Counter()
+
+
+def record_view(listing_id: UUID) -> None:
+    """Count one view; written by the next ``flush_views``."""
+    _pending[listing_id] += 1
+
+
+async def flush_views() -> None:
+    """Write buffered view counts. Counts are kept for the next run on failure."""
+    global _pending
+    if not _pending:
+        return
+    batch, _pending = _pending, Counter()
+    try:
+        async with get_engine().begin() as conn:
+            await conn.execute(
+                ADD_LISTING_VIEWS,
+                [{"listing_id": listing_id, "views": views} for listing_id, views in batch.items()],
+            )
+    except Exception:
+        _pending.update(batch)
+        raise
+    logger.debug("listing_views_flushed", listings=len(batch), views=sum(batch.values()))
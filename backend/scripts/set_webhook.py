@@ -0,0 +1,58 @@
+"""Register (or remove) the bot webhook with Telegram.
+
+Uses ``BOT_WEBHOOK_URL`` and ``BOT_WEBHOOK_SECRET`` from the environment.
+Run from the backend directory after deploying::
+
+    python scripts/set_webhook.py
+    python scripts/set_webhook.py --delete
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.bot.client import TelegramError, bot_client  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+# Only the update types app.bot.handlers acts on
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+
+async def main(delete: bool, drop_pending: bool) -> int:
+    try:
+        if delete:
+            await bot_client.call("deleteWebhook", drop_pending_updates=drop_pending)
+            print("Webhook removed")
+            return 0
+
+        if not settings.BOT_WEBHOOK_URL or not settings.BOT_WEBHOOK_SECRET:
+            print("BOT_WEBHOOK_URL and BOT_WEBHOOK_SECRET must be set", file=sys.stderr)
+            return 1
+        await bot_client.call(
+            "setWebhook",
+            url=settings.BOT_WEBHOOK_URL,
+            secret_token=settings.BOT_WEBHOOK_SECRET,
+            allowed_updates=ALLOWED_UPDATES,
+            drop_pending_updates=drop_pending,
+        )
+        info = await bot_client.call("getWebhookInfo")
+        print(f"Webhook set to {info['url']} ({info.get('pending_update_count', 0)} pending)")
+        return 0
+    except TelegramError as e:
+        print(f"Telegram refused: {e}", file=sys.stderr)
+        return 1
+    finally:
+        await bot_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delete", action="store_true", help="remove the webhook instead")
+    parser.add_argument(
+        "--drop-pending", action="store_true", help="discard updates Telegram is holding"
+    )
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.delete, args.drop_pending)))
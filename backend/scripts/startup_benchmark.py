@@ -0,0 +1,181 @@
+"""Startup benchmark and budget check.
+
+Measures two things, each as the median of ``--runs`` fresh processes:
+
+* import time of ``app.main`` from ``python -X importtime``, with the
+  costliest imports listed so a regression points at its cause;
+* time to first request: from spawning uvicorn until ``/health`` answers.
+
+Exits with status 1 when either median is over its budget. Run from the
+backend directory::
+
+    python scripts/startup_benchmark.py
+    python scripts/startup_benchmark.py --import-budget-ms 900 --json
+
+Budgets default to ``STARTUP_IMPORT_BUDGET_MS`` and
+``STARTUP_FIRST_REQUEST_BUDGET_MS`` from the environment.
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_IMPORT_BUDGET_MS = 1200
+DEFAULT_FIRST_REQUEST_BUDGET_MS = 3000
+
+# "import time:   self [us] | cumulative | <indent>package"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def measure_imports(module: str) -> tuple[float, list[tuple[str, float]]]:
+    """Import ``module`` in a fresh interpreter; returns (total ms, costliest imports).
+
+    Costs are reported per third-party package (cumulative time where the
+    app's code first pulls it in) and per app module (own time), so a
+    regression shows up under the import that caused it.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    app_root = module.split(".")[0]
+    total = 0.0
+    costs: dict[str, float] = {}
+    # Children are printed before their parent, so walk backwards to see parents first
+    parents: list[tuple[int, str]] = []
+    for line in reversed(result.stderr.splitlines()):
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_ms, cumulative_ms = int(match.group(1)) / 1000, int(match.group(2)) / 1000
+        depth, name = len(match.group(3)), match.group(4)
+        while parents and parents[-1][0] >= depth:
+            parents.pop()
+        parent = parents[-1][1] if parents else None
+        parents.append((depth, name))
+
+        root = name.split(".")[0]
+        if name == module:
+            total = cumulative_ms
+        if root == app_root:
+            costs[name] = self_ms
+        elif parent and parent.split(".")[0] == app_root:
+            costs[root] = costs.get(root, 0.0) + cumulative_ms
+    return total, sorted(costs.items(), key=lambda item: item[1], reverse=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(app: str, timeout: float) -> float:
+    """Start uvicorn and time until ``/health`` returns 200, in ms."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise TimeoutError(f"no response from {url} within {timeout}s")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--app", default="app.main:app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument(
+        "--import-budget-ms",
+        type=float,
+        default=float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", DEFAULT_IMPORT_BUDGET_MS)),
+    )
+    parser.add_argument(
+        "--first-request-budget-ms",
+        type=float,
+        default=float(
+            os.environ.get("STARTUP_FIRST_REQUEST_BUDGET_MS", DEFAULT_FIRST_REQUEST_BUDGET_MS)
+        ),
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--skip-server", action="store_true", help="only measure imports")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    import_runs = [measure_imports(args.module) for _ in range(args.runs)]
+    import_ms = statistics.median(total for total, _ in import_runs)
+    slowest = import_runs[-1][1][: args.top]
+
+    first_request_ms = None
+    if not args.skip_server:
+        first_request_ms = statistics.median(
+            measure_first_request(args.app, args.timeout) for _ in range(args.runs)
+        )
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import {import_ms:.0f}ms > {args.import_budget_ms:.0f}ms")
+    if first_request_ms is not None and first_request_ms > args.first_request_budget_ms:
+        failures.append(
+            f"first request {first_request_ms:.0f}ms > {args.first_request_budget_ms:.0f}ms"
+        )
+
+    if args.json:
+        print(json.dumps({
+            "import_ms": round(import_ms, 1),
+            "first_request_ms": round(first_request_ms, 1) if first_request_ms else None,
+            "slowest_imports": {name: round(ms, 1) for name, ms in slowest},
+            "failures": failures,
+        }, indent=2))
+    else:
+        print(f"import {args.module}: {import_ms:.0f}ms (budget {args.import_budget_ms:.0f}ms)")
+        for name, ms in slowest:
+            print(f"  {ms:8.1f}ms  {name}")
+        if first_request_ms is not None:
+            print(
+                f"first request: {first_request_ms:.0f}ms "
+                f"(budget {args.first_request_budget_ms:.0f}ms)"
+            )
+        for failure in failures:
+            print(f"OVER BUDGET: {failure}", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
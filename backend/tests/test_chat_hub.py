@@ -0,0 +1,79 @@
+"""Chat WebSocket hub: heartbeats and frame handling."""
+
+import asyncio
+import json
+
+from fastapi import HTTPException, WebSocketDisconnect
+
+from app.api.v1.chats import MessageFrame
+from app.core.config import settings
+from app.services.chat_hub import ChatConnection, serve_connection
+
+
+class FakeWebSocket:
+    def __init__(self, incoming: list[str] = ()):
+        self.sent: list[dict] = []
+        self.incoming = list(incoming)
+
+    async def send_json(self, data: dict) -> None:
+        self.sent.append(data)
+
+    async def receive_text(self) -> str:
+        if not self.incoming:
+            raise WebSocketDisconnect()
+        return self.incoming.pop(0)
+
+
+def test_pings_keep_going_in_a_busy_chat(monkeypatch):
+    monkeypatch.setattr(settings, "WS_HEARTBEAT_SECONDS", 0.05)
+
+    async def run() -> list[dict]:
+        ws = FakeWebSocket()
+        conn = ChatConnection(ws, "chat")
+        sender = asyncio.create_task(conn.run_sender())
+        # A message every 10 ms: the queue is never idle for a full interval
+        for i in range(30):
+            conn.offer({"i": i})
+            await asyncio.sleep(0.01)
+        sender.cancel()
+        return ws.sent
+
+    sent = asyncio.run(run())
+    assert sum(frame["type"] == "ping" for frame in sent) >= 3
+    delivered = [m["i"] for frame in sent if frame["type"] == "messages" for m in frame["messages"]]
+    assert delivered == list(range(30))
+
+
+def test_bad_frames_get_errors_and_the_connection_survives():
+    frames = [
+        "{not json",
+        json.dumps(["a", "list"]),
+        json.dumps({"type": "message", "text": 42, "client_id": "c1"}),
+        json.dumps({"type": "message", "image_url": "x" * 501}),
+        json.dumps({"type": "message", "text": "   ", "client_id": "c2"}),
+        json.dumps({"type": "message", "text": "not yours", "client_id": "c3"}),
+        json.dumps({"type": "message", "text": "boom"}),
+        json.dumps({"type": "pong"}),
+        json.dumps({"type": "message", "text": " hello ", "client_id": "c4"}),
+    ]
+    accepted = []
+
+    async def on_frame(frame: dict) -> None:
+        body = MessageFrame.model_validate(frame)
+        text = (body.text or "").strip()
+        if not text and not body.image_url:
+            raise HTTPException(status_code=422, detail="Message is empty")
+        if text == "not yours":
+            raise HTTPException(status_code=404, detail="Chat not found")
+        if text == "boom":
+            raise RuntimeError("database down")
+        accepted.append((text, body.client_id))
+
+    ws = FakeWebSocket(frames)
+    asyncio.run(serve_connection(ChatConnection(ws, "chat"), on_frame))
+
+    errors = [(f["status"], f["client_id"]) for f in ws.sent if f["type"] == "error"]
+    assert errors == [
+        (400, None), (400, None), (422, "c1"), (422, None), (422, "c2"), (404, "c3"), (500, None)
+    ]
+    assert accepted == [("hello", "c4")]
@@ -0,0 +1,99 @@
+"""Bot notification digests: claiming and sending against a fake Bot API."""
+
+import asyncio
+import json
+
+import fakeredis.aioredis
+import httpx
+import pytest
+
+from app.bot import dispatcher
+from app.bot.client import BotClient
+from app.bot.dispatcher import DUE_KEY, _claim_due, digest_key, queue_notification, send_digest
+from app.core import ratelimit
+from app.core.config import settings
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(dispatcher, "get_redis", lambda: client)
+    monkeypatch.setattr(ratelimit, "get_redis", lambda: client)
+    monkeypatch.setattr(settings, "BOT_TOKEN", "123:test")
+    monkeypatch.setattr(settings, "NOTIFY_DIGEST_SECONDS", 0)
+    return client
+
+
+@pytest.fixture
+def bot_api(monkeypatch):
+    """Fake Bot API: answers sendMessage with the queued replies, then ``ok``."""
+    requests, replies = [], []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append((request.url.path.rsplit("/", 1)[-1], json.loads(request.content)))
+        if replies:
+            return httpx.Response(200, json=replies.pop(0))
+        return httpx.Response(200, json={"ok": True, "result": {"message_id": len(requests)}})
+
+    monkeypatch.setattr(dispatcher, "bot_client", BotClient(httpx.MockTransport(handle)))
+    monkeypatch.setattr(dispatcher, "_paused_until", 0.0)
+    return requests, replies
+
+
+def test_concurrent_claims_take_each_digest_once(redis):
+    async def run():
+        for telegram_id in range(1, 21):
+            await queue_notification(telegram_id, "New message", key="chat")
+            await queue_notification(telegram_id, "New message", key="chat")
+
+        batches = await asyncio.gather(*(_claim_due(100) for _ in range(4)))
+        claimed = [item for batch in batches for item in batch]
+        assert sorted(chat_id for chat_id, _ in claimed) == list(range(1, 21))
+        assert all(text == "New message (×2)" for _, text in claimed)
+        assert await redis.zcard(DUE_KEY) == 0
+        assert not await redis.exists(*(digest_key(i) for i in range(1, 21)))
+
+    asyncio.run(run())
+
+
+def test_expired_digest_leaves_the_due_set(redis):
+    async def run():
+        await queue_notification(7, "Price dropped")
+        await redis.delete(digest_key(7))
+
+        assert await _claim_due(10) == []
+        assert await redis.zcard(DUE_KEY) == 0
+
+    asyncio.run(run())
+
+
+def test_send_digest_retries_after_429(redis, bot_api):
+    requests, replies = bot_api
+    replies.append({
+        "ok": False, "error_code": 429, "description": "Too Many Requests",
+        "parameters": {"retry_after": 0.01},
+    })
+
+    async def run():
+        assert await send_digest(42, "<b>2 updates</b>")
+        await dispatcher.bot_client.close()
+
+    asyncio.run(run())
+    assert [method for method, _ in requests] == ["sendMessage", "sendMessage"]
+    assert requests[-1][1]["chat_id"] == 42
+    assert requests[-1][1]["text"] == "<b>2 updates</b>"
+    assert requests[-1][1]["reply_markup"]["inline_keyboard"][-1][0]["callback_data"] == (
+        dispatcher.MUTE_CALLBACK
+    )
+
+
+def test_send_digest_gives_up_when_blocked(redis, bot_api):
+    requests, replies = bot_api
+    replies.append({"ok": False, "error_code": 403, "description": "bot was blocked by the user"})
+
+    async def run():
+        assert not await send_digest(42, "Hello")
+        await dispatcher.bot_client.close()
+
+    asyncio.run(run())
+    assert len(requests) == 1
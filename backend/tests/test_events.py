@@ -0,0 +1,63 @@
+"""Notification events: the per-worker stream reader."""
+
+import asyncio
+import uuid
+
+import fakeredis.aioredis
+import pytest
+
+from app.core.config import settings
+from app.services import events
+from app.services.events import EventHub, latest_event_id, publish_event, read_events
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(events, "get_redis", lambda: client)
+    monkeypatch.setattr(settings, "EVENTS_HUB_BLOCK_MS", 50)
+    return client
+
+
+def test_one_reader_wakes_only_the_users_with_new_events(redis):
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+
+    async def run():
+        hub = EventHub()
+        start_a, start_b = await latest_event_id(alice), await latest_event_id(bob)
+        wake_a, wake_b = hub.subscribe(alice, start_a), hub.subscribe(bob, start_b)
+        reader = hub._reader
+        # A second client of the same user shares the stream and the reader
+        wake_a2 = hub.subscribe(alice, start_a)
+        assert hub._reader is reader
+
+        await publish_event(alice, events.MESSAGE, {"text": "hi"})
+        await asyncio.wait_for(wake_a.wait(), timeout=1)
+        assert wake_a2.is_set() and not wake_b.is_set()
+
+        entries = await read_events(alice, start_a)
+        assert [fields["type"] for _, fields in entries] == [events.MESSAGE]
+        assert await read_events(bob, start_b) == []
+
+        for wake in (wake_a, wake_a2):
+            hub.unsubscribe(alice, wake)
+        hub.unsubscribe(bob, wake_b)
+        await asyncio.wait_for(reader, timeout=1)  # Stops once nobody listens
+        await hub.close()
+
+    asyncio.run(run())
+
+
+def test_events_between_subscribe_and_first_read_are_not_missed(redis):
+    user = uuid.uuid4()
+
+    async def run():
+        hub = EventHub()
+        position = await latest_event_id(user)
+        wake = hub.subscribe(user, position)
+        await publish_event(user, events.LISTING_SOLD, {"id": "1"})
+        await asyncio.wait_for(wake.wait(), timeout=1)
+        assert len(await read_events(user, position)) == 1
+        await hub.close()
+
+    asyncio.run(run())
@@ -0,0 +1,36 @@
+"""Image variants rendered from uploads."""
+
+import io
+
+from PIL import Image
+
+from app.services.image_render import ORIENTATION_TAG, render_variants
+
+
+def _jpeg(tmp_path, size: tuple[int, int], orientation: int | None = None) -> str:
+    image = Image.new("RGB", size, "red")
+    exif = Image.Exif()
+    if orientation is not None:
+        exif[ORIENTATION_TAG] = orientation
+    path = tmp_path / "photo.jpg"
+    image.save(path, "JPEG", exif=exif.tobytes())
+    return str(path)
+
+
+def test_dimensions_of_an_upright_photo(tmp_path):
+    result = render_variants(_jpeg(tmp_path, (4000, 3000)), 10**8, 80)
+    assert (result["width"], result["height"]) == (4000, 3000)
+
+
+def test_dimensions_follow_exif_rotation(tmp_path):
+    # A portrait phone photo: stored landscape, displayed rotated 90 degrees
+    result = render_variants(_jpeg(tmp_path, (4000, 3000), orientation=6), 10**8, 80)
+    assert (result["width"], result["height"]) == (3000, 4000)
+    full = Image.open(io.BytesIO(result["variants"]["full"]))
+    assert full.height > full.width
+
+
+def test_undecodable_file(tmp_path):
+    path = tmp_path / "notes.jpg"
+    path.write_bytes(b"not an image")
+    assert render_variants(str(path), 10**8, 80) is None
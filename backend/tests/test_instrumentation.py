@@ -0,0 +1,69 @@
+"""SQL instrumentation: timing hooks, error cleanup and strict mode."""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.instrumentation import (
+    QueryBudgetExceeded,
+    instrument_engine,
+    normalize_sql,
+    track_queries,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_normalize_sql_collapses_literals():
+    assert normalize_sql("SELECT * FROM t WHERE a = 'x' AND b IN (1, 2, 3)") == normalize_sql(
+        "SELECT  *  FROM t WHERE a = 'y' AND b IN (4)"
+    )
+
+
+def test_counts_queries(engine):
+    with track_queries(strict=False) as stats, engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+    assert stats.count == 2
+
+
+def test_failed_statement_leaves_no_start_time(engine):
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.rollback()
+        assert conn.info.get("query_start") == []
+
+
+def test_strict_mode_enforces_budget(engine):
+    with engine.connect() as conn, track_queries(budget=2, strict=True):
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+        with pytest.raises(QueryBudgetExceeded, match="budget of 2"):
+            conn.execute(text("SELECT 3"))
+
+
+def test_strict_mode_flags_repeated_statements(engine, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_REPEAT_THRESHOLD", 3)
+    with engine.connect() as conn, track_queries(budget=100, strict=True):
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+        with pytest.raises(QueryBudgetExceeded, match="Possible N\\+1"):
+            conn.execute(text("SELECT 3"))
+
+
+def test_lenient_mode_only_reports(engine, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_REPEAT_THRESHOLD", 2)
+    with engine.connect() as conn, track_queries(budget=1, strict=False) as stats:
+        for i in range(3):
+            conn.execute(text(f"SELECT {i}"))
+    assert stats.count == 3
+    assert stats.repeated == {"SELECT ?": 3}
@@ -0,0 +1,57 @@
+"""Search suggestions: counting past searches."""
+
+import asyncio
+
+import fakeredis.aioredis
+import pytest
+
+from app.core.config import settings
+from app.services import suggest
+from app.services.suggest import SuggestBuilder, current_day, queries_key, record_search
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(suggest, "get_redis", lambda: client)
+    monkeypatch.setattr(settings, "SUGGEST_MIN_QUERY_COUNT", 3)
+    monkeypatch.setattr(settings, "SUGGEST_QUERY_HALF_LIFE_DAYS", 1.0)
+    return client
+
+
+def test_repeat_searches_by_one_person_count_once(redis):
+    async def run():
+        for _ in range(10):
+            await record_search("iPhone 13", "tg:1")
+        assert await SuggestBuilder().popular_queries() == []
+
+        for searcher in ("tg:2", "tg:3"):
+            await record_search("iphone  13", searcher)
+        assert await SuggestBuilder().popular_queries() == [("iphone 13", 3.0)]
+
+    asyncio.run(run())
+
+
+def test_older_days_count_for_less(redis):
+    async def run():
+        today = current_day()
+        await redis.zadd(queries_key(today - 1), {"sofa": 4, "bike": 8})
+        await redis.zadd(queries_key(today - 30), {"tent": 100})
+
+        # A day's searches count half after one half-life; expired days not at all
+        assert await SuggestBuilder().popular_queries() == [("bike", 4.0)]
+
+    asyncio.run(run())
+
+
+def test_busy_days_drop_only_rare_searches(redis, monkeypatch):
+    monkeypatch.setattr(settings, "SUGGEST_MAX_QUERIES", 2)
+
+    async def run():
+        key = queries_key(current_day())
+        await redis.zadd(key, {"tv": 5, "car": 3, "a1": 1, "a2": 2, "a3": 1})
+
+        assert await SuggestBuilder().popular_queries() == [("tv", 5.0), ("car", 3.0)]
+        assert await redis.zrange(key, 0, -1) == ["car", "tv"]
+
+    asyncio.run(run())
@@ -17,11 +17,20 @@ interface PageState {
   sellerId?: string;
 }
 
+// Bot deep links open a listing: ?listing=<id> on the app URL, or startapp=listing_<id>
+function initialPage(): PageState {
+  const startParam = window.Telegram?.WebApp?.initDataUnsafe?.start_param;
+  const listingId =
+    new URLSearchParams(window.location.search).get('listing') ??
+    (startParam?.startsWith('listing_') ? startParam.slice('listing_'.length) : null);
+  return listingId ? { type: 'listing', listingId } : { type: 'main' };
+}
+
 function AppContent() {
   const { isLoading, isAuthenticated, error } = useAuth();
   const { haptic, isInTelegram } = useTelegram();
   const [activeTab, setActiveTab] = useState<TabType>('home');
-  const [page, setPage] = useState<PageState>({ type: 'main' });
+  const [page, setPage] = useState<PageState>(initialPage);
 
   // Block access outside Telegram (except in dev)
   const isDev = import.meta.env.DEV;
@@ -110,6 +119,7 @@ function AppContent() {
         listingId={page.listingId}
         onBack={handleBack}
         onChat={handleOpenChat}
+        onOpenListing={handleOpenListing}
       />
     );
   }
@@ -93,12 +93,19 @@ export const listingsApi = {
     if (params.max_price) searchParams.set('max_price', String(params.max_price));
     if (params.condition) searchParams.set('condition', params.condition);
     if (params.city) searchParams.set('city', params.city);
+    if (params.sort) searchParams.set('sort', params.sort);
     
     const query = searchParams.toString();
     return request<ListingsResponse>(`/listings${query ? `?${query}` : ''}`);
   },
   
   get: (id: string) => request<Listing>(`/listings/${id}`),
+
+  suggest: (q: string, limit = 8) =>
+    request<Suggestion[]>(`/listings/suggest?q=${encodeURIComponent(q)}&limit=${limit}`),
+
+  similar: (id: string, limit = 8) =>
+    request<Listing[]>(`/listings/${id}/similar?limit=${limit}`),
   
   create: (data: CreateListing) =>
     request<Listing>('/listings', {
@@ -169,6 +176,16 @@ export interface SellerInfo {
   member_since: string;
 }
 
+export interface ImageVariants {
+  url: string;
+  thumb: string | null;
+  card: string | null;
+  full: string | null;
+  placeholder: string | null;
+  width: number | null;
+  height: number | null;
+}
+
 export interface Listing {
   id: string;
   title: string;
@@ -178,6 +195,7 @@ export interface Listing {
   is_negotiable: boolean;
   condition: 'new' | 'like_new' | 'used' | 'for_parts';
   images: string[];
+  image_variants?: ImageVariants[];
   city: string;
   area: string | null;
   status: 'draft' | 'active' | 'sold' | 'expired' | 'deleted';
@@ -200,6 +218,7 @@ export interface ListingsParams {
   max_price?: number;
   condition?: string;
   city?: string;
+  sort?: 'newest' | 'for_you';
 }
 
 export interface ListingsResponse {
@@ -210,6 +229,12 @@ export interface ListingsResponse {
   has_more: boolean;
 }
 
+export interface Suggestion {
+  text: string;
+  kind: 'word' | 'category' | 'query';
+  category_id: string | null;
+}
+
 export interface CreateListing {
   title: string;
   description?: string;
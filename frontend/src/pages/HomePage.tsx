@@ -2,7 +2,7 @@ import { useEffect, useState } from 'react';
 import { Search, Plus, Heart, MapPin, Verified, RefreshCw } from 'lucide-react';
 import { useTelegram } from '@/lib/telegram';
 import { useAuth } from '@/hooks/useAuth';
-import { categoriesApi, listingsApi, demoApi, type Category, type Listing } from '@/lib/api';
+import { categoriesApi, listingsApi, demoApi, type Category, type Listing, type Suggestion } from '@/lib/api';
 
 interface HomePageProps {
   onOpenListing?: (listingId: string) => void;
@@ -14,7 +14,12 @@ export default function HomePage({ onOpenListing }: HomePageProps) {
   const [categories, setCategories] = useState<Category[]>([]);
   const [listings, setListings] = useState<Listing[]>([]);
   const [selectedCategory, setSelectedCategory] = useState<string | null>(null);
+  // What is typed drives suggestions; only a submitted search fetches listings
   const [searchQuery, setSearchQuery] = useState('');
+  const [submittedQuery, setSubmittedQuery] = useState('');
+  const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
+  const [searchFocused, setSearchFocused] = useState(false);
+  const [sort, setSort] = useState<'newest' | 'for_you'>('newest');
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
 
@@ -39,17 +44,30 @@ export default function HomePage({ onOpenListing }: HomePageProps) {
     init();
   }, [user?.is_admin]);
 
-  // Refetch when category changes
+  // Refetch when category, search or sort changes
   useEffect(() => {
     loadListings();
-  }, [selectedCategory, searchQuery]);
+  }, [selectedCategory, submittedQuery, sort]);
+
+  // Autocomplete, once typing pauses
+  useEffect(() => {
+    const q = searchQuery.trim();
+    if (!q) {
+      setSuggestions([]);
+      return;
+    }
+    const timer = setTimeout(() => {
+      listingsApi.suggest(q).then(setSuggestions).catch(() => setSuggestions([]));
+    }, 150);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
 
   const loadData = async () => {
     setLoading(true);
     try {
       const [cats, list] = await Promise.all([
         categoriesApi.list(),
-        listingsApi.list({ per_page: 20 }),
+        listingsApi.list({ per_page: 20, sort }),
       ]);
       setCategories(cats);
       setListings(list.items);
@@ -64,8 +82,9 @@ export default function HomePage({ onOpenListing }: HomePageProps) {
     try {
       const result = await listingsApi.list({
         category: selectedCategory || undefined,
-        search: searchQuery || undefined,
+        search: submittedQuery || undefined,
         per_page: 20,
+        sort,
       });
       setListings(result.items);
     } catch (error) {
@@ -85,6 +104,32 @@ export default function HomePage({ onOpenListing }: HomePageProps) {
     setSelectedCategory(categoryId === selectedCategory ? null : categoryId);
   };
 
+  const handleSuggestionSelect = (suggestion: Suggestion) => {
+    haptic.selection();
+    if (suggestion.category_id) {
+      setSelectedCategory(suggestion.category_id);
+      setSearchQuery('');
+      setSubmittedQuery('');
+    } else {
+      setSearchQuery(suggestion.text);
+      setSubmittedQuery(suggestion.text);
+    }
+    setSuggestions([]);
+  };
+
+  const handleSearchSubmit = (e: React.FormEvent) => {
+    e.preventDefault();
+    setSubmittedQuery(searchQuery.trim());
+    setSuggestions([]);
+    (document.activeElement as HTMLElement | null)?.blur();
+  };
+
+  const handleSearchChange = (value: string) => {
+    setSearchQuery(value);
+    // Clearing the box shows every listing again
+    if (!value.trim()) setSubmittedQuery('');
+  };
+
   const formatPrice = (price: number) => {
     return new Intl.NumberFormat('en-ET').format(price) + ' ብር';
   };
@@ -116,16 +161,37 @@ export default function HomePage({ onOpenListing }: HomePageProps) {
       {/* Header */}
       <div className="sticky top-0 z-10 bg-tg-bg px-4 py-3 border-b border-tg-secondary-bg">
         <div className="flex items-center gap-3">
-          <div className="flex-1 relative">
+          <form onSubmit={handleSearchSubmit} className="flex-1 relative">
             <Search className="absolute left-3 top-1/2 -translate-y-1/2 w-5 h-5 text-tg-hint" />
             <input
               type="text"
+              enterKeyHint="search"
               placeholder="ይፈልጉ... / Search..."
               value={searchQuery}
-              onChange={(e) => setSearchQuery(e.target.value)}
+              onChange={(e) => handleSearchChange(e.target.value)}
+              onFocus={() => setSearchFocused(true)}
+              // Delayed so a tap on a suggestion lands first
+              onBlur={() => setTimeout(() => setSearchFocused(false), 150)}
               className="w-full pl-10 pr-4 py-2.5 bg-tg-secondary-bg rounded-xl text-tg-text placeholder:text-tg-hint focus:outline-none focus:ring-2 focus:ring-tg-button"
             />
-          </div>
+            {searchFocused && suggestions.length > 0 && (
+              <div className="absolute left-0 right-0 top-full mt-1 bg-tg-bg rounded-xl shadow-lg border border-tg-secondary-bg overflow-hidden z-20">
+                {suggestions.map((suggestion) => (
+                  <button
+                    type="button"
+                    key={`${suggestion.kind}:${suggestion.text}`}
+                    onClick={() => handleSuggestionSelect(suggestion)}
+                    className="w-full flex items-center justify-between px-4 py-2.5 text-left text-tg-text hover:bg-tg-secondary-bg"
+                  >
+                    <span>{suggestion.text}</span>
+                    {suggestion.kind === 'category' && (
+                      <span className="text-xs text-tg-hint">ምድብ</span>
+                    )}
+                  </button>
+                ))}
+              </div>
+            )}
+          </form>
           <button
             onClick={handleRefresh}
             className="p-2.5 bg-tg-secondary-bg rounded-xl"
@@ -173,6 +239,24 @@ export default function HomePage({ onOpenListing }: HomePageProps) {
         </div>
       </div>
 
+      {/* Sort */}
+      {isAuthenticated && (
+        <div className="px-4 pb-3 flex gap-4 text-sm font-medium">
+          {([['newest', 'አዲስ / Newest'], ['for_you', '✨ ለእርስዎ / For you']] as const).map(([value, label]) => (
+            <button
+              key={value}
+              onClick={() => {
+                haptic.selection();
+                setSort(value);
+              }}
+              className={sort === value ? 'text-tg-button' : 'text-tg-hint'}
+            >
+              {label}
+            </button>
+          ))}
+        </div>
+      )}
+
       {/* Listings Grid */}
       <div className="px-4">
         {listings.length === 0 ? (
@@ -246,9 +330,18 @@ function ListingCard({ listing, formatPrice, getTimeAgo, onOpen }: ListingCardPr
       <div className="relative aspect-square bg-tg-bg">
         {listing.images && listing.images.length > 0 ? (
           <img
-            src={listing.images[0]}
+            src={listing.image_variants?.[0]?.card ?? listing.images[0]}
             alt={listing.title}
+            loading="lazy"
             className="w-full h-full object-cover"
+            style={
+              listing.image_variants?.[0]?.placeholder
+                ? {
+                    backgroundImage: `url(${listing.image_variants[0].placeholder})`,
+                    backgroundSize: 'cover',
+                  }
+                : undefined
+            }
           />
         ) : (
           <div className="w-full h-full flex items-center justify-center text-4xl">
@@ -12,6 +12,7 @@ interface ListingDetailPageProps {
   listingId: string;
   onBack: () => void;
   onChat: (listingId: string, sellerId: string) => void;
+  onOpenListing?: (listingId: string) => void;
 }
 
 const CONDITION_LABELS: Record<string, { am: string; en: string }> = {
@@ -21,7 +22,7 @@ const CONDITION_LABELS: Record<string, { am: string; en: string }> = {
   for_parts: { am: 'ለመለዋወጫ', en: 'For Parts' },
 };
 
-export default function ListingDetailPage({ listingId, onBack, onChat }: ListingDetailPageProps) {
+export default function ListingDetailPage({ listingId, onBack, onChat, onOpenListing }: ListingDetailPageProps) {
   const { haptic, webApp } = useTelegram();
   const { user } = useAuth();
   
@@ -29,9 +30,13 @@ export default function ListingDetailPage({ listingId, onBack, onChat }: Listing
   const [loading, setLoading] = useState(true);
   const [currentImageIndex, setCurrentImageIndex] = useState(0);
   const [isFavorited, setIsFavorited] = useState(false);
+  const [similar, setSimilar] = useState<Listing[]>([]);
 
   useEffect(() => {
     loadListing();
+    setCurrentImageIndex(0);
+    // Not needed for the page itself, so failures are ignored
+    listingsApi.similar(listingId).then(setSimilar).catch(() => setSimilar([]));
   }, [listingId]);
 
   const loadListing = async () => {
@@ -272,6 +277,40 @@ export default function ListingDetailPage({ listingId, onBack, onChat }: Listing
           </div>
         )}
 
+        {/* Similar Listings */}
+        {similar.length > 0 && (
+          <div>
+            <h3 className="font-medium text-tg-text mb-2">ተመሳሳይ / Similar items</h3>
+            <div className="flex gap-3 overflow-x-auto pb-2 -mx-4 px-4">
+              {similar.map((item) => (
+                <button
+                  key={item.id}
+                  onClick={() => {
+                    haptic.selection();
+                    onOpenListing?.(item.id);
+                  }}
+                  className="w-32 flex-shrink-0 text-left"
+                >
+                  <div className="w-32 h-32 bg-tg-secondary-bg rounded-xl overflow-hidden flex items-center justify-center text-3xl">
+                    {item.images?.[0] ? (
+                      <img
+                        src={item.image_variants?.[0]?.thumb ?? item.images[0]}
+                        alt={item.title}
+                        loading="lazy"
+                        className="w-full h-full object-cover"
+                      />
+                    ) : (
+                      '📦'
+                    )}
+                  </div>
+                  <p className="text-sm font-bold text-tg-text mt-1">{formatPrice(item.price)}</p>
+                  <p className="text-xs text-tg-hint truncate">{item.title}</p>
+                </button>
+              ))}
+            </div>
+          </div>
+        )}
+
         {/* Report */}
         <button className="flex items-center gap-2 text-sm text-tg-hint">
           <Flag className="w-4 h-4" />